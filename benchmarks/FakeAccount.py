@@ -0,0 +1,470 @@
+import hashlib
+import time
+
+from collections import Counter
+from copy import deepcopy
+from typing import Dict, List, Optional
+
+from botocore.awsrequest import AWSResponse
+from botocore.client import BaseClient
+
+
+class FakeAccount:
+    def __init__(
+            self,
+            services: int,
+            revisions: int,
+            parameters: int,
+            log_events: int,
+            cluster_name: str = 'Benchmark',
+            region: str = 'ap-southeast-2',
+            account_id: str = '123456789012',
+            latency: float = 0.0
+    ):
+        """
+        In-memory AWS account answering the ECS, ECR, SSM and CloudWatch Logs calls made during a deployment
+        :param services: Number of ECS services
+        :param revisions: Number of active task definition revisions for each service
+        :param parameters: Number of SSM parameters
+        :param log_events: Number of log events in each task log stream
+        :param cluster_name: ECS cluster name
+        :param region: AWS region
+        :param account_id: AWS account ID
+        :param latency: Number of seconds each API call takes
+        """
+        self.cluster_name = cluster_name
+        self.region = region
+        self.account_id = account_id
+        self.latency = latency
+        self.calls = Counter()
+        self.__log_events__ = log_events
+        self.__task_definitions__ = {}
+        self.__services__ = {}
+        self.__tasks__ = {}
+        self.__parameters__ = []
+        self.__deployment_id__ = 0
+
+        for service_index in range(0, services):
+            service_name = FakeAccount.get_service_name(service_index)
+            for revision in range(1, revisions + 1):
+                self.__add_task_definition__(FakeAccount.__create_task_definition__(
+                    family=service_name,
+                    image='{account_id}.dkr.ecr.{region}.amazonaws.com/{image}:revision-{revision}'.format(
+                        account_id=account_id,
+                        region=region,
+                        image=FakeAccount.get_container_id(service_index),
+                        revision=revision
+                    )
+                ))
+            task_definition_arn = self.__task_definitions__[service_name][-1]['taskDefinition']['taskDefinitionArn']
+            self.__services__[service_name] = {
+                'serviceName': service_name,
+                'serviceArn': 'arn:aws:ecs:{region}:{account_id}:service/{cluster_name}/{service_name}'.format(
+                    region=region,
+                    account_id=account_id,
+                    cluster_name=cluster_name,
+                    service_name=service_name
+                ),
+                'clusterArn': 'arn:aws:ecs:{region}:{account_id}:cluster/{cluster_name}'.format(
+                    region=region,
+                    account_id=account_id,
+                    cluster_name=cluster_name
+                ),
+                'status': 'ACTIVE',
+                'desiredCount': 2,
+                'runningCount': 2,
+                'pendingCount': 0,
+                'launchType': 'FARGATE',
+                'platformVersion': 'LATEST',
+                'enableECSManagedTags': True,
+                'placementConstraints': [],
+                'placementStrategy': [],
+                'taskDefinition': task_definition_arn,
+                'deploymentConfiguration': {
+                    'maximumPercent': 200,
+                    'minimumHealthyPercent': 100
+                },
+                'networkConfiguration': {
+                    'awsvpcConfiguration': {
+                        'subnets': ['subnet-00000000'],
+                        'securityGroups': ['sg-00000000'],
+                        'assignPublicIp': 'DISABLED'
+                    }
+                },
+                'loadBalancers': [],
+                'deployments': []
+            }
+            self.__deploy__(service_name, task_definition_arn)
+
+        for parameter_index in range(0, parameters):
+            # One in ten parameters is a container secret, the rest belong to other tooling
+            if parameter_index % 10 == 0:
+                self.__parameters__.append('/{cluster_name}/Env/SECRET_{index}'.format(cluster_name=cluster_name, index=parameter_index))
+            else:
+                self.__parameters__.append('/Terraform/{cluster_name}/Value{index}'.format(cluster_name=cluster_name, index=parameter_index))
+
+    @staticmethod
+    def get_service_name(index: int) -> str:
+        """
+        Return the ECS service name of the service at the given index
+        :param index: Service index
+        :return: ECS service name
+        """
+        return 'Service{index}'.format(index=index)
+
+    @staticmethod
+    def get_container_id(index: int) -> str:
+        """
+        Return the deploy.yml container ID of the service at the given index
+        :param index: Service index
+        :return: Container ID
+        """
+        return 'service{index}'.format(index=index)
+
+    def attach(self, client: BaseClient) -> None:
+        """
+        Answer every API call made by a botocore client from this account instead of AWS
+        :param client: The botocore client
+        """
+        client.meta.events.register('before-parameter-build', FakeAccount.__capture_parameters__)
+        client.meta.events.register('before-call', self.__handle__)
+
+    @staticmethod
+    def __capture_parameters__(params: Dict, context: Dict, **kwargs) -> None:
+        """
+        Keep the unserialized API parameters so they can be used to answer the call
+        """
+        context['fake_account_params'] = deepcopy(params)
+
+    def __handle__(self, model, context: Dict, **kwargs):
+        """
+        Answer an API call
+        :return: Tuple of the HTTP response and the parsed response
+        """
+        operation_name = model.name
+        self.calls['{service}.{operation}'.format(service=model.service_model.service_id.hyphenize(), operation=operation_name)] += 1
+        if self.latency > 0:
+            time.sleep(self.latency)
+
+        handler = getattr(self, '__{operation_name}__'.format(operation_name=operation_name), None)
+        if handler is None:
+            raise Exception('The fake account does not support {operation_name}'.format(operation_name=operation_name))
+
+        parsed = handler(context.get('fake_account_params', {}))
+        parsed['ResponseMetadata'] = {'HTTPStatusCode': 200, 'RequestId': 'fake', 'HTTPHeaders': {}}
+        return AWSResponse(url='https://fake.amazonaws.com', status_code=200, headers={}, raw=None), parsed
+
+    # ECS
+
+    def __ListTaskDefinitions__(self, params: Dict) -> Dict:
+        arns = []
+        for family in sorted(self.__task_definitions__.keys(), reverse=params.get('sort') == 'DESC'):
+            if 'familyPrefix' in params.keys() and family != params['familyPrefix']:
+                continue
+            revisions = self.__task_definitions__[family]
+            if params.get('sort') == 'DESC':
+                revisions = list(reversed(revisions))
+            for revision in revisions:
+                if revision['taskDefinition']['status'] == params.get('status', 'ACTIVE'):
+                    arns.append(revision['taskDefinition']['taskDefinitionArn'])
+        return FakeAccount.__paginate__(arns, 'taskDefinitionArns', params, page_size=params.get('maxResults', 100))
+
+    def __DescribeTaskDefinition__(self, params: Dict) -> Dict:
+        revision = self.__find_task_definition__(params['taskDefinition'])
+        result = {'taskDefinition': deepcopy(revision['taskDefinition'])}
+        if 'TAGS' in params.get('include', []):
+            result['tags'] = deepcopy(revision['tags'])
+        return result
+
+    def __RegisterTaskDefinition__(self, params: Dict) -> Dict:
+        tags = params.pop('tags', [])
+        task_definition = self.__add_task_definition__(params, tags)
+        return {'taskDefinition': deepcopy(task_definition['taskDefinition']), 'tags': tags}
+
+    def __DeregisterTaskDefinition__(self, params: Dict) -> Dict:
+        revision = self.__find_task_definition__(params['taskDefinition'])
+        revision['taskDefinition']['status'] = 'INACTIVE'
+        return {'taskDefinition': deepcopy(revision['taskDefinition'])}
+
+    def __DeleteTaskDefinitions__(self, params: Dict) -> Dict:
+        if len(params['taskDefinitions']) > 10:
+            raise Exception('DeleteTaskDefinitions accepts a maximum of 10 task definitions')
+        task_definitions = []
+        failures = []
+        for task_definition_arn in params['taskDefinitions']:
+            revision = self.__find_task_definition__(task_definition_arn)
+            if revision['taskDefinition']['status'] != 'INACTIVE':
+                failures.append({'arn': task_definition_arn, 'reason': 'The specified task definition is still in ACTIVE status'})
+                continue
+            revision['taskDefinition']['status'] = 'DELETE_IN_PROGRESS'
+            task_definitions.append(deepcopy(revision['taskDefinition']))
+        return {'taskDefinitions': task_definitions, 'failures': failures}
+
+    def __ListServices__(self, params: Dict) -> Dict:
+        arns = [service['serviceArn'] for service in self.__services__.values()]
+        return FakeAccount.__paginate__(arns, 'serviceArns', params, page_size=10)
+
+    def __DescribeServices__(self, params: Dict) -> Dict:
+        if len(params['services']) > 10:
+            raise Exception('DescribeServices accepts a maximum of 10 services')
+        services = []
+        failures = []
+        for name in params['services']:
+            service = self.__find_service__(name)
+            if service is None:
+                failures.append({'arn': name, 'reason': 'MISSING'})
+            else:
+                services.append(deepcopy(service))
+        return {'services': services, 'failures': failures}
+
+    def __UpdateService__(self, params: Dict) -> Dict:
+        service = self.__find_service__(params['service'])
+        for key in ['desiredCount', 'deploymentConfiguration', 'networkConfiguration', 'platformVersion', 'healthCheckGracePeriodSeconds']:
+            if key in params.keys():
+                service[key] = params[key]
+        if 'taskDefinition' in params.keys():
+            service['taskDefinition'] = self.__find_task_definition__(params['taskDefinition'])['taskDefinition']['taskDefinitionArn']
+        self.__deploy__(service['serviceName'], service['taskDefinition'])
+        return {'service': deepcopy(service)}
+
+    def __RunTask__(self, params: Dict) -> Dict:
+        task_definition_arn = self.__find_task_definition__(params['taskDefinition'])['taskDefinition']['taskDefinitionArn']
+        tasks = []
+        for _ in range(0, params.get('count', 1)):
+            task = self.__create_task__(task_definition_arn, started_by=params.get('startedBy', 'benchmark'), last_status='STOPPED')
+            tasks.append(deepcopy(task))
+        return {'tasks': tasks, 'failures': []}
+
+    def __StopTask__(self, params: Dict) -> Dict:
+        task = self.__tasks__[params['task']]
+        task['lastStatus'] = 'STOPPED'
+        task['stoppedReason'] = params.get('reason', '')
+        return {'task': deepcopy(task)}
+
+    def __DescribeTasks__(self, params: Dict) -> Dict:
+        if len(params['tasks']) > 100:
+            raise Exception('DescribeTasks accepts a maximum of 100 tasks')
+        tasks = []
+        failures = []
+        for task_arn in params['tasks']:
+            if task_arn in self.__tasks__.keys():
+                tasks.append(deepcopy(self.__tasks__[task_arn]))
+            else:
+                failures.append({'arn': task_arn, 'reason': 'MISSING'})
+        return {'tasks': tasks, 'failures': failures}
+
+    def __ListTasks__(self, params: Dict) -> Dict:
+        arns = []
+        for task in self.__tasks__.values():
+            if 'serviceName' in params.keys() and task.get('group') != 'service:{name}'.format(name=params['serviceName']):
+                continue
+            if 'startedBy' in params.keys() and task['startedBy'] != params['startedBy']:
+                continue
+            if task['desiredStatus'] != params.get('desiredStatus', 'RUNNING'):
+                continue
+            arns.append(task['taskArn'])
+        return FakeAccount.__paginate__(arns, 'taskArns', params, page_size=100)
+
+    # SSM
+
+    def __GetParametersByPath__(self, params: Dict) -> Dict:
+        path = params['Path'].rstrip('/') + '/'
+        names = []
+        for name in self.__parameters__:
+            if name.startswith(path) is False:
+                continue
+            if params.get('Recursive', False) is False and '/' in name[len(path):]:
+                continue
+            names.append(name)
+
+        start = int(params.get('NextToken', 0))
+        page = names[start:start + 10]
+        result = {'Parameters': [{'Name': name, 'Type': 'SecureString', 'Version': 1} for name in page]}
+        if start + 10 < len(names):
+            result['NextToken'] = str(start + 10)
+        return result
+
+    def __GetParameters__(self, params: Dict) -> Dict:
+        if len(params['Names']) > 10:
+            raise Exception('GetParameters accepts a maximum of 10 names')
+        parameters = [{'Name': name, 'Type': 'SecureString', 'Version': 1} for name in params['Names'] if name in self.__parameters__]
+        return {'Parameters': parameters, 'InvalidParameters': [name for name in params['Names'] if name not in self.__parameters__]}
+
+    # ECR
+
+    def __DescribeRepositories__(self, params: Dict) -> Dict:
+        names = [FakeAccount.get_container_id(index) for index in range(0, len(self.__services__))]
+        result = FakeAccount.__paginate__(names, 'repositories', params, params.get('maxResults', 100))
+        result['repositories'] = [{'repositoryName': name} for name in result['repositories']]
+        return result
+
+    def __DescribeImages__(self, params: Dict) -> Dict:
+        image_details = []
+        for image_id in params.get('imageIds', []):
+            image_details.append({
+                'repositoryName': params['repositoryName'],
+                'imageTags': [image_id['imageTag']],
+                'imageDigest': FakeAccount.__get_image_digest__('{account_id}.dkr.ecr.{region}.amazonaws.com/{repository_name}:{image_tag}'.format(
+                    account_id=self.account_id,
+                    region=self.region,
+                    repository_name=params['repositoryName'],
+                    image_tag=image_id['imageTag']
+                ))
+            })
+        return {'imageDetails': image_details}
+
+    # CloudWatch Logs
+
+    def __GetLogEvents__(self, params: Dict) -> Dict:
+        events = [{
+            'timestamp': 1600000000000 + index,
+            'message': 'Log event {index} from {stream}'.format(index=index, stream=params['logStreamName']),
+            'ingestionTime': 1600000000000 + index
+        } for index in range(0, self.__log_events__)]
+
+        limit = params.get('limit', 10000)
+        if params.get('startFromHead', False) is True:
+            events = events[:limit]
+        else:
+            events = events[-limit:]
+
+        return {
+            'events': events,
+            'nextForwardToken': 'f/{count}'.format(count=len(events)),
+            'nextBackwardToken': 'b/0'
+        }
+
+    # Helpers
+
+    @staticmethod
+    def __paginate__(items: List[str], key: str, params: Dict, page_size: int) -> Dict:
+        start = int(params.get('nextToken', 0))
+        result = {key: items[start:start + page_size]}
+        if start + page_size < len(items):
+            result['nextToken'] = str(start + page_size)
+        return result
+
+    @staticmethod
+    def __create_task_definition__(family: str, image: str) -> Dict:
+        return {
+            'family': family,
+            'taskRoleArn': 'arn:aws:iam::123456789012:role/{family}Task'.format(family=family),
+            'executionRoleArn': 'arn:aws:iam::123456789012:role/{family}Execution'.format(family=family),
+            'networkMode': 'awsvpc',
+            'containerDefinitions': [{
+                'name': family,
+                'image': image,
+                'essential': True,
+                'environment': [{'name': 'APP_ENV', 'value': 'benchmark'}],
+                'secrets': [],
+                'logConfiguration': {
+                    'logDriver': 'awslogs',
+                    'options': {
+                        'awslogs-group': '/ecs/{family}'.format(family=family),
+                        'awslogs-region': 'ap-southeast-2',
+                        'awslogs-stream-prefix': family
+                    }
+                }
+            }],
+            'volumes': [],
+            'placementConstraints': [],
+            'requiresCompatibilities': ['FARGATE'],
+            'cpu': '256',
+            'memory': '512'
+        }
+
+    def __add_task_definition__(self, definition: Dict, tags: Optional[List[Dict]] = None) -> Dict:
+        family = definition['family']
+        if family not in self.__task_definitions__.keys():
+            self.__task_definitions__[family] = []
+        revision = len(self.__task_definitions__[family]) + 1
+        task_definition = deepcopy(definition)
+        task_definition['revision'] = revision
+        task_definition['status'] = 'ACTIVE'
+        task_definition['taskDefinitionArn'] = 'arn:aws:ecs:{region}:{account_id}:task-definition/{family}:{revision}'.format(
+            region=self.region,
+            account_id=self.account_id,
+            family=family,
+            revision=revision
+        )
+        entry = {'taskDefinition': task_definition, 'tags': tags or []}
+        self.__task_definitions__[family].append(entry)
+        return entry
+
+    def __find_task_definition__(self, identifier: str) -> Dict:
+        name = identifier.split('/')[-1]
+        family, _, revision = name.partition(':')
+        if family not in self.__task_definitions__.keys():
+            raise Exception('Unable to describe task definition ({identifier})'.format(identifier=identifier))
+        if revision == '':
+            active = [entry for entry in self.__task_definitions__[family] if entry['taskDefinition']['status'] == 'ACTIVE']
+            return active[-1]
+        return self.__task_definitions__[family][int(revision) - 1]
+
+    def __find_service__(self, identifier: str) -> Optional[Dict]:
+        return self.__services__.get(identifier.split('/')[-1])
+
+    def __create_task__(self, task_definition_arn: str, started_by: str, last_status: str, group: Optional[str] = None) -> Dict:
+        task_id = '{index:032x}'.format(index=len(self.__tasks__) + 1)
+        family = task_definition_arn.split('/')[-1].split(':')[0]
+        image = self.__find_task_definition__(task_definition_arn)['taskDefinition']['containerDefinitions'][0]['image']
+        task = {
+            'taskArn': 'arn:aws:ecs:{region}:{account_id}:task/{cluster_name}/{task_id}'.format(
+                region=self.region,
+                account_id=self.account_id,
+                cluster_name=self.cluster_name,
+                task_id=task_id
+            ),
+            'taskDefinitionArn': task_definition_arn,
+            'startedBy': started_by,
+            'lastStatus': last_status,
+            'desiredStatus': last_status,
+            'containers': [{
+                'name': family,
+                'lastStatus': last_status,
+                'exitCode': 0,
+                'imageDigest': FakeAccount.__get_image_digest__(image)
+            }]
+        }
+        if group is not None:
+            task['group'] = group
+        if last_status == 'STOPPED':
+            task['stopCode'] = 'EssentialContainerExited'
+            task['stoppedReason'] = 'Essential container in task exited'
+        self.__tasks__[task['taskArn']] = task
+        return task
+
+    @staticmethod
+    def __get_image_digest__(image: str) -> str:
+        # Pinned images already contain their digest, tagged images get a digest derived from the tag
+        if '@' in image:
+            return image.split('@')[-1]
+        return 'sha256:' + hashlib.sha256(image.encode('utf-8')).hexdigest()
+
+    def __deploy__(self, service_name: str, task_definition_arn: str) -> None:
+        """
+        Complete a deployment immediately, replacing the running tasks of the service
+        """
+        service = self.__services__[service_name]
+        for task in self.__tasks__.values():
+            if task.get('group') == 'service:{name}'.format(name=service_name) and task['desiredStatus'] == 'RUNNING':
+                task['desiredStatus'] = 'STOPPED'
+                task['lastStatus'] = 'STOPPED'
+
+        self.__deployment_id__ += 1
+        deployment_id = 'ecs-svc/{deployment_id:019d}'.format(deployment_id=self.__deployment_id__)
+        for _ in range(0, service['desiredCount']):
+            self.__create_task__(task_definition_arn, started_by=deployment_id, last_status='RUNNING', group='service:{name}'.format(name=service_name))
+
+        service['deployments'] = [{
+            'id': deployment_id,
+            'status': 'PRIMARY',
+            'taskDefinition': task_definition_arn,
+            'desiredCount': service['desiredCount'],
+            'runningCount': service['desiredCount'],
+            'pendingCount': 0,
+            'failedTasks': 0,
+            'rolloutState': 'COMPLETED',
+            'rolloutStateReason': 'ECS deployment completed.'
+        }]
+
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import yaml
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import deploy  # noqa: E402
+from Aws.Session import Session  # noqa: E402
+from Deployment.ConfigurationFile import ConfigurationFile  # noqa: E402
+from Deployment.DiscoveryCache import DiscoveryCache  # noqa: E402
+from Deployment.Preflight import Preflight  # noqa: E402
+from FakeAccount import FakeAccount  # noqa: E402
+
+
+def create_workspace(path: str, account: FakeAccount, containers: int) -> str:
+    """
+    Create a repository containing a deploy.yml file for the fake account
+    :param path: Folder to create the repository in
+    :param account: The fake account
+    :param containers: Number of containers to deploy
+    :return: The deploy.yml filename
+    """
+    os.makedirs(os.path.join(path, '.git'))
+    os.makedirs(os.path.join(path, '.github'))
+    os.makedirs(os.path.join(path, 'docker', 'entrypoints'))
+    with open(os.path.join(path, 'Dockerfile'), 'w') as file:
+        file.write('FROM scratch\n')
+
+    deploy_containers = {}
+    for index in range(0, containers):
+        with open(os.path.join(path, 'docker', 'entrypoints', FakeAccount.get_container_id(index) + '.sh'), 'w') as file:
+            file.write('#!/bin/sh\n')
+        deploy_containers[FakeAccount.get_container_id(index)] = {
+            'dockerfile': 'Dockerfile',
+            'image': FakeAccount.get_container_id(index),
+            # Exercise each of the rollout paths
+            'run_during_deployment': index % 5 == 0,
+            'wait_service_stable': index % 5 == 1
+        }
+        if index % 10 == 1:
+            deploy_containers[FakeAccount.get_container_id(index)]['rollout'] = {'profile': 'fast', 'scale_out': 1}
+
+    filename = os.path.join(path, '.github', 'deploy.yml')
+    with open(filename, 'w') as file:
+        yaml.dump({
+            'type': 'deployment_docker_compose',
+            'version': 1,
+            'configuration': {
+                'environments': {
+                    account.cluster_name: {
+                        'aws_account_id': account.account_id,
+                        'aws_deployment_region': account.region,
+                        'aws_deployment_cluster_name': account.cluster_name,
+                        'containers': deploy_containers
+                    }
+                }
+            }
+        }, file)
+
+    return filename
+
+
+def run_scenario(name: str, scenario: dict) -> dict:
+    """
+    Run the ECS phase of a deployment against a fake account
+    :param name: Scenario name
+    :param scenario: Scenario settings
+    :return: Results
+    """
+    account = FakeAccount(
+        services=scenario['services'],
+        revisions=scenario['revisions'],
+        parameters=scenario['parameters'],
+        log_events=scenario['log_events'],
+        latency=scenario.get('latency', 0.0)
+    )
+    working_directory = os.getcwd()
+    with tempfile.TemporaryDirectory() as path:
+        os.chdir(path)
+        try:
+            configuration = ConfigurationFile(create_workspace(path, account, scenario['containers']))
+            environment = configuration.get_environment(account.cluster_name, image_tag='benchmark')
+            containers = environment.get_container_names()
+            session = Session(
+                aws_access_key_id='benchmark',
+                aws_secret_access_key='benchmark',
+                region_name=account.region
+            )
+            session.add_hook(account)
+
+            # Warm scenarios measure a second deployment that revalidates the discovery results of the first
+            cache = DiscoveryCache(
+                filename=None,
+                account_id=environment.aws_account_id,
+                region=environment.aws_deployment_region,
+                cluster_name=environment.aws_deployment_cluster_name
+            )
+            if scenario.get('warm', False) is True:
+                with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                    deploy.deploy_ecs(
+                        environment=environment,
+                        deployment_containers=containers,
+                        session=session,
+                        preflight=Preflight(environment=environment, container_ids=containers, session=session, cache=cache)
+                    )
+                account.calls.clear()
+
+            tracemalloc.start()
+            started = time.perf_counter()
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                deploy.deploy_ecs(
+                    environment=environment,
+                    deployment_containers=containers,
+                    session=session,
+                    preflight=Preflight(environment=environment, container_ids=containers, session=session, cache=cache)
+                )
+            seconds = time.perf_counter() - started
+            _, peak_memory = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+        finally:
+            os.chdir(working_directory)
+
+    return {
+        'scenario': name,
+        'seconds': round(seconds, 3),
+        'peak_memory_mb': round(peak_memory / 1024 / 1024, 2),
+        'calls': sum(account.calls.values()),
+        'calls_by_operation': dict(sorted(account.calls.items()))
+    }
+
+
+def check_thresholds(result: dict, scenario: dict, call_margin: float = 0.0) -> list:
+    """
+    Compare a result against the scenario thresholds. Call counts are recorded exactly, the margin allows some growth
+    before it is reported (e.g. an extra page of results) while calls limited to 0 are never allowed
+    :param result: Scenario results
+    :param scenario: Scenario settings
+    :param call_margin: Fraction the call counts may exceed their recorded limits by
+    :return: List of regressions
+    """
+    regressions = []
+    for metric in ['seconds', 'peak_memory_mb', 'calls']:
+        limit = scenario.get('max_{metric}'.format(metric=metric))
+        if limit is not None and metric == 'calls':
+            limit = int(limit * (1 + call_margin))
+        if limit is not None and result[metric] > limit:
+            regressions.append('{scenario}: {metric} {value} exceeds {limit}'.format(
+                scenario=result['scenario'],
+                metric=metric,
+                value=result[metric],
+                limit=limit
+            ))
+
+    for operation, limit in scenario.get('max_calls_by_operation', {}).items():
+        limit = int(limit * (1 + call_margin))
+        value = result['calls_by_operation'].get(operation, 0)
+        if value > limit:
+            regressions.append('{scenario}: {operation} called {value} times, limit is {limit}'.format(
+                scenario=result['scenario'],
+                operation=operation,
+                value=value,
+                limit=limit
+            ))
+
+    return regressions
+
+
+def main() -> None:
+    """
+    Run the benchmark scenarios
+    """
+    parser = argparse.ArgumentParser(description='Benchmark the ECS deployment phase against a fake AWS account')
+    parser.add_argument('--thresholds', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'thresholds.json'))
+    parser.add_argument('--scenario', action='append', help='Scenario to run (defaults to all scenarios)')
+    parser.add_argument('--check', action='store_true', help='Exit with an error if a threshold is exceeded')
+    parser.add_argument('--output', help='Write the results to a JSON file')
+    arguments = parser.parse_args()
+
+    with open(arguments.thresholds, 'r') as file:
+        thresholds = json.load(file)
+    scenarios = thresholds['scenarios']
+
+    results = []
+    regressions = []
+    for name, scenario in scenarios.items():
+        if arguments.scenario is not None and name not in arguments.scenario:
+            continue
+        result = run_scenario(name, scenario)
+        results.append(result)
+        regressions.extend(check_thresholds(result, scenario, thresholds.get('call_margin', 0.0)))
+        print('{scenario}: {seconds}s, {peak_memory_mb} MB peak, {calls} API calls'.format(**result))
+        for operation, count in result['calls_by_operation'].items():
+            print('    {operation}: {count}'.format(operation=operation, count=count))
+
+    if arguments.output is not None:
+        with open(arguments.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    for regression in regressions:
+        print('REGRESSION: {regression}'.format(regression=regression))
+
+    if arguments.check is True and len(regressions) > 0:
+        exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+import json
+import os
+import sys
+import time
+
+import yaml
+
+
+def load_configuration() -> dict:
+    """
+    Load the fake CLI configuration from the file named by FAKE_CLI_CONFIGURATION
+    :return: Configuration
+    """
+    if 'FAKE_CLI_CONFIGURATION' not in os.environ.keys():
+        return {}
+    with open(os.environ['FAKE_CLI_CONFIGURATION'], 'r') as file:
+        return json.load(file)
+
+
+def simulate(configuration: dict, step: str, name: str) -> None:
+    """
+    Sleep for the configured latency of a step and fail if the step is configured to fail
+    :param configuration: Fake CLI configuration
+    :param step: The step (build, push, pull, login or get-login-password)
+    :param name: The container or image the step is for
+    """
+    latencies = configuration.get('latency', {}).get(step, {})
+    seconds = latencies.get(name, latencies.get('default', 0))
+    time.sleep(seconds * configuration.get('scale', 1.0))
+
+    if '{step}:{name}'.format(step=step, name=name) in configuration.get('fail', []) or step in configuration.get('fail', []):
+        sys.stderr.write('Simulated {step} failure for {name}\n'.format(step=step, name=name))
+        exit(1)
+
+    sys.stdout.write('Simulated {step} for {name} ({seconds}s)\n'.format(step=step, name=name, seconds=seconds))
+
+
+def main(executable: str) -> None:
+    """
+    Stand in for the docker, docker-compose and aws executables
+    :param executable: The executable being simulated
+    """
+    configuration = load_configuration()
+    arguments = sys.argv[1:]
+
+    if executable == 'docker-compose' and len(arguments) == 3 and arguments[0] == '-f':
+        with open(arguments[1], 'r') as file:
+            services = yaml.safe_load(file)['services']
+        simulate(configuration, arguments[2], list(services.keys())[0])
+    elif executable == 'docker' and len(arguments) > 0 and arguments[0] in ['login', 'pull']:
+        simulate(configuration, arguments[0], arguments[-1])
+    elif executable == 'aws' and arguments[:2] == ['ecr', 'get-login-password']:
+        simulate(configuration, 'get-login-password', 'ecr')
+    else:
+        sys.stderr.write('Unsupported {executable} command: {arguments}\n'.format(executable=executable, arguments=' '.join(arguments)))
+        exit(1)
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+import argparse
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from Deployment.AwsCli import AwsCli  # noqa: E402
+from Deployment.BuildScheduler import BuildScheduler  # noqa: E402
+from Deployment.CommandRunner import CommandRunner  # noqa: E402
+from Deployment.Docker import Docker  # noqa: E402
+from Deployment.DockerCompose import DockerCompose  # noqa: E402
+
+
+def create_configuration(path: str, containers: int, scale: float, seed: int, fail: list) -> str:
+    """
+    Create a fake CLI configuration with a mix of short and long builds
+    :param path: Folder to write the configuration to
+    :param containers: Number of containers
+    :param scale: Multiplier applied to every latency
+    :param seed: Random seed so each strategy sees the same latencies
+    :param fail: Steps that should fail (e.g. build:container3)
+    :return: The configuration filename
+    """
+    generator = random.Random(seed)
+    build = {'default': 0}
+    push = {'default': 0}
+    for index in range(0, containers):
+        container_id = 'container{index}'.format(index=index)
+        # Most builds are quick, roughly one in five is a long build
+        build[container_id] = generator.uniform(20, 60) if generator.random() > 0.2 else generator.uniform(300, 720)
+        push[container_id] = generator.uniform(10, 60)
+
+    filename = os.path.join(path, 'fake-cli.json')
+    with open(filename, 'w') as file:
+        json.dump({
+            'scale': scale,
+            'fail': fail,
+            'latency': {
+                'build': build,
+                'push': push,
+                'login': {'default': 1},
+                'get-login-password': {'default': 1}
+            }
+        }, file)
+    return filename
+
+
+def run(strategy: str, containers: int, max_workers: int) -> float:
+    """
+    Build and push the containers with the fake CLI
+    :param strategy: Build schedule
+    :param containers: Number of containers
+    :param max_workers: Maximum number of concurrent builds
+    :return: Wall time in seconds
+    """
+    build_files = {}
+    for index in range(0, containers):
+        container_id = 'container{index}'.format(index=index)
+        image = 'benchmark.dkr.ecr.ap-southeast-2.amazonaws.com/{container_id}:benchmark'.format(container_id=container_id)
+        build_files[image] = DockerCompose.create_build_file(
+            context='/tmp',
+            container_id=container_id,
+            environment_id='benchmark',
+            dockerfile='/tmp/Dockerfile',
+            image=image
+        )
+
+    def login() -> None:
+        Docker.login(
+            repository_url='benchmark.dkr.ecr.ap-southeast-2.amazonaws.com',
+            username='AWS',
+            password=AwsCli.ecr_get_login_password('ap-southeast-2')
+        )
+
+    started = time.perf_counter()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        BuildScheduler(strategy=strategy, max_workers=max_workers).run(
+            images=list(build_files.keys()),
+            build=lambda image: DockerCompose.build(build_files[image]),
+            push=lambda image: DockerCompose.push(build_files[image]),
+            before_push=login
+        )
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    """
+    Compare build schedules for increasing numbers of containers
+    """
+    parser = argparse.ArgumentParser(description='Benchmark build and push scheduling with fake docker, docker-compose and aws executables')
+    parser.add_argument('--containers', type=int, nargs='+', default=[1, 5, 10, 25, 50])
+    parser.add_argument('--strategy', action='append', choices=BuildScheduler.STRATEGIES)
+    parser.add_argument('--max-workers', type=int, default=4)
+    parser.add_argument('--scale', type=float, default=0.001, help='Multiplier applied to the simulated latencies (1.0 is real time)')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--fail', action='append', default=[], help='Simulate a failing step, e.g. build:container3')
+    parser.add_argument('--output', help='Write the results to a JSON file')
+    arguments = parser.parse_args()
+
+    strategies = arguments.strategy or BuildScheduler.STRATEGIES
+    bin_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bin')
+    results = []
+
+    with tempfile.TemporaryDirectory() as path:
+        print('{containers:>10} {strategies}'.format(
+            containers='containers',
+            strategies=' '.join('{strategy:>12}'.format(strategy=strategy) for strategy in strategies)
+        ))
+        for containers in arguments.containers:
+            CommandRunner.set_default(CommandRunner(
+                path=[bin_path],
+                environment={
+                    'FAKE_CLI_CONFIGURATION': create_configuration(path, containers, arguments.scale, arguments.seed, arguments.fail)
+                }
+            ))
+            row = {'containers': containers}
+            for strategy in strategies:
+                try:
+                    row[strategy] = round(run(strategy, containers, arguments.max_workers), 3)
+                except Exception as exception:
+                    print('{strategy} failed: {exception}'.format(strategy=strategy, exception=exception))
+                    row[strategy] = None
+            results.append(row)
+            print('{containers:>10} {strategies}'.format(
+                containers=containers,
+                strategies=' '.join('{value:>12}'.format(value=str(row[strategy])) for strategy in strategies)
+            ))
+        CommandRunner.set_default(None)
+
+    if arguments.output is not None:
+        with open(arguments.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+import base64
+import gzip
+import json
+
+from datetime import datetime
+from typing import Any, Dict, List
+
+
+class Cassette:
+    # Current cassette file format version
+    VERSION = 1
+
+    # Keys (compared case-insensitively) whose values are never written to a cassette
+    REDACTED_KEYS = [
+        'password',
+        'secretaccesskey',
+        'sessiontoken',
+        'authorizationtoken',
+        'secretstring',
+        'secretbinary'
+    ]
+
+    # Placeholder written in place of redacted values
+    REDACTED = '**REDACTED**'
+
+    def __init__(self, interactions: List[Dict] = None):
+        """
+        Recorded AWS API traffic
+        :param interactions: Recorded interactions in the order they were made
+        """
+        self.interactions = interactions if interactions is not None else []
+
+    def save(self, filename: str) -> None:
+        """
+        Write the cassette to a gzip compressed JSON file
+        :param filename: Cassette filename
+        """
+        with gzip.open(filename, 'wt', encoding='utf-8') as file:
+            json.dump({
+                'version': Cassette.VERSION,
+                'interactions': self.interactions
+            }, file, separators=(',', ':'))
+
+    @staticmethod
+    def load(filename: str) -> 'Cassette':
+        """
+        Read a cassette file
+        :param filename: Cassette filename
+        :return: Cassette
+        """
+        with gzip.open(filename, 'rt', encoding='utf-8') as file:
+            content = json.load(file)
+
+        if content.get('version') != Cassette.VERSION:
+            raise Exception('Unsupported cassette version ({version}) in {filename}'.format(
+                version=content.get('version'),
+                filename=filename
+            ))
+
+        return Cassette(content['interactions'])
+
+    @staticmethod
+    def encode(value: Any, key: str = '', parent: str = '') -> Any:
+        """
+        Convert an API request or response into JSON compatible values, redacting secrets
+        :param value: The value to encode
+        :param key: The key the value is stored under
+        :param parent: The key of the containing dictionary or list
+        :return: Encoded value
+        """
+        if key.lower() in Cassette.REDACTED_KEYS:
+            return Cassette.REDACTED
+        # SSM parameter values (in responses, and at the top level of requests such as put parameter) and container
+        # environment variable values may contain secrets
+        if key == 'Value' and parent in ['', 'Parameter', 'Parameters'] or key == 'value' and parent == 'environment':
+            return Cassette.REDACTED
+
+        if isinstance(value, dict):
+            return {item_key: Cassette.encode(item, item_key, key or parent) for item_key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [Cassette.encode(item, '', key) for item in value]
+        if isinstance(value, datetime):
+            return {'__datetime__': value.isoformat()}
+        if isinstance(value, bytes):
+            return {'__bytes__': base64.b64encode(value).decode('ascii')}
+        if value is None or isinstance(value, (str, int, float, bool)):
+            return value
+
+        return str(value)
+
+    @staticmethod
+    def decode(value: Any) -> Any:
+        """
+        Convert encoded values back into the types returned by botocore
+        :param value: The encoded value
+        :return: Decoded value
+        """
+        if isinstance(value, dict):
+            if len(value) == 1 and '__datetime__' in value.keys():
+                return datetime.fromisoformat(value['__datetime__'])
+            if len(value) == 1 and '__bytes__' in value.keys():
+                return base64.b64decode(value['__bytes__'])
+            return {key: Cassette.decode(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [Cassette.decode(item) for item in value]
+
+        return value
@@ -1,6 +1,6 @@
 from Aws.Client import Client as BaseClient
 from Aws.Session import Session
-from typing import List
+from typing import Dict, List
 
 
 # noinspection DuplicatedCode
@@ -21,12 +21,7 @@ class Client(BaseClient):
         """
         events = []
 
-        task_id = task_arn.split('/')[2]
-
-        log_stream_name = '{log_stream_prefix}/{log_stream_prefix}/{task_id}'.format(
-            log_stream_prefix=log_stream_prefix,
-            task_id=task_id
-        )
+        log_stream_name = Client.get_log_stream_name(log_stream_prefix=log_stream_prefix, task_arn=task_arn)
         print(f'Searching for log stream: {log_group_name}:{log_stream_name}...')
 
         # Retrieve all events from the log stream
@@ -51,3 +46,33 @@ class Client(BaseClient):
             )
 
         return events
+
+    def get_last_log_events(self, log_group_name: str, log_stream_prefix: str, task_arn: str, limit: int = 20) -> List[Dict]:
+        """
+        Return the most recent log events
+        :param log_group_name: CloudWatch log group name
+        :param log_stream_prefix: CloudWatch log stream prefix
+        :param task_arn: ECS task ARN
+        :param limit: Maximum number of events to return
+        :return: Log events in chronological order
+        """
+        get_log_events_result = self.get_client().get_log_events(
+            logGroupName=log_group_name,
+            logStreamName=Client.get_log_stream_name(log_stream_prefix=log_stream_prefix, task_arn=task_arn),
+            startFromHead=False,
+            limit=limit
+        )
+        return get_log_events_result['events']
+
+    @staticmethod
+    def get_log_stream_name(log_stream_prefix: str, task_arn: str) -> str:
+        """
+        Return the log stream name for an ECS task
+        :param log_stream_prefix: CloudWatch log stream prefix
+        :param task_arn: ECS task ARN
+        :return: Log stream name
+        """
+        return '{log_stream_prefix}/{log_stream_prefix}/{task_id}'.format(
+            log_stream_prefix=log_stream_prefix,
+            task_id=task_arn.split('/')[2]
+        )
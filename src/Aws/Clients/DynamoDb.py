@@ -0,0 +1,107 @@
+from botocore.exceptions import ClientError
+from typing import Dict, Optional
+
+from Aws.Client import Client as BaseClient
+from Aws.Session import Session
+
+
+class Client(BaseClient):
+    def __init__(self, session: Session = None):
+        """
+        Configure DynamoDB client
+        """
+        super().__init__(session=session, client='dynamodb')
+
+    def get_item(self, table_name: str, key: Dict[str, str]) -> Optional[Dict[str, str]]:
+        """
+        Read an item with string attributes, using a strongly consistent read
+        :param table_name: Table name
+        :param key: Key attribute values indexed by attribute name
+        :return: Attribute values indexed by attribute name, or None if the item does not exist
+        """
+        get_item_result = self.get_client().get_item(
+            TableName=table_name,
+            Key={name: {'S': value} for name, value in key.items()},
+            ConsistentRead=True
+        )
+
+        if 'Item' not in get_item_result.keys():
+            return None
+
+        return {name: value['S'] for name, value in get_item_result['Item'].items() if 'S' in value.keys()}
+
+    def put_item(self, table_name: str, item: Dict[str, str], expected: Optional[Dict[str, Optional[str]]] = None) -> bool:
+        """
+        Write an item with string attributes, optionally only when the stored item has the expected values
+        :param table_name: Table name
+        :param item: Attribute values indexed by attribute name, including the key attributes
+        :param expected: Optional attribute values the stored item must have, None meaning the attribute must not exist
+        :return: Boolean flag, false if the stored item did not have the expected values
+        """
+        arguments = {
+            'TableName': table_name,
+            'Item': {name: {'S': value} for name, value in item.items()}
+        }
+        arguments.update(Client.__get_condition__(expected))
+
+        try:
+            self.get_client().put_item(**arguments)
+        except ClientError as exception:
+            if exception.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return False
+            raise exception
+
+        return True
+
+    def delete_item(self, table_name: str, key: Dict[str, str], expected: Optional[Dict[str, Optional[str]]] = None) -> bool:
+        """
+        Delete an item, optionally only when the stored item has the expected values
+        :param table_name: Table name
+        :param key: Key attribute values indexed by attribute name
+        :param expected: Optional attribute values the stored item must have, None meaning the attribute must not exist
+        :return: Boolean flag, false if the stored item did not have the expected values
+        """
+        arguments = {
+            'TableName': table_name,
+            'Key': {name: {'S': value} for name, value in key.items()}
+        }
+        arguments.update(Client.__get_condition__(expected))
+
+        try:
+            self.get_client().delete_item(**arguments)
+        except ClientError as exception:
+            if exception.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return False
+            raise exception
+
+        return True
+
+    @staticmethod
+    def __get_condition__(expected: Optional[Dict[str, Optional[str]]]) -> Dict:
+        """
+        Build the condition expression arguments of a conditional write
+        :param expected: Optional attribute values the stored item must have, None meaning the attribute must not exist
+        :return: Condition expression arguments, empty if there is no condition
+        """
+        if expected is None or len(expected) == 0:
+            return {}
+
+        conditions = []
+        names = {}
+        values = {}
+        for index, (name, value) in enumerate(expected.items()):
+            names['#a{index}'.format(index=index)] = name
+            if value is None:
+                conditions.append('attribute_not_exists(#a{index})'.format(index=index))
+            else:
+                conditions.append('#a{index} = :a{index}'.format(index=index))
+                values[':a{index}'.format(index=index)] = {'S': value}
+
+        arguments = {
+            'ConditionExpression': ' AND '.join(conditions),
+            'ExpressionAttributeNames': names
+        }
+        if len(values) > 0:
+            arguments['ExpressionAttributeValues'] = values
+
+        return arguments
@@ -0,0 +1,60 @@
+from botocore.exceptions import ClientError
+from typing import List, Optional
+
+from Aws.Client import Client as BaseClient
+from Aws.Session import Session
+
+
+class Client(BaseClient):
+    def __init__(self, session: Session = None):
+        """
+        Configure ECR client
+        """
+        super().__init__(session=session, client='ecr')
+
+    def list_repository_names(self) -> List[str]:
+        """
+        Return the names of all ECR repositories in the account
+        :return: List of repository names
+        """
+        describe_repositories_result = self.get_client().describe_repositories(maxResults=1000)
+
+        repository_names = []
+
+        while True:
+            for repository in describe_repositories_result['repositories']:
+                repository_names.append(repository['repositoryName'])
+
+            # If there are no more results, get out of here
+            if 'nextToken' not in describe_repositories_result.keys():
+                break
+
+            # Load next page of results
+            describe_repositories_result = self.get_client().describe_repositories(
+                maxResults=1000,
+                nextToken=describe_repositories_result['nextToken']
+            )
+
+        return repository_names
+
+    def get_image_digest(self, repository_name: str, image_tag: str) -> Optional[str]:
+        """
+        Return the manifest digest of a tagged image
+        :param repository_name: ECR repository name
+        :param image_tag: Image tag
+        :return: Image digest (e.g. sha256:...), or None if the image could not be found
+        """
+        try:
+            describe_images_result = self.get_client().describe_images(
+                repositoryName=repository_name,
+                imageIds=[{'imageTag': image_tag}]
+            )
+        except ClientError as exception:
+            if exception.response['Error']['Code'] in ['ImageNotFoundException', 'RepositoryNotFoundException']:
+                return None
+            raise exception
+
+        for image in describe_images_result['imageDetails']:
+            return image['imageDigest']
+
+        return None
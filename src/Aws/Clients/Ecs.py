@@ -1,8 +1,9 @@
 import os
-from typing import Dict, Optional, List, Any
+from typing import Dict, Optional, List, Any, Tuple, Union
 
 from Aws.Client import Client as BaseClient
 from Aws.Session import Session
+from Aws.TaskDefinitionBuilder import TaskDefinitionBuilder
 
 
 class Client(BaseClient):
@@ -44,13 +45,15 @@ class Client(BaseClient):
         """
         Retrieve task definition by its ARN
         :param arn: The ARN of the task definition to retrieve
-        :return: Task definition
+        :return: Task definition, including its tags
         """
         describe_task_definition_result = self.get_client().describe_task_definition(
             taskDefinition=arn,
             include=['TAGS']
         )
-        return describe_task_definition_result['taskDefinition']
+        task_definition = describe_task_definition_result['taskDefinition']
+        task_definition['tags'] = describe_task_definition_result.get('tags', [])
+        return task_definition
 
     def list_running_task_arns(self, cluster_name: str, service_name: str) -> List[str]:
         """
@@ -75,11 +78,31 @@ class Client(BaseClient):
                 cluster=cluster_name,
                 desiredStatus='RUNNING',
                 serviceName=service_name,
-                nextToken=list_task_results['next_token']
+                nextToken=list_task_results['nextToken']
             )
 
         return task_arns
 
+    def get_running_image_digests(self, cluster_name: str, service_name: str, container_name: str) -> List[str]:
+        """
+        Return the image digests used by a container in the running tasks of a service
+        :param cluster_name: ECS cluster name
+        :param service_name: ECS service name
+        :param container_name: The container name
+        :return: List of unique image digests, empty if no running task reported a digest
+        """
+        digests = []
+        task_arns = self.list_running_task_arns(cluster_name=cluster_name, service_name=service_name)
+        if len(task_arns) == 0:
+            return digests
+
+        for task in self.describe_tasks(cluster_name=cluster_name, task_arns=task_arns):
+            for container in task.get('containers', []):
+                if container['name'] == container_name and container.get('imageDigest') is not None and container['imageDigest'] not in digests:
+                    digests.append(container['imageDigest'])
+
+        return digests
+
     def list_task_definitions_by_service_name(self) -> Dict[str, str]:
         """
         Return a list of task definitions indexed by the service name
@@ -99,15 +122,21 @@ class Client(BaseClient):
 
         return task_definitions
 
-    def list_task_definitions(self) -> List[str]:
+    def list_task_definitions(self, family_prefix: Optional[str] = None, status: str = 'ACTIVE') -> List[str]:
         """
         Return a list of task definitions
-        :return: List of task definition ARNs
+        :param family_prefix: Optional task definition family prefix
+        :param status: The task definition status (ACTIVE or INACTIVE)
+        :return: List of task definition ARNs, newest revisions first
         """
-        list_task_definition_result = self.get_client().list_task_definitions(
-            status='ACTIVE',
-            sort='DESC'
-        )
+        parameters = {
+            'status': status,
+            'sort': 'DESC'
+        }
+        if family_prefix is not None:
+            parameters['familyPrefix'] = family_prefix
+
+        list_task_definition_result = self.get_client().list_task_definitions(**parameters)
 
         task_definition_arns = []
 
@@ -120,13 +149,68 @@ class Client(BaseClient):
 
             # Load next page of results
             list_task_definition_result = self.get_client().list_task_definitions(
-                status='ACTIVE',
-                sort='DESC',
-                nextToken=list_task_definition_result['nextToken']
+                nextToken=list_task_definition_result['nextToken'],
+                **parameters
             )
 
         return task_definition_arns
 
+    def get_latest_task_definition_arn(self, family: str) -> Optional[str]:
+        """
+        Return the latest active revision of a task definition family with a single request
+        :param family: Task definition family
+        :return: Task definition ARN, or None if the family has no active revision
+        """
+        list_task_definition_result = self.get_client().list_task_definitions(
+            familyPrefix=family,
+            status='ACTIVE',
+            sort='DESC',
+            maxResults=1
+        )
+        for task_definition_arn in list_task_definition_result['taskDefinitionArns']:
+            return task_definition_arn
+
+        return None
+
+    def list_stopped_task_arns(self, cluster_name: str, started_by: str) -> List[str]:
+        """
+        List stopped task ARNs started by the given deployment or principal
+        :param cluster_name: The ECS cluster name
+        :param started_by: The startedBy value (for service deployments this is the deployment ID)
+        :return: List of task ARNs
+        """
+        return self.list_task_arns_started_by(cluster_name=cluster_name, started_by=started_by, desired_status='STOPPED')
+
+    def list_task_arns_started_by(self, cluster_name: str, started_by: str, desired_status: str) -> List[str]:
+        """
+        List task ARNs started by the given deployment or principal
+        :param cluster_name: The ECS cluster name
+        :param started_by: The startedBy value (for service deployments this is the deployment ID)
+        :param desired_status: The desired status of the tasks (RUNNING or STOPPED)
+        :return: List of task ARNs
+        """
+        list_task_results = self.get_client().list_tasks(
+            cluster=cluster_name,
+            desiredStatus=desired_status,
+            startedBy=started_by
+        )
+
+        task_arns = []
+
+        while True:
+            task_arns.extend(list_task_results['taskArns'])
+
+            if 'nextToken' not in list_task_results:
+                break
+            list_task_results = self.get_client().list_tasks(
+                cluster=cluster_name,
+                desiredStatus=desired_status,
+                startedBy=started_by,
+                nextToken=list_task_results['nextToken']
+            )
+
+        return task_arns
+
     def run_task_from_service(self, cluster_name: str, service_name: str, count: int = 1) -> List[str]:
         """
         Run an ECS task from a service definition
@@ -135,27 +219,82 @@ class Client(BaseClient):
         :param count: Number of task to run
         :return: List of task ARNs
         """
-        ecs_service = self.get_service_by_name(
-            cluster=cluster_name,
-            name=service_name
+        ecs_service = self.describe_services(
+            cluster_name=cluster_name,
+            services=[service_name]
+        )[0]
+        run_task_result = self.run_task_for_service(
+            cluster_name=cluster_name,
+            ecs_service=ecs_service,
+            count=count
         )
+
+        tasks = []
+        for task in run_task_result['tasks']:
+            tasks.append(task['taskArn'])
+
+        return tasks
+
+    def run_task_for_service(
+            self,
+            cluster_name: str,
+            ecs_service: Dict,
+            count: int = 1,
+            overrides: Optional[Dict] = None,
+            capacity_provider_strategy: Optional[List[Dict]] = None
+    ) -> Dict:
+        """
+        Run an ECS task using the task definition and network configuration of a described service
+        :param cluster_name: The ECS cluster name
+        :param ecs_service: ECS service description
+        :param count: Number of task to run
+        :param overrides: Optional task overrides (e.g. container environment variables)
+        :param capacity_provider_strategy: Optional capacity provider strategy used instead of the service's launch type
+                                           or capacity provider strategy
+        :return: Run task result containing the started tasks and the reasons tasks could not be started
+        """
+        parameters = {}
+        if overrides is not None:
+            parameters['overrides'] = overrides
+
+        # A task is launched either with a launch type or a capacity provider strategy, never both
+        if capacity_provider_strategy is None and len(ecs_service.get('capacityProviderStrategy', [])) > 0:
+            capacity_provider_strategy = ecs_service['capacityProviderStrategy']
+        if capacity_provider_strategy is not None:
+            parameters['capacityProviderStrategy'] = capacity_provider_strategy
+        elif 'launchType' in ecs_service.keys():
+            parameters['launchType'] = ecs_service['launchType']
+        if 'platformVersion' in ecs_service.keys():
+            parameters['platformVersion'] = ecs_service['platformVersion']
+
         run_task_result = self.get_client().run_task(
             cluster=cluster_name,
             count=count,
             enableECSManagedTags=ecs_service['enableECSManagedTags'],
-            launchType=ecs_service['launchType'],
             networkConfiguration=ecs_service['networkConfiguration'],
             placementConstraints=ecs_service['placementConstraints'],
             placementStrategy=ecs_service['placementStrategy'],
-            platformVersion=ecs_service['platformVersion'],
-            taskDefinition=ecs_service['taskDefinition']
+            taskDefinition=ecs_service['taskDefinition'],
+            **parameters
         )
 
-        tasks = []
-        for task in run_task_result['tasks']:
-            tasks.append(task['taskArn'])
+        return {
+            'tasks': run_task_result.get('tasks', []),
+            'failures': run_task_result.get('failures', [])
+        }
 
-        return tasks
+    def stop_task(self, cluster_name: str, task_arn: str, reason: str) -> None:
+        """
+        Stop a running task
+        :param cluster_name: ECS cluster name
+        :param task_arn: ECS task ARN
+        :param reason: Reason reported in the stopped task
+        """
+        self.get_client().stop_task(
+            cluster=cluster_name,
+            task=task_arn,
+            reason=reason
+        )
 
     def get_task(self, cluster_name: str, task_arn: str) -> Dict:
         """
@@ -164,12 +303,38 @@ class Client(BaseClient):
         :param task_arn: ECS task ARN
         :return: Task description
         """
-        describe_tasks_result = self.get_client().describe_tasks(
-            cluster=cluster_name,
-            tasks=[task_arn],
-            include=['TAGS']
-        )
-        return describe_tasks_result['tasks'][0]
+        return self.describe_tasks(cluster_name=cluster_name, task_arns=[task_arn])[0]
+
+    def describe_tasks(self, cluster_name: str, task_arns: List[str]) -> List[Dict]:
+        """
+        Retrieve task descriptions, 100 tasks at a time
+        :param cluster_name: ECS cluster name
+        :param task_arns: ECS task ARNs
+        :return: List of task descriptions
+        """
+        return self.describe_tasks_with_failures(cluster_name=cluster_name, task_arns=task_arns)[0]
+
+    def describe_tasks_with_failures(self, cluster_name: str, task_arns: List[str]) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Retrieve task descriptions and the tasks ECS could not describe, 100 tasks at a time
+        :param cluster_name: ECS cluster name
+        :param task_arns: ECS task ARNs
+        :return: Tuple containing the task descriptions and the failures (e.g. tasks ECS reports as MISSING)
+        """
+        tasks = []
+        failures = []
+
+        # Break the task ARN list into chunks of 100 (maximum supported by describe tasks method)
+        for task_arns_chunk in BaseClient.__chunk_list__(source=task_arns, size=100):
+            describe_tasks_result = self.get_client().describe_tasks(
+                cluster=cluster_name,
+                tasks=task_arns_chunk,
+                include=['TAGS']
+            )
+            tasks.extend(describe_tasks_result['tasks'])
+            failures.extend(describe_tasks_result.get('failures', []))
+
+        return tasks, failures
 
     def wait_tasks_running(self, cluster_name: str, task_arns: List[str], delay=10, max_attempts=100) -> Any:
         """
@@ -275,12 +440,6 @@ class Client(BaseClient):
         if len(service_arns) == 0:
             return None
 
-        describe_services_result = self.get_client().describe_services(
-            cluster=cluster_name,
-            services=service_arns,
-            include=['TAGS']
-        )
-
         # Break the service ARN list into chunks of 10 (maximum supported by describe service method)
         service_arn_chunks = BaseClient.__chunk_list__(source=service_arns, size=10)
 
@@ -296,6 +455,122 @@ class Client(BaseClient):
 
         return services
 
+    def describe_services(self, cluster_name: str, services: List[str]) -> List[Dict]:
+        """
+        Describe services by name or ARN
+        :param cluster_name: The ECS cluster name
+        :param services: The ECS service names or ARNs
+        :return: List of service descriptions
+        """
+        result = []
+
+        # Break the service list into chunks of 10 (maximum supported by describe service method)
+        for services_chunk in BaseClient.__chunk_list__(source=services, size=10):
+            describe_services_result = self.get_client().describe_services(
+                cluster=cluster_name,
+                services=services_chunk,
+                include=['TAGS']
+            )
+            result.extend(describe_services_result['services'])
+
+        return result
+
+    def update_service_task_definition(
+            self,
+            cluster_name: str,
+            service_name: str,
+            task_definition_arn: str,
+            deployment_configuration: Optional[Dict] = None,
+            desired_count: Optional[int] = None,
+            health_check_grace_period: Optional[int] = None,
+            scaled_desired_count: Optional[int] = None
+    ) -> None:
+        """
+        Point a service at an existing task definition revision without registering a new revision
+        :param cluster_name: ECS cluster name
+        :param service_name: ECS service name
+        :param task_definition_arn: The task definition ARN
+        :param deployment_configuration: Optional deployment configuration values merged into the existing configuration
+        :param desired_count: Optional desired task count
+        :param health_check_grace_period: Optional health check grace period in seconds
+        :param scaled_desired_count: Optional desired count the service must still have for the desired count to be set
+        """
+        self.get_client().update_service(
+            cluster=cluster_name,
+            service=service_name,
+            taskDefinition=task_definition_arn,
+            forceNewDeployment=True,
+            **self.__get_service_settings__(cluster_name, service_name, deployment_configuration, desired_count, health_check_grace_period, scaled_desired_count)
+        )
+
+    def update_service_settings(
+            self,
+            cluster_name: str,
+            service_name: str,
+            deployment_configuration: Optional[Dict] = None,
+            desired_count: Optional[int] = None,
+            health_check_grace_period: Optional[int] = None,
+            scaled_desired_count: Optional[int] = None
+    ) -> None:
+        """
+        Change the settings of a service without starting a new deployment
+        :param cluster_name: ECS cluster name
+        :param service_name: ECS service name
+        :param deployment_configuration: Optional deployment configuration values merged into the existing configuration
+        :param desired_count: Optional desired task count
+        :param health_check_grace_period: Optional health check grace period in seconds
+        :param scaled_desired_count: Optional desired count the service must still have for the desired count to be set
+        """
+        settings = self.__get_service_settings__(cluster_name, service_name, deployment_configuration, desired_count, health_check_grace_period, scaled_desired_count)
+        if len(settings) == 0:
+            return
+
+        self.get_client().update_service(
+            cluster=cluster_name,
+            service=service_name,
+            **settings
+        )
+
+    def __get_service_settings__(
+            self,
+            cluster_name: str,
+            service_name: str,
+            deployment_configuration: Optional[Dict],
+            desired_count: Optional[int],
+            health_check_grace_period: Optional[int],
+            scaled_desired_count: Optional[int] = None
+    ) -> Dict:
+        """
+        Convert optional service settings into update service parameters
+        :param cluster_name: ECS cluster name
+        :param service_name: ECS service name
+        :param deployment_configuration: Optional deployment configuration values merged into the existing configuration
+        :param desired_count: Optional desired task count
+        :param health_check_grace_period: Optional health check grace period in seconds
+        :param scaled_desired_count: Optional desired count the service must still have for the desired count to be set
+        :return: Update service parameters
+        """
+        settings = {}
+        ecs_service = None
+        if (deployment_configuration is not None and len(deployment_configuration) > 0) or (desired_count is not None and scaled_desired_count is not None):
+            ecs_service = self.describe_services(cluster_name=cluster_name, services=[service_name])[0]
+        # The deployment configuration is replaced as a whole, keep the values (e.g. the circuit breaker) not being changed
+        if deployment_configuration is not None and len(deployment_configuration) > 0:
+            settings['deploymentConfiguration'] = dict(ecs_service['deploymentConfiguration'])
+            settings['deploymentConfiguration'].update(deployment_configuration)
+        # A desired count changed since the service was scaled out (e.g. by autoscaling) is kept
+        if desired_count is not None and scaled_desired_count is not None and ecs_service['desiredCount'] != scaled_desired_count:
+            print('Keeping desired count of {service_name}: {desired_count} (changed since the rollout)'.format(
+                service_name=service_name,
+                desired_count=ecs_service['desiredCount']
+            ))
+        elif desired_count is not None:
+            settings['desiredCount'] = desired_count
+        if health_check_grace_period is not None:
+            settings['healthCheckGracePeriodSeconds'] = health_check_grace_period
+
+        return settings
+
     def deregister_task_definition(self, task_definition_arn: str):
         """
         Deregister a task definition
@@ -305,6 +580,66 @@ class Client(BaseClient):
             taskDefinition=task_definition_arn
         )
 
+    def delete_task_definitions(self, task_definition_arns: List[str]) -> List[Dict]:
+        """
+        Delete inactive task definitions, 10 at a time (maximum supported by the delete task definitions method)
+        :param task_definition_arns: Task definition ARNs
+        :return: List of failures
+        """
+        failures = []
+        for task_definition_arns_chunk in BaseClient.__chunk_list__(source=task_definition_arns, size=10):
+            delete_task_definitions_result = self.get_client().delete_task_definitions(
+                taskDefinitions=task_definition_arns_chunk
+            )
+            failures.extend(delete_task_definitions_result.get('failures', []))
+
+        return failures
+
+    @staticmethod
+    def index_secrets(secrets: List[str]) -> Dict[str, str]:
+        """
+        Index secret ARNs by the secret name (the last segment of the parameter path)
+        :param secrets: List of secret ARNs
+        :return: Dictionary of secret ARNs indexed by the secret name, the first ARN for each name is kept
+        """
+        secrets_by_name = {}
+        for secret in secrets:
+            secret_name = secret.split('/')[-1]
+            if secret_name not in secrets_by_name.keys():
+                secrets_by_name[secret_name] = secret
+        return secrets_by_name
+
+    def register_task_definition(self, builder: TaskDefinitionBuilder, current: Optional[Dict] = None) -> Tuple[Dict, bool]:
+        """
+        Register a task definition unless the current revision has identical contents (e.g. the same commit is deployed
+        again), the hash tag of the current revision is compared so no additional requests are made
+        :param builder: Task definition builder
+        :param current: Optional current revision of the family, as returned by get task definition
+        :return: Tuple containing the task definition (including its tags) and a boolean flag, true if a new revision
+                 was registered
+        """
+        builder.assert_size()
+        definition = builder.build()
+        definition_hash = builder.get_hash()
+
+        if current is not None and current.get('status', 'ACTIVE') == 'ACTIVE':
+            for tag in current.get('tags', []):
+                if tag['key'] == TaskDefinitionBuilder.HASH_TAG and tag['value'] == definition_hash:
+                    print('Reusing identical task definition: {task_definition_arn}'.format(task_definition_arn=current['taskDefinitionArn']))
+                    return current, False
+
+        register_task_definition_result = self.get_client().register_task_definition(
+            tags=[{
+                'key': TaskDefinitionBuilder.HASH_TAG,
+                'value': definition_hash
+            }],
+            **definition
+        )
+
+        task_definition = register_task_definition_result['taskDefinition']
+        task_definition['tags'] = register_task_definition_result.get('tags', [])
+        return task_definition, True
+
     def update_service_container(
             self,
             cluster_name: str,
@@ -312,10 +647,15 @@ class Client(BaseClient):
             container_name: str,
             image: str,
             task_definition_arn: str,
-            secrets: Optional[List[str]] = None,
+            secrets: Optional[Union[List[str], Dict[str, str]]] = None,
             entrypoint: Optional[Dict] = None,
-            command: Optional[Dict] = None
-    ) -> str:
+            command: Optional[Dict] = None,
+            circuit_breaker: Optional[bool] = None,
+            deployment_configuration: Optional[Dict] = None,
+            desired_count: Optional[int] = None,
+            health_check_grace_period: Optional[int] = None,
+            task_definition: Optional[Dict] = None
+    ) -> Tuple[Dict, bool]:
         """
         Update a container in an ECS service definition to point to a new ECR image
         :param cluster_name: ECS cluster name
@@ -325,121 +665,90 @@ class Client(BaseClient):
         :param entrypoint: Optional entrypoint override
         :param task_definition_arn: The new task definition ARN
         :param command: Optional command override
-        :param secrets: Optional list of secrets
-        :return: The updated ECS task definition ARN
+        :param secrets: Optional list of secret ARNs, or dictionary of secret ARNs indexed by the secret name
+        :param circuit_breaker: Optional flag to enable or disable the ECS deployment circuit breaker
+        :param deployment_configuration: Optional deployment configuration values (e.g. maximumPercent) used for this rollout
+        :param desired_count: Optional desired task count used for this rollout
+        :param health_check_grace_period: Optional health check grace period in seconds used for this rollout
+        :param task_definition: Optional task definition already described for the task definition ARN
+        :return: Tuple containing the updated ECS task definition (including its tags) and a boolean flag, true if a new
+                 revision was registered (false if an identical revision was reused)
         """
         ecs_service = self.get_service_by_name(
             cluster=cluster_name,
             name=service_name
         )
 
-        # Retrieve the existing task definition
-        task_definition = self.get_task_definition(task_definition_arn)
-
-        # Update the image in the task definition
-        task_definition['image'] = image
-
-        # Update the image of the specified container
-        for container_definition in task_definition['containerDefinitions']:
-            if container_definition['name'] == container_name:
-                container_definition['image'] = image
-                if 'environment' not in container_definition.keys():
-                    container_definition['environment'] = []
-                container_definition['environment'].append({
-                    'value': os.environ.get('GITHUB_SHA', 'Unknown'),
-                    'name': 'GITHUB_SHA'
-                })
-                container_definition['environment'].append({
-                    'value': os.environ.get('GITHUB_REF', 'Unknown'),
-                    'name': 'GITHUB_REF'
-                })
-                container_definition['environment'].append({
-                    'value': os.environ.get('ENVIRONMENT', 'Unknown'),
-                    'name': 'DD_ENV'
-                })
-                container_definition['environment'].append({
-                    'value': os.environ.get('GITHUB_SHA', 'Unknown'),
-                    'name': 'DD_VERSION'
-                })
-                container_definition['environment'].append({
-                    'value': 'true',
-                    'name': 'DD_PROCESS_AGENT_ENABLED'
-                })
-                container_definition['environment'].append({
-                    'value': container_name,
-                    'name': 'DD_SERVICE'
-                })
-                container_definition['environment'].append({
-                    'value': os.environ.get('GITHUB_REPOSITORY', 'Unknown'),
-                    'name': 'GITHUB_REPOSITORY'
-                })
-                container_definition['environment'].append({
-                    'value': os.environ.get('GITHUB_ACTOR', 'Unknown'),
-                    'name': 'GITHUB_ACTOR'
-                })
-                if 'secrets' not in container_definition.keys():
-                    container_definition['secrets'] = []
-                if secrets is not None:
-                    for secret in secrets:
-                        secret_split = secret.split('/')
-                        secret_name = secret_split[len(secret_split)-1]
-                        found = False
-                        for current_secret in container_definition['secrets']:
-                            if current_secret['name'] == secret_name:
-                                found = True
-                                break
-                        if found is True:
-                            continue
-                        container_definition['secrets'].append({
-                            'valueFrom': secret,
-                            'name': secret_split[len(secret_split)-1]
-                        })
-                # If an entrypoint override was specified, set it here
-                if entrypoint is not None:
-                    container_definition['entryPoint'] = entrypoint
-                # If a command override was specified, set it here
-                if command is not None:
-                    container_definition['command'] = command
-
-        # Register a new task definition
-        task_role_arn = None
-        if 'taskRoleArn' in task_definition.keys():
-            task_role_arn = task_definition['taskRoleArn']
-        register_task_definition_result = self.get_client().register_task_definition(
-            family=task_definition['family'],
-            taskRoleArn=task_role_arn,
-            executionRoleArn=task_definition['executionRoleArn'],
-            networkMode=task_definition['networkMode'],
-            containerDefinitions=task_definition['containerDefinitions'],
-            volumes=task_definition['volumes'],
-            placementConstraints=task_definition['placementConstraints'],
-            requiresCompatibilities=task_definition['requiresCompatibilities'],
-            cpu=task_definition['cpu'],
-            memory=task_definition['memory']
-        )
+        # Retrieve the existing task definition, unless it was already described
+        if task_definition is None or task_definition.get('taskDefinitionArn') != task_definition_arn:
+            task_definition = self.get_task_definition(task_definition_arn)
+
+        # Update the image of the specified container, merging environment variables and secrets by name so repeated
+        # deployments do not keep appending the same entries
+        builder = TaskDefinitionBuilder(task_definition)
+        builder.set_image(container_name, image)
+        builder.merge_environment(container_name, {
+            'GITHUB_SHA': os.environ.get('GITHUB_SHA', 'Unknown'),
+            'GITHUB_REF': os.environ.get('GITHUB_REF', 'Unknown'),
+            'DD_ENV': os.environ.get('ENVIRONMENT', 'Unknown'),
+            'DD_VERSION': os.environ.get('GITHUB_SHA', 'Unknown'),
+            'DD_PROCESS_AGENT_ENABLED': 'true',
+            'DD_SERVICE': container_name,
+            'GITHUB_REPOSITORY': os.environ.get('GITHUB_REPOSITORY', 'Unknown'),
+            'GITHUB_ACTOR': os.environ.get('GITHUB_ACTOR', 'Unknown')
+        })
+        if secrets is not None:
+            if isinstance(secrets, dict) is False:
+                secrets = Client.index_secrets(secrets)
+            builder.merge_secrets(container_name, secrets)
+        # If an entrypoint override was specified, set it here
+        if entrypoint is not None:
+            builder.set_entrypoint(container_name, entrypoint)
+        # If a command override was specified, set it here
+        if command is not None:
+            builder.set_command(container_name, command)
+
+        # Register a new task definition, or reuse the existing revision if it is identical
+        new_task_definition, registered = self.register_task_definition(builder, current=task_definition)
+        new_task_definition_arn = new_task_definition['taskDefinitionArn']
+
+        # Apply the rollout speed of this deployment on top of the existing service configuration
+        rollout_deployment_configuration = deployment_configuration if deployment_configuration is not None else {}
+        deployment_configuration = dict(ecs_service['deploymentConfiguration'])
+        deployment_configuration.update(rollout_deployment_configuration)
+
+        # Let ECS detect failed rollouts, rollback is handled by the deployment tool so it is never enabled here
+        if circuit_breaker is not None:
+            deployment_configuration['deploymentCircuitBreaker'] = {
+                'enable': circuit_breaker,
+                'rollback': False
+            }
+
+        if health_check_grace_period is None and 'healthCheckGracePeriodSeconds' in ecs_service.keys():
+            health_check_grace_period = ecs_service['healthCheckGracePeriodSeconds']
 
-        if 'healthCheckGracePeriodSeconds' in ecs_service.keys():
+        if health_check_grace_period is not None:
             update_service_result = self.get_client().update_service(
                 cluster=cluster_name,
                 service=service_name,
-                desiredCount=ecs_service['desiredCount'],
-                taskDefinition=register_task_definition_result['taskDefinition']['taskDefinitionArn'],
-                deploymentConfiguration=ecs_service['deploymentConfiguration'],
+                desiredCount=desired_count if desired_count is not None else ecs_service['desiredCount'],
+                taskDefinition=new_task_definition_arn,
+                deploymentConfiguration=deployment_configuration,
                 networkConfiguration=ecs_service['networkConfiguration'],
                 platformVersion=ecs_service['platformVersion'],
                 forceNewDeployment=True,
-                healthCheckGracePeriodSeconds=ecs_service['healthCheckGracePeriodSeconds']
+                healthCheckGracePeriodSeconds=health_check_grace_period
             )
         else:
             update_service_result = self.get_client().update_service(
                 cluster=cluster_name,
                 service=service_name,
-                desiredCount=ecs_service['desiredCount'],
-                taskDefinition=register_task_definition_result['taskDefinition']['taskDefinitionArn'],
-                deploymentConfiguration=ecs_service['deploymentConfiguration'],
+                desiredCount=desired_count if desired_count is not None else ecs_service['desiredCount'],
+                taskDefinition=new_task_definition_arn,
+                deploymentConfiguration=deployment_configuration,
                 networkConfiguration=ecs_service['networkConfiguration'],
                 platformVersion=ecs_service['platformVersion'],
                 forceNewDeployment=True
             )
 
-        return register_task_definition_result['taskDefinition']['taskDefinitionArn']
+        return new_task_definition, registered
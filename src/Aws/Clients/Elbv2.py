@@ -0,0 +1,36 @@
+from typing import Dict, List
+
+from Aws.Client import Client as BaseClient
+from Aws.Session import Session
+
+
+class Client(BaseClient):
+    def __init__(self, session: Session = None):
+        """
+        Configure Elastic Load Balancing client
+        """
+        super().__init__(session=session, client='elbv2')
+
+    def describe_target_health(self, target_group_arn: str) -> List[Dict]:
+        """
+        Return the health of every target registered in a target group
+        :param target_group_arn: Target group ARN
+        :return: List of target health descriptions
+        """
+        describe_target_health_result = self.get_client().describe_target_health(
+            TargetGroupArn=target_group_arn
+        )
+
+        return describe_target_health_result['TargetHealthDescriptions']
+
+    def get_healthy_target_ids(self, target_group_arn: str) -> List[str]:
+        """
+        Return the IDs (IP addresses or instance IDs) of the healthy targets in a target group
+        :param target_group_arn: Target group ARN
+        :return: List of target IDs
+        """
+        return [
+            target_health['Target']['Id']
+            for target_health in self.describe_target_health(target_group_arn)
+            if target_health['TargetHealth']['State'] == 'healthy'
+        ]
@@ -1,4 +1,5 @@
-from typing import Dict, Optional, List, Any
+from botocore.exceptions import ClientError
+from typing import Dict, Optional, List
 
 from Aws.Client import Client as BaseClient
 from Aws.Session import Session
@@ -17,7 +18,16 @@ class Client(BaseClient):
         :param path: The path to search
         :param recursive: Boolean flag, if true will recurse all sub-paths
         """
-        parameters = []
+        return list(self.get_parameter_versions_by_path(path=path, recursive=recursive).keys())
+
+    def get_parameter_versions_by_path(self, path: str = '/', recursive: bool = False) -> Dict[str, int]:
+        """
+        Return the versions of the SSM parameters in the given path
+        :param path: The path to search
+        :param recursive: Boolean flag, if true will recurse all sub-paths
+        :return: Dictionary of parameter versions indexed by parameter name
+        """
+        parameters = {}
         get_parameters_by_path_result = self.get_client().get_parameters_by_path(
             Path=path,
             Recursive=recursive
@@ -25,7 +35,7 @@ class Client(BaseClient):
 
         while True:
             for parameter in get_parameters_by_path_result['Parameters']:
-                parameters.append(parameter['Name'])
+                parameters[parameter['Name']] = parameter.get('Version', 0)
             if 'NextToken' not in get_parameters_by_path_result.keys():
                 break
             get_parameters_by_path_result = self.get_client().get_parameters_by_path(
@@ -36,20 +46,110 @@ class Client(BaseClient):
 
         return parameters
 
-    def put_parameter(self, path: str, value: str, secure: bool = False, allow_overwrite: bool = True):
+    def get_parameter_versions(self, names: List[str]) -> Dict[str, int]:
+        """
+        Return the versions of SSM parameters without reading their values, 10 at a time (maximum supported by the get
+        parameters method)
+        :param names: Parameter names
+        :return: Dictionary of parameter versions indexed by parameter name, parameters that do not exist are left out
+        """
+        versions = {}
+        for names_chunk in BaseClient.__chunk_list__(source=names, size=10):
+            get_parameters_result = self.get_client().get_parameters(
+                Names=names_chunk,
+                WithDecryption=False
+            )
+            for parameter in get_parameters_result['Parameters']:
+                versions[parameter['Name']] = parameter.get('Version', 0)
+
+        return versions
+
+    def get_invalid_parameters(self, names: List[str]) -> List[str]:
+        """
+        Return the parameters that do not exist (or can not be read), 10 at a time (maximum supported by the get
+        parameters method)
+        :param names: Parameter names or ARNs
+        :return: List of invalid parameter names
+        """
+        invalid = []
+        for names_chunk in BaseClient.__chunk_list__(source=names, size=10):
+            get_parameters_result = self.get_client().get_parameters(
+                Names=names_chunk,
+                WithDecryption=False
+            )
+            invalid.extend(get_parameters_result.get('InvalidParameters', []))
+
+        return invalid
+
+    def put_parameter(self, path: str, value: str, secure: bool = False, allow_overwrite: bool = True) -> int:
         """
         Set an SSM parameter
         :param path: The SSM parameter path
         :param value: The value to store
         :param secure: Boolean flag, if true the value will be stored as a SecureString type
         :param allow_overwrite: Boolean flag, if true existing parameters will be overwritten without error
+        :return: The version of the parameter that was stored
         """
-        self.get_client().put_parameter(
+        put_parameter_result = self.get_client().put_parameter(
             Name=path,
             Value=value,
             Type='SecureString' if secure is True else 'String',
             Overwrite=allow_overwrite
         )
+        return put_parameter_result.get('Version', 0)
+
+    def create_parameter(self, path: str, value: str) -> bool:
+        """
+        Create an SSM parameter if it does not exist yet
+        :param path: The SSM parameter path
+        :param value: The value to store
+        :return: Boolean flag, false if the parameter already existed
+        """
+        try:
+            self.put_parameter(path=path, value=value, allow_overwrite=False)
+        except ClientError as exception:
+            if exception.response['Error']['Code'] == 'ParameterAlreadyExists':
+                return False
+            raise exception
+
+        return True
+
+    def find_parameter(self, path: str, version: Optional[int] = None) -> Optional[Dict]:
+        """
+        Get an SSM parameter and its version if it exists
+        :param path: The SSM parameter path
+        :param version: Optional version to get, the latest version is returned if not supplied
+        :return: Dictionary containing the Value and Version of the parameter, or None if it does not exist
+        """
+        try:
+            get_parameter_result = self.get_client().get_parameter(
+                Name=path if version is None else '{path}:{version}'.format(path=path, version=version),
+                WithDecryption=True
+            )
+        except ClientError as exception:
+            if exception.response['Error']['Code'] in ['ParameterNotFound', 'ParameterVersionNotFound']:
+                return None
+            raise exception
+
+        return {
+            'Value': get_parameter_result['Parameter']['Value'],
+            'Version': get_parameter_result['Parameter'].get('Version', 0)
+        }
+
+    def delete_parameter(self, path: str) -> bool:
+        """
+        Delete an SSM parameter
+        :param path: The SSM parameter path
+        :return: Boolean flag, false if the parameter did not exist
+        """
+        try:
+            self.get_client().delete_parameter(Name=path)
+        except ClientError as exception:
+            if exception.response['Error']['Code'] == 'ParameterNotFound':
+                return False
+            raise exception
+
+        return True
 
     def get_parameter(self, path: str) -> str:
         """
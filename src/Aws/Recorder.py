@@ -0,0 +1,68 @@
+import threading
+import time
+
+from botocore.client import BaseClient
+from typing import Dict
+
+from Aws.Cassette import Cassette
+
+
+class Recorder:
+    def __init__(self):
+        """
+        Record every AWS API request and response made by the clients of a session
+        """
+        self.cassette = Cassette()
+        self.__started__ = time.perf_counter()
+        self.__lock__ = threading.Lock()
+
+    def attach(self, client: BaseClient) -> None:
+        """
+        Register the recording event handlers on a client
+        :param client: The botocore client
+        """
+        client.meta.events.register('before-parameter-build', Recorder.__capture_parameters__)
+        client.meta.events.register('before-call', Recorder.__capture_start__)
+        client.meta.events.register('after-call', self.__record__)
+
+    def save(self, filename: str) -> None:
+        """
+        Write the recorded traffic to a cassette file
+        :param filename: Cassette filename
+        """
+        with self.__lock__:
+            self.cassette.save(filename)
+
+    @staticmethod
+    def __capture_parameters__(params: Dict, context: Dict, **kwargs) -> None:
+        """
+        Keep the request parameters before they are serialized
+        """
+        context['recorder_params'] = Cassette.encode(params)
+
+    @staticmethod
+    def __capture_start__(context: Dict, **kwargs) -> None:
+        """
+        Keep the time the request was sent
+        """
+        context['recorder_started'] = time.perf_counter()
+
+    def __record__(self, http_response, parsed: Dict, model, context: Dict, **kwargs) -> None:
+        """
+        Record a completed request
+        """
+        finished = time.perf_counter()
+        started = context.get('recorder_started', finished)
+        response = dict(parsed)
+        response.pop('ResponseMetadata', None)
+
+        with self.__lock__:
+            self.cassette.interactions.append({
+                'service': model.service_model.service_id.hyphenize(),
+                'operation': model.name,
+                'offset': round(started - self.__started__, 4),
+                'duration': round(finished - started, 4),
+                'status': http_response.status_code,
+                'request': context.get('recorder_params', {}),
+                'response': Cassette.encode(response)
+            })
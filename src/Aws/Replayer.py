@@ -0,0 +1,87 @@
+import threading
+import time
+
+from botocore.awsrequest import AWSResponse
+from botocore.client import BaseClient
+from collections import deque
+from typing import Dict
+
+from Aws.Cassette import Cassette
+
+
+class Replayer:
+    def __init__(self, cassette: Cassette, time_scale: float = 1.0):
+        """
+        Answer AWS API requests from a recorded cassette instead of AWS, with the timing of the recorded run: a request
+        is not answered before its recorded offset from the start of the run, plus its recorded duration
+        :param cassette: The recorded traffic
+        :param time_scale: Multiplier applied to the recorded offsets and durations (0 replays without delays)
+        """
+        self.__time_scale__ = time_scale
+        self.__started__ = time.perf_counter()
+        self.__lock__ = threading.Lock()
+        self.__queues__ = {}
+        for interaction in cassette.interactions:
+            key = Replayer.__get_key__(interaction['service'], interaction['operation'])
+            if key not in self.__queues__.keys():
+                self.__queues__[key] = deque()
+            self.__queues__[key].append(interaction)
+
+    def attach(self, client: BaseClient) -> None:
+        """
+        Register the replay event handler on a client
+        :param client: The botocore client
+        """
+        client.meta.events.register('before-parameter-build', Replayer.__capture_parameters__)
+        client.meta.events.register('before-call', self.__replay__)
+
+    def get_remaining(self) -> Dict[str, int]:
+        """
+        Return the number of recorded requests that have not been replayed
+        :return: Number of requests indexed by service and operation
+        """
+        with self.__lock__:
+            return {key: len(queue) for key, queue in self.__queues__.items() if len(queue) > 0}
+
+    @staticmethod
+    def __capture_parameters__(params: Dict, context: Dict, **kwargs) -> None:
+        """
+        Keep the request parameters so concurrent requests can be matched to their recorded responses
+        """
+        context['replayer_params'] = Cassette.encode(params)
+
+    def __replay__(self, model, context: Dict, **kwargs):
+        """
+        Return the first recorded response for the operation with identical request parameters, or the next recorded
+        response if none match (e.g. parameters containing timestamps)
+        :return: Tuple of the HTTP response and the parsed response
+        """
+        key = Replayer.__get_key__(model.service_model.service_id.hyphenize(), model.name)
+        with self.__lock__:
+            if key not in self.__queues__.keys() or len(self.__queues__[key]) == 0:
+                raise Exception('The cassette does not contain another {key} request. The deployment has diverged from the recording'.format(key=key))
+            queue = self.__queues__[key]
+            interaction = next((item for item in queue if item['request'] == context.get('replayer_params')), queue[0])
+            queue.remove(interaction)
+
+        if self.__time_scale__ > 0:
+            # Waiting for the recorded start of the request reproduces the idle gaps and concurrency of the recorded
+            # run, the recorded duration is the latency of the request itself
+            delay = self.__started__ + interaction['offset'] * self.__time_scale__ - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            time.sleep(interaction['duration'] * self.__time_scale__)
+
+        parsed = Cassette.decode(interaction['response'])
+        parsed['ResponseMetadata'] = {'HTTPStatusCode': interaction['status'], 'RequestId': 'replay', 'HTTPHeaders': {}}
+        return AWSResponse(url='https://replay.amazonaws.com', status_code=interaction['status'], headers={}, raw=None), parsed
+
+    @staticmethod
+    def __get_key__(service: str, operation: str) -> str:
+        """
+        Return the queue key for an operation
+        :param service: Service ID
+        :param operation: Operation name
+        :return: Queue key
+        """
+        return '{service}.{operation}'.format(service=service, operation=operation)
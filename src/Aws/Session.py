@@ -1,7 +1,9 @@
+import threading
+
 import boto3
 
 from botocore.client import BaseClient
-from typing import Optional
+from typing import Any, List, Optional
 
 
 class Session:
@@ -26,6 +28,8 @@ class Session:
             region_name=region_name
         )
         self.__clients__ = {}
+        self.__hooks__: List[Any] = []
+        self.__lock__ = threading.Lock()
 
     def get_client(self, client: str) -> BaseClient:
         """
@@ -33,7 +37,21 @@ class Session:
         :param client: Client name
         :return: AWS client
         """
-        if client not in self.__clients__.keys():
-            self.__clients__[client] = self.__session__.client(client)
+        # Creating clients is not thread safe, clients themselves are
+        with self.__lock__:
+            if client not in self.__clients__.keys():
+                self.__clients__[client] = self.__session__.client(client)
+                for hook in self.__hooks__:
+                    hook.attach(self.__clients__[client])
 
         return self.__clients__[client]
+
+    def add_hook(self, hook: Any) -> None:
+        """
+        Attach a hook to every client created by this session (e.g. a recorder)
+        :param hook: Object with an attach(client) method that registers botocore event handlers on the client
+        """
+        with self.__lock__:
+            self.__hooks__.append(hook)
+            for client in self.__clients__.values():
+                hook.attach(client)
@@ -0,0 +1,199 @@
+import hashlib
+import json
+
+from copy import deepcopy
+from typing import Dict, List
+
+
+class TaskDefinitionBuilder:
+    # Task definition fields that are carried across when registering a new revision
+    REGISTER_FIELDS = [
+        'family',
+        'taskRoleArn',
+        'executionRoleArn',
+        'networkMode',
+        'containerDefinitions',
+        'volumes',
+        'placementConstraints',
+        'requiresCompatibilities',
+        'cpu',
+        'memory'
+    ]
+
+    # Tag used to store the hash of the registered definition
+    HASH_TAG = 'DeploymentHash'
+
+    # Maximum size in bytes of a task definition accepted by ECS
+    MAX_SIZE = 65536
+
+    def __init__(self, task_definition: Dict):
+        """
+        Create a builder from an existing task definition
+        :param task_definition: Task definition as returned by describe_task_definition
+        """
+        self.__task_definition__ = deepcopy(task_definition)
+
+    def get_container_definition(self, container_name: str) -> Dict:
+        """
+        Retrieve a container definition by name
+        :param container_name: The container name
+        :return: Container definition
+        :raises Exception: if the container does not exist in the task definition
+        """
+        for container_definition in self.__task_definition__['containerDefinitions']:
+            if container_definition['name'] == container_name:
+                return container_definition
+
+        raise Exception('Could not locate container ({container_name}) in task definition ({family})'.format(
+            container_name=container_name,
+            family=self.__task_definition__['family']
+        ))
+
+    def set_image(self, container_name: str, image: str) -> None:
+        """
+        Set the image of a container
+        :param container_name: The container name
+        :param image: ECR image URL
+        """
+        self.get_container_definition(container_name)['image'] = image
+
+    def set_entrypoint(self, container_name: str, entrypoint: List[str]) -> None:
+        """
+        Set the entrypoint of a container
+        :param container_name: The container name
+        :param entrypoint: Entrypoint override
+        """
+        self.get_container_definition(container_name)['entryPoint'] = entrypoint
+
+    def set_command(self, container_name: str, command: List[str]) -> None:
+        """
+        Set the command of a container
+        :param container_name: The container name
+        :param command: Command override
+        """
+        self.get_container_definition(container_name)['command'] = command
+
+    def merge_environment(self, container_name: str, environment: Dict[str, str]) -> None:
+        """
+        Merge environment variables into a container, replacing the value of any existing variable with the same name
+        :param container_name: The container name
+        :param environment: Dictionary of environment variable values indexed by name
+        """
+        container_definition = self.get_container_definition(container_name)
+        container_definition['environment'] = TaskDefinitionBuilder.__merge_by_name__(
+            items=container_definition.get('environment', []),
+            values=environment,
+            value_key='value',
+            overwrite=True
+        )
+
+    def has_secrets(self, container_name: str, secret_names: List[str]) -> bool:
+        """
+        Check whether a container already has every secret, in which case merging the secrets would not change it
+        :param container_name: The container name
+        :param secret_names: The secret names
+        :return: Boolean flag
+        """
+        existing = [secret['name'] for secret in self.get_container_definition(container_name).get('secrets', [])]
+        return all(secret_name in existing for secret_name in secret_names)
+
+    def merge_secrets(self, container_name: str, secrets: Dict[str, str], overwrite: bool = False) -> None:
+        """
+        Merge secrets into a container
+        :param container_name: The container name
+        :param secrets: Dictionary of secret ARNs indexed by the secret name
+        :param overwrite: Boolean flag, if true existing secrets with the same name will point at the new ARN
+        """
+        container_definition = self.get_container_definition(container_name)
+        container_definition['secrets'] = TaskDefinitionBuilder.__merge_by_name__(
+            items=container_definition.get('secrets', []),
+            values=secrets,
+            value_key='valueFrom',
+            overwrite=overwrite
+        )
+
+    def build(self) -> Dict:
+        """
+        Return the arguments required to register the task definition
+        :return: Dictionary of register_task_definition arguments
+        """
+        definition = {}
+        for field in TaskDefinitionBuilder.REGISTER_FIELDS:
+            if self.__task_definition__.get(field) is not None:
+                definition[field] = deepcopy(self.__task_definition__[field])
+
+        return definition
+
+    def get_hash(self) -> str:
+        """
+        Return a hash of the task definition that does not depend on the ordering of environment variables or secrets
+        :return: SHA256 hex digest
+        """
+        definition = self.build()
+        for container_definition in definition.get('containerDefinitions', []):
+            for key in ['environment', 'secrets']:
+                if key in container_definition.keys():
+                    container_definition[key] = sorted(container_definition[key], key=lambda item: item['name'])
+
+        canonical = json.dumps(definition, sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+    def get_size(self) -> int:
+        """
+        Return the size of the task definition as it will be sent to ECS
+        :return: Size in bytes
+        """
+        return len(json.dumps(self.build(), separators=(',', ':')).encode('utf-8'))
+
+    def assert_size(self) -> None:
+        """
+        Validate the task definition is within the ECS size limit
+        :raises Exception: if the task definition is too large
+        """
+        size = self.get_size()
+        if size <= TaskDefinitionBuilder.MAX_SIZE:
+            return
+
+        for container_definition in self.__task_definition__['containerDefinitions']:
+            print('{name}: {size} bytes ({environment} environment variables, {secrets} secrets)'.format(
+                name=container_definition['name'],
+                size=len(json.dumps(container_definition, separators=(',', ':')).encode('utf-8')),
+                environment=len(container_definition.get('environment', [])),
+                secrets=len(container_definition.get('secrets', []))
+            ))
+        raise Exception('The task definition ({family}) is {size} bytes which exceeds the ECS limit of {max_size} bytes. Please reduce the number of secrets by setting "secret_paths" for the container in ".github/deploy.yml"'.format(
+            family=self.__task_definition__['family'],
+            size=size,
+            max_size=TaskDefinitionBuilder.MAX_SIZE
+        ))
+
+    @staticmethod
+    def __merge_by_name__(items: List[Dict], values: Dict[str, str], value_key: str, overwrite: bool) -> List[Dict]:
+        """
+        Merge a dictionary of values into a list of name/value items
+        :param items: The existing items
+        :param values: Dictionary of values indexed by name
+        :param value_key: The key holding the value in each item
+        :param overwrite: Boolean flag, if true existing items will be replaced
+        :return: The merged list
+        """
+        merged = []
+        index = {}
+
+        # Remove duplicated names left behind by earlier deployments, the last entry is the one ECS used
+        for item in items:
+            if item['name'] in index.keys():
+                merged[index[item['name']]] = item
+                continue
+            index[item['name']] = len(merged)
+            merged.append(item)
+
+        for name, value in values.items():
+            if name in index.keys():
+                if overwrite is True:
+                    merged[index[name]] = {'name': name, value_key: value}
+                continue
+            index[name] = len(merged)
+            merged.append({'name': name, value_key: value})
+
+        return merged
@@ -1,4 +1,4 @@
-from subprocess import PIPE, Popen
+from Deployment.CommandRunner import CommandRunner
 
 
 class AwsCli:
@@ -11,11 +11,10 @@ class AwsCli:
         :raises: Exception on error
         """
         command = ['aws', 'ecr', 'get-login-password', '--region', region]
-        process = Popen(command, stdout=PIPE, stderr=PIPE)
-        stdout_login, stderr_login = process.communicate()
-        if process.returncode != 0:
+        return_code, stdout_login, stderr_login = CommandRunner.get_default().run(command)
+        if return_code != 0:
             print(stderr_login.decode('utf-8').strip())
             raise Exception('Unexpected return code ({return_code}) received during Docker login'.format(
-                return_code=process.returncode
+                return_code=return_code
             ))
         return stdout_login
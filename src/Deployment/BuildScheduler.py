@@ -0,0 +1,194 @@
+import threading
+import time
+
+from concurrent.futures import FIRST_EXCEPTION, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Optional
+
+
+class BuildScheduler:
+    # Supported scheduling strategies
+    STRATEGIES = ['sequential', 'parallel', 'pipelined']
+
+    def __init__(self, strategy: str = 'sequential', max_workers: int = 4):
+        """
+        Schedule image builds and pushes
+        :param strategy: sequential builds then pushes one image at a time, parallel builds every image concurrently
+                         then pushes every image concurrently, pipelined pushes each image as soon as its build finishes
+        :param max_workers: Maximum number of concurrent builds (and concurrent pushes)
+        """
+        if strategy not in BuildScheduler.STRATEGIES:
+            raise Exception('Unknown build schedule ({strategy}), must be one of: {strategies}'.format(
+                strategy=strategy,
+                strategies=', '.join(BuildScheduler.STRATEGIES)
+            ))
+        self.__strategy__ = strategy
+        self.__max_workers__ = max_workers
+        self.__lock__ = threading.Lock()
+        self.__before_push_complete__ = False
+
+    def run(
+            self,
+            images: List[str],
+            build: Callable[[str], None],
+            push: Callable[[str], None],
+            before_push: Optional[Callable[[], None]] = None
+    ) -> Dict[str, Dict[str, float]]:
+        """
+        Build and push each image
+        :param images: The images to build and push, in the order they should be started
+        :param build: Function building an image
+        :param push: Function pushing an image
+        :param before_push: Optional function called once before the first push (e.g. registry login)
+        :return: Build and push durations in seconds indexed by image
+        :raises Exception: the first build or push error
+        """
+        self.__before_push_complete__ = False
+        durations = {image: {} for image in images}
+
+        def timed(step: str, function: Callable[[str], None], image: str) -> None:
+            started = time.perf_counter()
+            function(image)
+            durations[image][step] = time.perf_counter() - started
+
+        def build_image(image: str) -> None:
+            timed('build', build, image)
+
+        def push_image(image: str) -> None:
+            self.__before_push__(before_push)
+            timed('push', push, image)
+
+        if self.__strategy__ == 'sequential':
+            for image in images:
+                build_image(image)
+            for image in images:
+                push_image(image)
+        elif self.__strategy__ == 'parallel':
+            BuildScheduler.__map__(build_image, images, self.__max_workers__)
+            BuildScheduler.__map__(push_image, images, self.__max_workers__)
+        else:
+            with ThreadPoolExecutor(max_workers=self.__max_workers__) as push_executor:
+                push_futures = []
+
+                def build_then_push(image: str) -> None:
+                    build_image(image)
+                    push_futures.append(push_executor.submit(push_image, image))
+
+                BuildScheduler.__map__(build_then_push, images, self.__max_workers__)
+                BuildScheduler.__wait__(push_futures)
+
+        return durations
+
+    def order(self, images: List[str], estimates: Dict[str, Dict[str, float]]) -> List[str]:
+        """
+        Order the images longest job first, so the slowest builds are not left until the end
+        :param images: The images in the configured order
+        :param estimates: Expected build and push durations in seconds indexed by image, images without a recorded
+                          duration are started first as they may be the slowest
+        :return: The images in the order they should be started
+        """
+        # The total duration of a sequential schedule does not depend on the order
+        if self.__strategy__ == 'sequential':
+            return list(images)
+
+        def get_total(image: str) -> float:
+            if BuildScheduler.__is_estimated__(image, estimates) is False:
+                return float('inf')
+            return estimates[image]['build'] + estimates[image]['push']
+
+        # Sorting is stable, images with the same duration keep the configured order
+        return sorted(images, key=lambda image: -get_total(image))
+
+    def estimate(self, images: List[str], estimates: Dict[str, Dict[str, float]]) -> Optional[float]:
+        """
+        Estimate the time taken to build and push the images in the given order
+        :param images: The images in the order they are started
+        :param estimates: Expected build and push durations in seconds indexed by image
+        :return: Estimated duration in seconds, or None if an image has no recorded duration
+        """
+        if any(BuildScheduler.__is_estimated__(image, estimates) is False for image in images):
+            return None
+        if len(images) == 0:
+            return 0.0
+
+        builds = [estimates[image]['build'] for image in images]
+        pushes = [estimates[image]['push'] for image in images]
+
+        if self.__strategy__ == 'sequential':
+            return sum(builds) + sum(pushes)
+
+        built = BuildScheduler.__simulate__(builds, [0.0] * len(images), self.__max_workers__)
+        if self.__strategy__ == 'parallel':
+            return max(BuildScheduler.__simulate__(pushes, [max(built)] * len(images), self.__max_workers__))
+
+        # Pipelined pushes are started in the order the builds finish
+        pushes_by_ready = sorted(zip(built, pushes))
+        return max(BuildScheduler.__simulate__(
+            [push for _, push in pushes_by_ready],
+            [ready for ready, _ in pushes_by_ready],
+            self.__max_workers__
+        ))
+
+    @staticmethod
+    def __is_estimated__(image: str, estimates: Dict[str, Dict[str, float]]) -> bool:
+        """
+        Check whether both the build and push duration of an image are known
+        :param image: The image
+        :param estimates: Expected build and push durations in seconds indexed by image
+        :return: Boolean flag
+        """
+        return estimates.get(image, {}).get('build') is not None and estimates.get(image, {}).get('push') is not None
+
+    @staticmethod
+    def __simulate__(durations: List[float], ready: List[float], max_workers: int) -> List[float]:
+        """
+        Simulate starting each job in order on the first free worker
+        :param durations: Duration of each job
+        :param ready: Time each job can be started
+        :param max_workers: Number of workers
+        :return: Time each job finishes
+        """
+        workers = [0.0] * max_workers
+        finished = []
+        for duration, ready_at in zip(durations, ready):
+            index = workers.index(min(workers))
+            workers[index] = max(workers[index], ready_at) + duration
+            finished.append(workers[index])
+
+        return finished
+
+    def __before_push__(self, before_push: Optional[Callable[[], None]]) -> None:
+        """
+        Call the before push function exactly once
+        :param before_push: Function to call
+        """
+        if before_push is None:
+            return
+        with self.__lock__:
+            if self.__before_push_complete__ is False:
+                before_push()
+                self.__before_push_complete__ = True
+
+    @staticmethod
+    def __map__(function: Callable[[str], None], images: List[str], max_workers: int) -> None:
+        """
+        Call a function for each image concurrently, stopping at the first error
+        :param function: The function
+        :param images: The images
+        :param max_workers: Maximum number of concurrent calls
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(function, image) for image in images]
+            BuildScheduler.__wait__(futures)
+
+    @staticmethod
+    def __wait__(futures: List) -> None:
+        """
+        Wait for the futures to finish, cancelling the remaining futures and raising on the first error
+        :param futures: The futures
+        """
+        done, not_done = wait(futures, return_when=FIRST_EXCEPTION)
+        for future in done:
+            if future.exception() is not None:
+                for pending in not_done:
+                    pending.cancel()
+                raise future.exception()
@@ -0,0 +1,159 @@
+import re
+
+from Aws.Clients import Ecs
+from Deployment.EnvironmentConfiguration import EnvironmentConfiguration
+from Deployment.GitHub import GitHub
+from typing import Dict, List, Optional, Sequence
+
+
+class ChangeDetector:
+    # Environment variable written to each task definition by the ECS client containing the deployed commit
+    SHA_ENVIRONMENT_VARIABLE = 'GITHUB_SHA'
+
+    def __init__(self, ecs_client: Ecs.Client, environment: EnvironmentConfiguration):
+        """
+        Find the containers affected by the changes since they were last deployed
+        :param ecs_client: ECS client
+        :param environment: Configuration of the environment being deployed
+        """
+        self.__ecs_client__ = ecs_client
+        self.__environment__ = environment
+        self.__changed_files__: Dict[str, Optional[List[str]]] = {}
+
+    def get_affected_containers(self, container_ids: List[str], head_sha: str) -> List[str]:
+        """
+        Return the containers with a changed file matching their paths, containers without paths are always affected
+        :param container_ids: The container IDs to check
+        :param head_sha: The commit being deployed
+        :return: List of affected container IDs in their original order
+        """
+        filtered = [container_id for container_id in container_ids if self.__environment__.get_container(container_id).paths is not None]
+        deployed_shas = self.get_deployed_shas(filtered)
+
+        affected = []
+        for container_id in container_ids:
+            container = self.__environment__.get_container(container_id)
+            if container.paths is None:
+                affected.append(container_id)
+                continue
+
+            deployed_sha = deployed_shas.get(container_id)
+            if deployed_sha is None:
+                print('{service_name}: Affected (deployed commit unknown)'.format(service_name=container.service_name))
+                affected.append(container_id)
+                continue
+
+            changed_files = self.__get_changed_files__(deployed_sha, head_sha)
+            if changed_files is None:
+                print('{service_name}: Affected (could not compare {deployed_sha} to {head_sha})'.format(
+                    service_name=container.service_name,
+                    deployed_sha=deployed_sha,
+                    head_sha=head_sha
+                ))
+                affected.append(container_id)
+                continue
+
+            matched = [filename for filename in changed_files if ChangeDetector.matches(filename, container.paths)]
+            if len(matched) > 0:
+                print('{service_name}: Affected ({count} changed files since {deployed_sha}, e.g. {filename})'.format(
+                    service_name=container.service_name,
+                    count=len(matched),
+                    deployed_sha=deployed_sha,
+                    filename=matched[0]
+                ))
+                affected.append(container_id)
+            else:
+                print('{service_name}: Unchanged since {deployed_sha}'.format(service_name=container.service_name, deployed_sha=deployed_sha))
+
+        return affected
+
+    def get_deployed_shas(self, container_ids: List[str]) -> Dict[str, Optional[str]]:
+        """
+        Read the commit each service is running from its current task definition
+        :param container_ids: The container IDs
+        :return: Dictionary of commits (None if unknown) indexed by container ID
+        """
+        if len(container_ids) == 0:
+            return {}
+
+        service_names = {self.__environment__.get_container(container_id).service_name: container_id for container_id in container_ids}
+        deployed_shas = {container_id: None for container_id in container_ids}
+        services = self.__ecs_client__.describe_services(
+            cluster_name=self.__environment__.aws_deployment_cluster_name,
+            services=list(service_names.keys())
+        )
+
+        for service in services:
+            if service['serviceName'] not in service_names.keys():
+                continue
+            task_definition = self.__ecs_client__.get_task_definition(service['taskDefinition'])
+            for container_definition in task_definition['containerDefinitions']:
+                if container_definition['name'] != service['serviceName']:
+                    continue
+                for variable in container_definition.get('environment', []):
+                    if variable['name'] == ChangeDetector.SHA_ENVIRONMENT_VARIABLE and variable['value'] != 'Unknown':
+                        deployed_shas[service_names[service['serviceName']]] = variable['value']
+
+        return deployed_shas
+
+    def __get_changed_files__(self, base_sha: str, head_sha: str) -> Optional[List[str]]:
+        """
+        Return the files changed since a commit, each commit is only compared once
+        :param base_sha: The deployed commit
+        :param head_sha: The commit being deployed
+        :return: List of changed filenames or None if the commits could not be compared
+        """
+        if base_sha not in self.__changed_files__.keys():
+            self.__changed_files__[base_sha] = GitHub.get_changed_files(
+                base_sha=base_sha,
+                head_sha=head_sha,
+                repository_root=self.__environment__.repository_root
+            )
+
+        return self.__changed_files__[base_sha]
+
+    @staticmethod
+    def matches(filename: str, patterns: Sequence[str]) -> bool:
+        """
+        Check whether a filename matches one of the glob patterns, "**" matches any number of folders
+        :param filename: Filename relative to the repository root
+        :param patterns: Glob patterns relative to the repository root
+        :return: Boolean flag
+        """
+        for pattern in patterns:
+            if re.fullmatch(ChangeDetector.__translate__(pattern), filename) is not None:
+                return True
+
+        return False
+
+    @staticmethod
+    def __translate__(pattern: str) -> str:
+        """
+        Convert a glob pattern into a regular expression
+        :param pattern: Glob pattern, a pattern ending in "/" matches everything below the folder
+        :return: Regular expression
+        """
+        pattern = pattern.strip().lstrip('/')
+        if pattern.endswith('/'):
+            pattern += '**'
+
+        expression = ''
+        index = 0
+        while index < len(pattern):
+            if pattern.startswith('**/', index):
+                expression += '(?:.*/)?'
+                index += 3
+            elif pattern.startswith('**', index):
+                expression += '.*'
+                index += 2
+            elif pattern[index] == '*':
+                expression += '[^/]*'
+                index += 1
+            elif pattern[index] == '?':
+                expression += '[^/]'
+                index += 1
+            else:
+                expression += re.escape(pattern[index])
+                index += 1
+
+        return expression
@@ -0,0 +1,71 @@
+import os
+import threading
+
+from subprocess import PIPE, Popen
+from typing import Dict, List, Optional, Tuple
+
+
+class CommandRunner:
+    # Runner used by the Docker, DockerCompose and AwsCli helpers
+    __default__ = None
+
+    def __init__(self, path: Optional[List[str]] = None, environment: Optional[Dict[str, str]] = None):
+        """
+        Run external commands
+        :param path: Optional list of folders searched for executables before the existing PATH
+        :param environment: Optional environment variables added to the environment of each command
+        """
+        self.__environment__ = None
+        if path is not None or environment is not None:
+            self.__environment__ = dict(os.environ)
+            self.__environment__.update(environment or {})
+            if path is not None:
+                self.__environment__['PATH'] = os.pathsep.join(path + [self.__environment__.get('PATH', '')])
+        self.__lock__ = threading.Lock()
+        self.__processes__ = []
+        self.__terminated__ = False
+
+    def run(self, command: List[str]) -> Tuple[int, bytes, bytes]:
+        """
+        Run a command and wait for it to finish
+        :param command: The command and its arguments
+        :return: Tuple containing the return code, stdout and stderr stream contents
+        """
+        with self.__lock__:
+            if self.__terminated__ is True:
+                raise Exception('Command runner was terminated, not running: {command}'.format(command=command[0]))
+            process = Popen(command, stdout=PIPE, stderr=PIPE, env=self.__environment__)
+            self.__processes__.append(process)
+        try:
+            stdout, stderr = process.communicate()
+        finally:
+            with self.__lock__:
+                self.__processes__.remove(process)
+        return process.returncode, stdout, stderr
+
+    def terminate(self) -> None:
+        """
+        Terminate the running commands and refuse to start new commands (e.g. when a deployment has already failed)
+        """
+        with self.__lock__:
+            self.__terminated__ = True
+            for process in self.__processes__:
+                process.terminate()
+
+    @staticmethod
+    def get_default() -> 'CommandRunner':
+        """
+        Return the runner used to execute commands
+        :return: Command runner
+        """
+        if CommandRunner.__default__ is None:
+            CommandRunner.__default__ = CommandRunner()
+        return CommandRunner.__default__
+
+    @staticmethod
+    def set_default(runner: Optional['CommandRunner']) -> None:
+        """
+        Replace the runner used to execute commands
+        :param runner: Command runner, or None to restore the default runner
+        """
+        CommandRunner.__default__ = runner
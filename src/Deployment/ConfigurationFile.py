@@ -1,145 +1,151 @@
 import os
 import yaml
 
+from Deployment.ContainerConfiguration import ContainerConfiguration
+from Deployment.EnvironmentConfiguration import EnvironmentConfiguration
 from Deployment.GitHub import GitHub
-from typing import Optional, List
+from Deployment.RolloutProfile import RolloutProfile
+from typing import Dict, Optional, Tuple
 
 
 class ConfigurationFile:
-    def __init__(self, configuration_filename: str):
-        configuration = ConfigurationFile.__load_raw__(configuration_filename)
-        self.environments = configuration["environments"]
-
-    def get_aws_account_id(self, environment_id: str):
-        """
-        Return the AWS account ID for the specified environment
-        :param environment_id: The environment you want the AWS account ID for
-        :return: The AWS account ID
-        """
-        if environment_id not in self.environments.keys():
-            raise Exception("Unknown environment ({environment_id}) requested".format(environment_id=environment_id))
-        return self.environments[environment_id]["aws_account_id"]
-
-    def get_aws_deployment_region(self, environment_id: str):
-        """
-        Return the AWS deployment region for the specified environment
-        :param environment_id: The environment you want the AWS account ID for
-        :return: The AWS account ID
-        """
-        if environment_id not in self.environments.keys():
-            raise Exception("Unknown environment ({environment_id}) requested".format(environment_id=environment_id))
-        return self.environments[environment_id]["aws_deployment_region"]
+    # SSM paths a container's secrets are loaded from unless it sets "secret_paths", later paths take precedence
+    DEFAULT_SECRET_PATHS = ['/{environment}/Env', '/{environment}/{service}/Env']
 
-    def get_aws_deployment_cluster_name(self, environment_id: str):
-        """
-        Return the AWS deployment ECS cluster name for the specified environment
-        :param environment_id: The environment you want the AWS account ID for
-        :return: The AWS account ID
-        """
-        if environment_id not in self.environments.keys():
-            raise Exception("Unknown environment ({environment_id}) requested".format(environment_id=environment_id))
-        return self.environments[environment_id]["aws_deployment_cluster_name"]
-
-    def get_container_names(self, environment_id: str) -> List[str]:
-        """
-        Return list of all container IDs for this environment
-        :param environment_id: The environment you want the container list for
-        :return: List of container IDs
-        """
-        if environment_id not in self.environments.keys():
-            raise Exception("Unknown environment ({environment_id}) requested".format(environment_id=environment_id))
-
-        return self.environments[environment_id]["containers"].keys()
-
-    def is_container_run_required(self, environment_id: str, container_id: str):
-        """
-        Return flag indicating whether execution of the container is required during build process
-        :param environment_id: The environment ID
-        :param container_id: The container ID
-        :return: The AWS account ID
-        """
-        if environment_id not in self.environments.keys():
-            raise Exception("Unknown environment ({environment_id}) requested".format(environment_id=environment_id))
-        if container_id not in self.environments[environment_id]["containers"].keys():
-            raise Exception("Unknown container ({container_id}) requested".format(container_id=container_id))
-
-        container = self.environments[environment_id]["containers"][container_id]
-        run_key = 'run_during_deployment'
-        if run_key not in container.keys():
-            return False
-
-        return container[run_key] == 1 or container[run_key] is True or container[run_key] == 'True' or container[run_key] == 'true' or container[run_key] == '1'
-
-    def is_wait_service_stable_required(self, environment_id: str, container_id: str):
-        """
-        Return flag indicating whether the update process needs to wait for the service to stabilize before proceeding
-        :param environment_id: The environment ID
-        :param container_id: The container ID
-        :return: The AWS account ID
+    def __init__(self, configuration_filename: str, repository_root: Optional[str] = None):
         """
-        if environment_id not in self.environments.keys():
-            raise Exception("Unknown environment ({environment_id}) requested".format(environment_id=environment_id))
-        if container_id not in self.environments[environment_id]["containers"].keys():
-            raise Exception("Unknown container ({container_id}) requested".format(container_id=container_id))
-
-        container = self.environments[environment_id]["containers"][container_id]
-        run_key = 'wait_service_stable'
-        if run_key not in container.keys():
-            return False
-
-        return container[run_key] == 1 or container[run_key] is True or container[run_key] == 'True' or container[run_key] == 'true' or container[run_key] == '1'
-
-
-    def get_container_filename(self, environment_id: str, container_id: str):
-        """
-        Return the docker container filename for the specified environment/container
-        :param environment_id: The environment ID
-        :param container_id: The container ID
-        :return: The AWS account ID
+        Load the deployment configuration file, environments are only validated when they are requested
+        :param configuration_filename: Path/filename to load
+        :param repository_root: GitHub repository root folder, found from the current folder if not supplied
         """
-        if environment_id not in self.environments.keys():
-            raise Exception("Unknown environment ({environment_id}) requested".format(environment_id=environment_id))
-        if container_id not in self.environments[environment_id]["containers"].keys():
-            raise Exception("Unknown container ({container_id}) requested".format(container_id=container_id))
-
-        return ConfigurationFile.__sanitize_filename__('{repository_root}/{container_filename}'.format(
-            repository_root=GitHub.get_repository_root(),
-            container_filename=self.environments[environment_id]["containers"][container_id]['dockerfile']
-        ))
+        configuration = ConfigurationFile.__load_raw__(configuration_filename)
+        self.environments = configuration["environments"]
+        self.__repository_root__ = repository_root if repository_root is not None else GitHub.get_repository_root()
+        self.__compiled__: Dict[Tuple[str, str], EnvironmentConfiguration] = {}
 
-    def get_target(self, environment_id: str, container_id: str):
+    def get_environment(self, environment_id: str, image_tag: str) -> EnvironmentConfiguration:
         """
-        Return the docker target
+        Return the resolved configuration of an environment
         :param environment_id: The environment ID
-        :param container_id: The container ID
-        :return: The AWS account ID
+        :param image_tag: The image tag being deployed
+        :return: Environment configuration
+        :raises Exception: if the environment is unknown or fails to validate
         """
-        if environment_id not in self.environments.keys():
-            raise Exception("Unknown environment ({environment_id}) requested".format(environment_id=environment_id))
-        if container_id not in self.environments[environment_id]["containers"].keys():
-            raise Exception("Unknown container ({container_id}) requested".format(container_id=container_id))
-
-        if 'target' not in self.environments[environment_id]["containers"][container_id].keys():
-            return None
+        key = (environment_id, image_tag)
+        if key not in self.__compiled__.keys():
+            self.__compiled__[key] = self.__compile__(environment_id, image_tag)
 
-        return self.environments[environment_id]["containers"][container_id]['target']
+        return self.__compiled__[key]
 
-    def get_image(self, environment_id: str, container_id: str):
+    def __compile__(self, environment_id: str, image_tag: str) -> EnvironmentConfiguration:
         """
-        Return the docker image
+        Validate an environment and resolve the values used during the deployment
         :param environment_id: The environment ID
-        :param container_id: The container ID
-        :return: The AWS account ID
+        :param image_tag: The image tag being deployed
+        :return: Environment configuration
+        :raises Exception: if the environment is unknown or fails to validate
         """
         if environment_id not in self.environments.keys():
             raise Exception("Unknown environment ({environment_id}) requested".format(environment_id=environment_id))
-        if container_id not in self.environments[environment_id]["containers"].keys():
-            raise Exception("Unknown container ({container_id}) requested".format(container_id=container_id))
 
-        if 'image' not in self.environments[environment_id]["containers"][container_id].keys():
-            raise Exception(f'The ".github/deploy.yml" file for this project did not specify an image tag for the "{container_id}" container')
-
-        return self.environments[environment_id]["containers"][container_id]['image']
+        environment = self.environments[environment_id]
+        ConfigurationFile.__assert_dictionary_contains__(environment, ['aws_account_id', 'aws_deployment_region', 'containers'])
+
+        # The AWS location is used in every request and cache key, an empty value would only fail inside botocore
+        for key in ['aws_account_id', 'aws_deployment_region', 'aws_deployment_cluster_name']:
+            if environment.get(key) is None or str(environment[key]).strip() == '':
+                raise Exception(f'The ".github/deploy.yml" file for this project must specify "{key}" for the "{environment_id}" environment')
+
+        aws_account_id = str(environment['aws_account_id'])
+        aws_deployment_region = environment['aws_deployment_region']
+        repository_url = '{aws_account_id}.dkr.ecr.{aws_deployment_region}.amazonaws.com'.format(
+            aws_account_id=aws_account_id,
+            aws_deployment_region=aws_deployment_region
+        )
+
+        containers = {}
+        for container_id, container in environment['containers'].items():
+            ConfigurationFile.__assert_dictionary_contains__(container, ['dockerfile'])
+
+            if 'image' not in container.keys():
+                raise Exception(f'The ".github/deploy.yml" file for this project did not specify an image tag for the "{container_id}" container')
+
+            # "all" merges every "/Env/" parameter in the account into the container, as deployments did originally
+            secret_paths = container.get('secret_paths', ConfigurationFile.DEFAULT_SECRET_PATHS)
+            if secret_paths == 'all':
+                secret_paths = None
+            elif isinstance(secret_paths, list) is False:
+                raise Exception(f'The ".github/deploy.yml" file for this project must specify "secret_paths" as a list (or "all") for the "{container_id}" container')
+
+            paths = container.get('paths')
+            if paths is not None and isinstance(paths, list) is False:
+                raise Exception(f'The ".github/deploy.yml" file for this project must specify "paths" as a list for the "{container_id}" container')
+
+            shards = int(container.get('shards', 1))
+            if shards < 1:
+                raise Exception(f'The ".github/deploy.yml" file for this project must specify at least 1 shard for the "{container_id}" container')
+
+            capacity_providers = container.get('capacity_providers')
+            if capacity_providers is not None and isinstance(capacity_providers, list) is False:
+                raise Exception(f'The ".github/deploy.yml" file for this project must specify "capacity_providers" as a list for the "{container_id}" container')
+
+            rollout = ConfigurationFile.__get_rollout__(container_id, container['rollout']) if 'rollout' in container.keys() else None
+            if rollout is not None and ConfigurationFile.__to_bool__(container.get('wait_service_stable', False)) is False:
+                raise Exception(f'The ".github/deploy.yml" file for this project must enable "wait_service_stable" for the "{container_id}" container, the rollout settings are restored once the service is stable')
+
+            wait_target_health = ConfigurationFile.__to_bool__(container.get('wait_target_health', False))
+            if wait_target_health is True and ConfigurationFile.__to_bool__(container.get('wait_service_stable', False)) is False:
+                raise Exception(f'The ".github/deploy.yml" file for this project must enable "wait_service_stable" for the "{container_id}" container to use "wait_target_health"')
+
+            run_group = str(container['run_group']) if container.get('run_group') is not None else None
+            if run_group is not None and ConfigurationFile.__to_bool__(container.get('run_during_deployment', False)) is False:
+                raise Exception(f'The ".github/deploy.yml" file for this project must enable "run_during_deployment" for the "{container_id}" container to use "run_group"')
+
+            containers[container_id] = ContainerConfiguration(
+                container_id=container_id,
+                service_name=ConfigurationFile.__to_camel_case__(container_id),
+                image=container['image'],
+                image_url='{repository_url}/{image}:{image_tag}'.format(
+                    repository_url=repository_url,
+                    image=container['image'],
+                    image_tag=image_tag
+                ),
+                dockerfile=ConfigurationFile.__sanitize_filename__('{repository_root}/{container_filename}'.format(
+                    repository_root=self.__repository_root__,
+                    container_filename=container['dockerfile']
+                )),
+                entrypoint=ConfigurationFile.__sanitize_filename__('{repository_root}/docker/entrypoints/{container_id}.sh'.format(
+                    repository_root=self.__repository_root__,
+                    container_id=container_id
+                )),
+                target=container.get('target'),
+                run_during_deployment=ConfigurationFile.__to_bool__(container.get('run_during_deployment', False)),
+                wait_service_stable=ConfigurationFile.__to_bool__(container.get('wait_service_stable', False)),
+                circuit_breaker=ConfigurationFile.__to_bool__(container['circuit_breaker']) if 'circuit_breaker' in container.keys() else None,
+                secret_paths=tuple(secret_paths) if secret_paths is not None else None,
+                max_failed_tasks=int(container.get('max_failed_tasks', 3)),
+                paths=tuple(paths) if paths is not None else None,
+                shards=shards,
+                capacity_providers=tuple(capacity_providers) if capacity_providers is not None else None,
+                rollout=rollout,
+                wait_target_health=wait_target_health,
+                run_group=run_group
+            )
+
+        return EnvironmentConfiguration(
+            environment_id=environment_id,
+            aws_account_id=aws_account_id,
+            aws_deployment_region=aws_deployment_region,
+            aws_deployment_cluster_name=environment['aws_deployment_cluster_name'],
+            repository_root=self.__repository_root__,
+            repository_url=repository_url,
+            secret_prefix='arn:aws:ssm:{aws_deployment_region}:{aws_account_id}:parameter/'.format(
+                aws_account_id=aws_account_id,
+                aws_deployment_region=aws_deployment_region
+            ),
+            image_tag=image_tag,
+            containers=containers
+        )
 
     @staticmethod
     def __load_raw__(configuration_filename: str) -> dict:
@@ -182,29 +188,9 @@ class ConfigurationFile:
         # Validate the configuration tag
         ConfigurationFile.__assert_dictionary_contains__(configuration['configuration'], ['environments'])
 
-        # Iterate the environments and ensure they are valid YML files
-        for environment_id in configuration['configuration']['environments'].keys():
-            environment = configuration['configuration']['environments'][environment_id]
-            ConfigurationFile.__assert_dictionary_contains__(environment, ['aws_account_id', 'aws_deployment_region', 'containers'])
-            for container_id in environment["containers"].keys():
-                container = environment["containers"][container_id]
-                ConfigurationFile.__assert_dictionary_contains__(container, ['dockerfile'])
-                container_filename = ConfigurationFile.__sanitize_filename__("{path_repository_root}/{container_filename}".format(
-                    path_repository_root=GitHub.get_repository_root(),
-                    container_filename=container['dockerfile']
-                ))
-                if os.path.exists(container_filename) is False:
-                    raise Exception('Could not locate specified container file ({container_filename}) in {environment} environment'.format(
-                        container_filename=container_filename,
-                        environment=environment
-                    ))
-
-                # Validate the expected entrypoint for the container exists
-                entrypoint_filename = ConfigurationFile.__get_entrypoint_filename__(container_id=container_id)
-                if os.path.exists(entrypoint_filename) is False:
-                    print('WARNING: Failed to locate required Docker entrypoint script ({entrypoint_filename})'.format(
-                        entrypoint_filename=entrypoint_filename
-                    ))
+        # Environments are validated when they are requested, only the deployed environment needs to be valid
+        if isinstance(configuration['configuration']['environments'], dict) is False:
+            raise Exception('The supplied deployment file must contain a dictionary of environments')
 
         return configuration["configuration"]
 
@@ -228,16 +214,67 @@ class ConfigurationFile:
             raise Exception('Error validating dictionary contents')
 
     @staticmethod
-    def __get_entrypoint_filename__(container_id: str):
+    def __get_rollout__(container_id: str, rollout) -> RolloutProfile:
+        """
+        Resolve the rollout settings of a container, either a profile name or a dictionary of explicit values
+        optionally based on a profile
+        :param container_id: The container ID
+        :param rollout: The rollout configuration value
+        :return: Rollout profile
+        :raises Exception: if the rollout settings are invalid
+        """
+        if isinstance(rollout, str):
+            rollout = {'profile': rollout}
+        if isinstance(rollout, dict) is False:
+            raise Exception(f'The ".github/deploy.yml" file for this project must specify "rollout" as a profile name or a dictionary for the "{container_id}" container')
+
+        values = {}
+        if 'profile' in rollout.keys():
+            if rollout['profile'] not in RolloutProfile.PROFILES.keys():
+                raise Exception('Unknown rollout profile ({profile}) requested for the "{container_id}" container, the allowed profiles are: {profiles}'.format(
+                    profile=rollout['profile'],
+                    container_id=container_id,
+                    profiles=', '.join(RolloutProfile.PROFILES.keys())
+                ))
+            values.update(RolloutProfile.PROFILES[rollout['profile']])
+
+        # Explicit values take precedence over the profile
+        for key in ['maximum_percent', 'minimum_healthy_percent', 'health_check_grace_period', 'scale_out']:
+            if key in rollout.keys():
+                values[key] = int(rollout[key])
+                if values[key] < 0:
+                    raise Exception(f'The ".github/deploy.yml" file for this project must not specify a negative "{key}" for the "{container_id}" container')
+
+        if values.get('minimum_healthy_percent', 0) > 100:
+            raise Exception(f'The ".github/deploy.yml" file for this project must not specify a "minimum_healthy_percent" above 100 for the "{container_id}" container')
+        if values.get('maximum_percent', 100) < 100:
+            raise Exception(f'The ".github/deploy.yml" file for this project must not specify a "maximum_percent" below 100 for the "{container_id}" container')
+
+        return RolloutProfile(
+            maximum_percent=values.get('maximum_percent'),
+            minimum_healthy_percent=values.get('minimum_healthy_percent'),
+            health_check_grace_period=values.get('health_check_grace_period'),
+            scale_out=values.get('scale_out', 0)
+        )
+
+    @staticmethod
+    def __to_bool__(value) -> bool:
+        """
+        Convert a boolean configuration value
+        :param value: The configuration value
+        :return: Boolean flag
+        """
+        return value == 1 or value is True or value == 'True' or value == 'true' or value == '1'
+
+    @staticmethod
+    def __to_camel_case__(value: str) -> str:
         """
-        Return the docker entrypoint filename for the specified environment/container
-        :param environment_id:
-        :return: The AWS account ID
+        Convert snake case string to camel snake
+        :param value: Snake case string to convert
+        :return: Camel case string
         """
-        return ConfigurationFile.__sanitize_filename__("{path_repository_root}/docker/entrypoints/{container_id}.sh".format(
-            path_repository_root=GitHub.get_repository_root(),
-            container_id=container_id
-        ))
+        components = value.split('_')
+        return (components[0] + ''.join(x.title() for x in components[1:])).title()
 
     @staticmethod
     def __sanitize_filename__(filename: str) -> str:
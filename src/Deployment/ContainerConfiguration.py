@@ -0,0 +1,68 @@
+from dataclasses import dataclass
+from Deployment.RolloutProfile import RolloutProfile
+from typing import Optional, Tuple
+
+
+@dataclass(frozen=True)
+class ContainerConfiguration:
+    """
+    Resolved configuration of a single container, built once when the environment is loaded
+    """
+    __slots__ = (
+        'container_id',
+        'service_name',
+        'image',
+        'image_url',
+        'dockerfile',
+        'entrypoint',
+        'target',
+        'run_during_deployment',
+        'wait_service_stable',
+        'circuit_breaker',
+        'secret_paths',
+        'max_failed_tasks',
+        'paths',
+        'shards',
+        'capacity_providers',
+        'rollout',
+        'wait_target_health',
+        'run_group'
+    )
+
+    # Container ID used in the deploy.yml file
+    container_id: str
+    # ECS service (and task definition container) name
+    service_name: str
+    # ECR repository name
+    image: str
+    # Full image URL including the image tag being deployed
+    image_url: str
+    # Absolute Dockerfile filename
+    dockerfile: str
+    # Absolute Docker entrypoint script filename
+    entrypoint: str
+    # Docker build target
+    target: Optional[str]
+    # Whether a task is run from the service during the deployment
+    run_during_deployment: bool
+    # Whether the deployment waits for the service to stabilize
+    wait_service_stable: bool
+    # Whether the ECS deployment circuit breaker is enabled, None keeps the existing service configuration
+    circuit_breaker: Optional[bool]
+    # SSM paths secrets are loaded from, None if all "/Env/" parameters in the account should be used
+    secret_paths: Optional[Tuple[str, ...]]
+    # Number of failed task launches tolerated before a rollout is considered failed
+    max_failed_tasks: int
+    # Glob patterns of the files the container is built from, None if every change affects the container
+    paths: Optional[Tuple[str, ...]]
+    # Number of copies of the run-once task started with SHARD_INDEX and SHARD_COUNT environment variables
+    shards: int
+    # Capacity providers tried in order when starting run-once tasks, None uses the launch configuration of the service
+    capacity_providers: Optional[Tuple[str, ...]]
+    # Rollout speed used while the service is deployed, None keeps the existing service configuration
+    rollout: Optional[RolloutProfile]
+    # Whether the service is ready as soon as its new tasks are healthy in the load balancer target groups
+    wait_target_health: bool
+    # Run-once containers listed next to each other with the same group start their tasks together, None runs the
+    # task on its own
+    run_group: Optional[str]
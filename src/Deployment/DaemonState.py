@@ -0,0 +1,80 @@
+import os
+import threading
+import time
+
+from Aws.Session import Session
+from Deployment.DiscoveryCache import DiscoveryCache
+from Deployment.DurationHistory import DurationHistory
+from typing import Dict, Optional
+
+
+class DaemonState:
+    # ECR authorization tokens are valid for 12 hours, logins are renewed an hour early
+    LOGIN_SECONDS = 11 * 60 * 60
+
+    def __init__(self):
+        """
+        State kept warm between the deployments run by the deploy daemon: AWS sessions (and their connections), ECR
+        logins, discovery caches and duration histories
+        """
+        self.__lock__ = threading.Lock()
+        self.__sessions__: Dict[str, Session] = {}
+        self.__caches__: Dict[str, DiscoveryCache] = {}
+        self.__histories__: Dict[str, DurationHistory] = {}
+        self.__logins__: Dict[str, float] = {}
+
+    def get_session(self, region_name: str) -> Session:
+        """
+        Return the AWS session of a region, sessions are only shared by deployments using the same credentials
+        :param region_name: AWS region
+        :return: AWS session
+        """
+        key = '{access_key_id}/{region_name}'.format(access_key_id=os.environ.get('AWS_ACCESS_KEY_ID', ''), region_name=region_name)
+        with self.__lock__:
+            if key not in self.__sessions__.keys():
+                self.__sessions__[key] = Session(region_name=region_name)
+            return self.__sessions__[key]
+
+    def get_discovery_cache(self, filename: Optional[str], account_id: str, region: str, cluster_name: str) -> DiscoveryCache:
+        """
+        Return the discovery cache of a cluster, the cache file is only loaded by the first deployment
+        :param filename: Optional cache filename
+        :param account_id: AWS account ID
+        :param region: AWS region
+        :param cluster_name: ECS cluster name
+        :return: Discovery cache
+        """
+        key = '{filename}/{account_id}/{region}/{cluster_name}'.format(filename=filename or '', account_id=account_id, region=region, cluster_name=cluster_name)
+        with self.__lock__:
+            if key not in self.__caches__.keys():
+                self.__caches__[key] = DiscoveryCache(filename=filename, account_id=account_id, region=region, cluster_name=cluster_name)
+            return self.__caches__[key]
+
+    def get_duration_history(self, filename: Optional[str]) -> DurationHistory:
+        """
+        Return the duration history, the history file is only loaded by the first deployment
+        :param filename: Optional history filename
+        :return: Duration history
+        """
+        key = filename or ''
+        with self.__lock__:
+            if key not in self.__histories__.keys():
+                self.__histories__[key] = DurationHistory(filename=filename)
+            return self.__histories__[key]
+
+    def is_logged_in(self, repository_url: str) -> bool:
+        """
+        Check whether Docker is still logged in to a repository
+        :param repository_url: Repository URL
+        :return: Boolean flag, true if the login has not expired
+        """
+        with self.__lock__:
+            return self.__logins__.get(repository_url, 0) > time.time()
+
+    def set_logged_in(self, repository_url: str) -> None:
+        """
+        Record a Docker login to a repository
+        :param repository_url: Repository URL
+        """
+        with self.__lock__:
+            self.__logins__[repository_url] = time.time() + DaemonState.LOGIN_SECONDS
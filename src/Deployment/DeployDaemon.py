@@ -0,0 +1,406 @@
+import contextlib
+import json
+import multiprocessing
+import os
+import signal
+import threading
+import time
+import uuid
+
+from Deployment.CommandRunner import CommandRunner
+from Deployment.ConfigurationFile import ConfigurationFile
+from Deployment.DaemonState import DaemonState
+from Deployment.GitHub import GitHub
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from queue import Empty
+from typing import Callable, Dict, List, Optional
+
+
+class DeployDaemon:
+    # Variables every deploy request must supply
+    REQUIRED_VARIABLES = ['GITHUB_WORKSPACE', 'ENVIRONMENT', 'IMAGE_TAG']
+
+    def __init__(self, deploy: Callable[[DaemonState], None], log_directory: Optional[str] = None):
+        """
+        Long running deployment service for self-hosted runners, deploy requests are received over HTTP or from a
+        queue directory. Each cluster has its own worker process running its requests one at a time, so deployments
+        of different clusters run at the same time while each worker keeps its AWS sessions, ECR logins and discovery
+        caches warm between requests. Workers are started by a fork server process, so they never inherit the locks or
+        threads of the daemon (e.g. its HTTP handler threads)
+        :param deploy: Function deploying the request described by the environment variables, receiving the state of
+                       the worker
+        :param log_directory: Optional directory the output of each request is written to, the output is written
+                              to the daemon output if not supplied
+        """
+        self.__deploy__ = deploy
+        self.__log_directory__ = log_directory
+        self.__environment__ = dict(os.environ)
+        self.__context__ = multiprocessing.get_context('forkserver')
+        self.__lock__ = threading.Lock()
+        self.__stopped__ = threading.Event()
+        self.__requests__: Dict[str, Dict] = {}
+        self.__workers__: Dict[str, Dict] = {}
+        self.__results__ = self.__context__.Queue()
+        self.__threads__: List[threading.Thread] = []
+        self.__server__: Optional[ThreadingHTTPServer] = None
+
+        if log_directory is not None:
+            os.makedirs(log_directory, exist_ok=True)
+
+    def run(self, listen: Optional[str] = None, queue_directory: Optional[str] = None) -> None:
+        """
+        Receive deploy requests until the daemon is interrupted or terminated
+        :param listen: Optional address the HTTP intake listens on (e.g. 127.0.0.1:8080)
+        :param queue_directory: Optional directory polled for deploy request files (<request id>.json)
+        """
+        if listen is None and queue_directory is None:
+            raise Exception('The deploy daemon requires an HTTP address or a queue directory')
+
+        signal.signal(signal.SIGTERM, lambda signum, frame: self.__stopped__.set())
+        self.__start_thread__(self.__collect__, 'DeployDaemonResults')
+        if listen is not None:
+            self.serve_http(listen)
+        if queue_directory is not None:
+            self.__start_thread__(lambda: self.watch_queue(queue_directory), 'DeployDaemonQueue')
+
+        print('Deploy daemon started')
+        try:
+            while self.__stopped__.wait(1) is False:
+                pass
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.shutdown()
+
+    def submit(self, variables: Dict[str, str], request_id: Optional[str] = None) -> str:
+        """
+        Queue a deploy request on the worker of its cluster
+        :param variables: Environment variables of the deployment, added to the environment of the daemon
+        :param request_id: Optional request ID, generated if not supplied
+        :return: The request ID
+        :raises Exception: if a required variable is missing
+        """
+        for variable in DeployDaemon.REQUIRED_VARIABLES:
+            if variables.get(variable, '') == '':
+                raise Exception('No {variable} was specified in the deploy request'.format(variable=variable))
+
+        request_id = request_id or uuid.uuid4().hex
+        cluster_key = DeployDaemon.get_cluster_key(variables)
+        request = {
+            'id': request_id,
+            'cluster': cluster_key,
+            'environment': variables['ENVIRONMENT'],
+            'image_tag': variables['IMAGE_TAG'],
+            'status': 'queued',
+            'submitted': time.time()
+        }
+
+        # Only the queue is changed while holding the lock, a new worker is started once the lock is released so
+        # other submissions are not blocked while it starts
+        process = None
+        with self.__lock__:
+            if self.__stopped__.is_set():
+                raise Exception('The deploy daemon is stopping')
+            if request_id in self.__requests__.keys():
+                raise Exception('Deploy request {request_id} was already submitted'.format(request_id=request_id))
+            self.__requests__[request_id] = request
+            if cluster_key not in self.__workers__.keys():
+                queue = self.__context__.Queue()
+                process = self.__context__.Process(
+                    target=DeployDaemon.__work__,
+                    args=(self.__deploy__, self.__log_directory__, self.__environment__, queue, self.__results__),
+                    name='DeployWorker',
+                    daemon=True
+                )
+                self.__workers__[cluster_key] = {'queue': queue, 'process': process}
+            self.__workers__[cluster_key]['queue'].put({'id': request_id, 'variables': dict(variables)})
+
+        if process is not None:
+            process.start()
+
+        print('Queued deploy request {request_id}: {environment} ({image_tag}) on {cluster_key}'.format(
+            request_id=request_id,
+            environment=variables['ENVIRONMENT'],
+            image_tag=variables['IMAGE_TAG'],
+            cluster_key=cluster_key
+        ))
+        return request_id
+
+    def get_status(self, request_id: str) -> Optional[Dict]:
+        """
+        Return the status of a request
+        :param request_id: The request ID
+        :return: Request details and status (queued, running, succeeded, failed or superseded), or None if unknown
+        """
+        with self.__lock__:
+            request = self.__requests__.get(request_id)
+            return dict(request) if request is not None else None
+
+    def serve_http(self, listen: str) -> None:
+        """
+        Receive deploy requests over HTTP in a background thread: POST /deploy with a JSON object of environment
+        variables queues a request, GET /deploy/<request id> returns its status
+        :param listen: Address to listen on (e.g. 127.0.0.1:8080)
+        """
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self) -> None:
+                if self.path.rstrip('/') != '/deploy':
+                    self.__respond__(404, {'error': 'Not found'})
+                    return
+                try:
+                    variables = json.loads(self.rfile.read(int(self.headers.get('Content-Length', '0'))) or b'{}')
+                    if not isinstance(variables, dict):
+                        raise Exception('The deploy request must be a JSON object of environment variables')
+                    request_id = daemon.submit({str(key): str(value) for key, value in variables.items()})
+                except Exception as exception:
+                    self.__respond__(400, {'error': str(exception)})
+                    return
+                self.__respond__(202, daemon.get_status(request_id))
+
+            def do_GET(self) -> None:
+                request = daemon.get_status(self.path.rstrip('/').split('/')[-1]) if self.path.startswith('/deploy/') else None
+                if request is None:
+                    self.__respond__(404, {'error': 'Not found'})
+                    return
+                self.__respond__(200, request)
+
+            def log_message(self, format: str, *args) -> None:
+                print('HTTP: {message}'.format(message=format % args))
+
+            def __respond__(self, status: int, body: Dict) -> None:
+                content = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+        host, _, port = listen.rpartition(':')
+        self.__server__ = ThreadingHTTPServer((host or '127.0.0.1', int(port)), Handler)
+        self.__start_thread__(self.__server__.serve_forever, 'DeployDaemonHttp')
+        print('Listening for deploy requests: http://{host}:{port}/deploy'.format(host=host or '127.0.0.1', port=port))
+
+    def watch_queue(self, directory: str, interval: float = 1.0) -> None:
+        """
+        Receive deploy requests from files containing a JSON object of environment variables, each file is moved to
+        the processed folder and the status of the request is written next to it (<request id>.status.json)
+        :param directory: Queue directory
+        :param interval: Number of seconds to wait between checks for new files
+        """
+        processed = os.path.join(directory, 'processed')
+        os.makedirs(processed, exist_ok=True)
+        print('Watching for deploy requests: {directory}'.format(directory=directory))
+
+        # Last status written for each unfinished request
+        written: Dict[str, Optional[str]] = {}
+
+        while self.__stopped__.is_set() is False:
+            # Files are queued in the order they were written
+            filenames = sorted(
+                [filename for filename in os.listdir(directory) if filename.endswith('.json')],
+                key=lambda filename: os.path.getmtime(os.path.join(directory, filename))
+            )
+            for filename in filenames:
+                request_id = filename[:-len('.json')]
+                try:
+                    os.replace(os.path.join(directory, filename), os.path.join(processed, filename))
+                    with open(os.path.join(processed, filename), 'r') as file:
+                        variables = json.load(file)
+                    if not isinstance(variables, dict):
+                        raise Exception('The deploy request must be a JSON object of environment variables')
+                    self.submit({str(key): str(value) for key, value in variables.items()}, request_id=request_id)
+                    written[request_id] = None
+                except Exception as exception:
+                    print('WARNING: Invalid deploy request ({filename}): {exception}'.format(filename=filename, exception=exception))
+                    DeployDaemon.__write_status__(processed, {'id': request_id, 'status': 'failed', 'error': str(exception)})
+
+            for request_id in list(written.keys()):
+                status = self.get_status(request_id)
+                if status['status'] != written[request_id]:
+                    DeployDaemon.__write_status__(processed, status)
+                    written[request_id] = status['status']
+                if 'finished' in status.keys():
+                    del written[request_id]
+
+            self.__stopped__.wait(interval)
+
+    def shutdown(self) -> None:
+        """
+        Stop receiving requests and wait for the queued requests to finish
+        """
+        print('Stopping deploy daemon, waiting for the queued deploy requests')
+        self.__stopped__.set()
+        if self.__server__ is not None:
+            self.__server__.shutdown()
+
+        with self.__lock__:
+            workers = list(self.__workers__.values())
+        for worker in workers:
+            worker['queue'].put(None)
+        for worker in workers:
+            # A worker started after the daemon stopped reads the stop request queued above by itself
+            if worker['process'].pid is not None:
+                worker['process'].join()
+
+        self.__results__.put(None)
+        for thread in self.__threads__:
+            thread.join()
+
+    @staticmethod
+    def get_cluster_key(variables: Dict[str, str]) -> str:
+        """
+        Identify the cluster a request deploys to, requests for the same cluster run one at a time
+        :param variables: Environment variables of the deployment
+        :return: The cluster key (account/region/cluster), or the workspace and environment if the deployment
+                 configuration can not be loaded (the deployment reports the error)
+        """
+        try:
+            repository_root = GitHub.get_repository_root(variables['GITHUB_WORKSPACE'])
+            environment = ConfigurationFile(
+                '{repository_root}/.github/deploy.yml'.format(repository_root=repository_root),
+                repository_root=repository_root
+            ).get_environment(variables['ENVIRONMENT'], image_tag=variables['IMAGE_TAG'])
+            return '{account_id}/{region}/{cluster_name}'.format(
+                account_id=environment.aws_account_id,
+                region=environment.aws_deployment_region,
+                cluster_name=environment.aws_deployment_cluster_name
+            )
+        except Exception:
+            return '{workspace}/{environment}'.format(workspace=variables['GITHUB_WORKSPACE'], environment=variables['ENVIRONMENT'])
+
+    @staticmethod
+    def __work__(
+            deploy: Callable[[DaemonState], None],
+            log_directory: Optional[str],
+            environment: Dict[str, str],
+            queue: multiprocessing.Queue,
+            results: multiprocessing.Queue
+    ) -> None:
+        """
+        Run the requests of a cluster one at a time, in a worker process
+        :param deploy: Function deploying the request described by the environment variables
+        :param log_directory: Optional directory the output of each request is written to
+        :param environment: Environment variables of the daemon
+        :param queue: Queue of requests, None stops the worker
+        :param results: Queue the status updates of the requests are reported to
+        """
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        state = DaemonState()
+        pending = []
+        stopping = False
+
+        while stopping is False or len(pending) > 0:
+            if len(pending) == 0:
+                pending.append(queue.get())
+            # Requests queued while the previous request was running are coalesced below
+            while True:
+                try:
+                    pending.append(queue.get_nowait())
+                except Empty:
+                    break
+            if None in pending:
+                stopping = True
+                pending = [request for request in pending if request is not None]
+                if len(pending) == 0:
+                    break
+
+            request = pending.pop(0)
+            if any(DeployDaemon.__get_target__(queued['variables']) == DeployDaemon.__get_target__(request['variables']) for queued in pending):
+                results.put({'id': request['id'], 'status': 'superseded'})
+                continue
+
+            results.put({'id': request['id'], 'status': 'running'})
+            results.put({'id': request['id'], 'status': 'succeeded' if DeployDaemon.__run__(deploy, log_directory, environment, request, state) else 'failed'})
+
+    @staticmethod
+    def __run__(
+            deploy: Callable[[DaemonState], None],
+            log_directory: Optional[str],
+            environment: Dict[str, str],
+            request: Dict,
+            state: DaemonState
+    ) -> bool:
+        """
+        Run a request with its environment variables, in a worker process
+        :param deploy: Function deploying the request described by the environment variables
+        :param log_directory: Optional directory the output of each request is written to
+        :param environment: Environment variables of the daemon
+        :param request: The request
+        :param state: State of the worker
+        :return: Boolean flag, true if the deployment succeeded
+        """
+        os.environ.clear()
+        os.environ.update(environment)
+        os.environ.update(request['variables'])
+        # A failed deployment terminates the command runner
+        CommandRunner.set_default(None)
+
+        with contextlib.ExitStack() as stack:
+            if log_directory is not None:
+                file = stack.enter_context(open(os.path.join(log_directory, '{request_id}.log'.format(request_id=request['id'])), 'w', buffering=1))
+                stack.enter_context(contextlib.redirect_stdout(file))
+                stack.enter_context(contextlib.redirect_stderr(file))
+            try:
+                deploy(state)
+            except SystemExit as exception:
+                return exception.code in [None, 0]
+            except Exception as exception:
+                print('FATAL ERROR: {exception}'.format(exception=exception))
+                return False
+
+        return True
+
+    def __collect__(self) -> None:
+        """
+        Record the status updates of the worker processes
+        """
+        while True:
+            result = self.__results__.get()
+            if result is None:
+                break
+            with self.__lock__:
+                request = self.__requests__.get(result['id'])
+                if request is None:
+                    continue
+                request['status'] = result['status']
+                if result['status'] in ['succeeded', 'failed', 'superseded']:
+                    request['finished'] = time.time()
+            print('Deploy request {request_id}: {status}'.format(request_id=result['id'], status=result['status']))
+
+    def __start_thread__(self, target: Callable[[], None], name: str) -> None:
+        """
+        Start a background thread, joined when the daemon shuts down
+        :param target: Function run by the thread
+        :param name: Thread name
+        """
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self.__threads__.append(thread)
+
+    @staticmethod
+    def __get_target__(variables: Dict[str, str]) -> str:
+        """
+        Identify what a request deploys, a newer request deploying the same target supersedes a queued request
+        :param variables: Environment variables of the deployment
+        :return: Workspace, environment and selected container
+        """
+        return '{workspace}/{environment}/{container}'.format(
+            workspace=variables['GITHUB_WORKSPACE'],
+            environment=variables['ENVIRONMENT'],
+            container=variables.get('DEPLOY_CONTAINER', '')
+        )
+
+    @staticmethod
+    def __write_status__(directory: str, status: Dict) -> None:
+        """
+        Write the status of a queue directory request
+        :param directory: Processed folder of the queue directory
+        :param status: Request details and status
+        """
+        filename = os.path.join(directory, '{request_id}.status.json'.format(request_id=status['id']))
+        with open(filename + '.tmp', 'w') as file:
+            json.dump(status, file, indent=2)
+        os.replace(filename + '.tmp', filename)
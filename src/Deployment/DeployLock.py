@@ -0,0 +1,210 @@
+import threading
+import time
+
+from Aws.Clients import DynamoDb, Ssm
+from Aws.Session import Session
+from Deployment.DynamoDbLockBackend import DynamoDbLockBackend
+from Deployment.FileLockBackend import FileLockBackend
+from Deployment.SsmLockBackend import SsmLockBackend
+from typing import Any, Dict, Optional
+
+
+class DeployLock:
+    def __init__(
+            self,
+            backend: Any,
+            name: str,
+            owner: str,
+            image_tag: str,
+            sequence: float,
+            lease_seconds: float = 120,
+            poll_interval: float = 10,
+            max_wait: Optional[float] = None
+    ):
+        """
+        Lease based lock serializing the deployments of a cluster and environment. Only the newest queued deployment
+        waits for the lock, older deployments exit as soon as a newer one is queued (or holds the lock) since their
+        commit would be replaced straight away
+        :param backend: Object storing the lock records, with get, create, replace and delete methods (e.g. FileLockBackend)
+        :param name: Lock name (e.g. cluster/environment)
+        :param owner: Unique identifier of this deployment
+        :param image_tag: Image tag being deployed, reported to the other deployments
+        :param sequence: Order of the deployment, a deployment with a higher sequence is newer
+        :param lease_seconds: Number of seconds the lock is held without being renewed, the lock is renewed every third
+        of the lease while it is held
+        :param poll_interval: Number of seconds to wait between attempts to acquire the lock
+        :param max_wait: Optional maximum number of seconds to wait for the lock
+        """
+        self.__backend__ = backend
+        self.__lock_name__ = name
+        self.__owner__ = owner
+        self.__image_tag__ = image_tag
+        self.__sequence__ = sequence
+        self.__lease_seconds__ = lease_seconds
+        self.__poll_interval__ = poll_interval
+        self.__max_wait__ = max_wait
+        self.__record__: Optional[Dict] = None
+        self.__stopped__ = threading.Event()
+        self.__lost__ = threading.Event()
+        self.__thread__ = None
+
+    def acquire(self) -> bool:
+        """
+        Wait for the lock, renewing it in a background thread once it has been acquired
+        :return: Boolean flag, false if the deployment was superseded by a newer deployment
+        :raises Exception: if the lock could not be acquired before the maximum wait
+        """
+        lock_key = '{name}/lock'.format(name=self.__lock_name__)
+        started = time.time()
+        holder = None
+
+        while True:
+            # Queue this deployment, unless a newer deployment is already queued
+            if self.__register__() is False:
+                return False
+
+            current = self.__backend__.get(lock_key)
+            if current is not None and current['owner'] != self.__owner__ and current['sequence'] > self.__sequence__:
+                print('A newer deployment ({image_tag}) holds the deploy lock, skipping this deployment'.format(image_tag=current['image_tag']))
+                self.__unregister__()
+                return False
+
+            record = self.__get_record__()
+            if current is None:
+                acquired = self.__backend__.create(lock_key, record)
+            elif current['expires'] <= time.time():
+                print('Taking over the expired deploy lock of {owner} ({image_tag})'.format(owner=current['owner'], image_tag=current['image_tag']))
+                acquired = self.__backend__.replace(lock_key, record, current)
+            else:
+                acquired = False
+
+            if acquired is True:
+                self.__record__ = record
+                self.__unregister__()
+                print('Acquired deploy lock: {name}'.format(name=self.__lock_name__))
+                self.__stopped__.clear()
+                self.__lost__.clear()
+                self.__thread__ = threading.Thread(target=self.__renew__, name='DeployLock', daemon=True)
+                self.__thread__.start()
+                return True
+
+            if self.__max_wait__ is not None and time.time() - started >= self.__max_wait__:
+                self.__unregister__()
+                raise Exception('Timed out waiting for the deploy lock ({name})'.format(name=self.__lock_name__))
+
+            if current is not None and current['owner'] != holder:
+                holder = current['owner']
+                print('Waiting for the deploy lock ({name}) held by {owner} ({image_tag})'.format(
+                    name=self.__lock_name__,
+                    owner=current['owner'],
+                    image_tag=current['image_tag']
+                ))
+            time.sleep(self.__poll_interval__)
+
+    def release(self) -> None:
+        """
+        Stop renewing the lock and release it, failures are only reported as the lease expires on its own
+        """
+        if self.__thread__ is None:
+            return
+
+        self.__stopped__.set()
+        self.__thread__.join()
+        self.__thread__ = None
+
+        try:
+            if self.__lost__.is_set() is False:
+                self.__backend__.delete('{name}/lock'.format(name=self.__lock_name__), self.__record__)
+                print('Released deploy lock: {name}'.format(name=self.__lock_name__))
+        except Exception as exception:
+            print('WARNING: Failed to release the deploy lock ({name}), it will expire: {exception}'.format(name=self.__lock_name__, exception=exception))
+
+    def is_held(self) -> bool:
+        """
+        Check whether the lock is still held, it is lost if another deployment took it over after the lease expired
+        :return: Boolean flag, true if the lock is held
+        """
+        return self.__thread__ is not None and self.__lost__.is_set() is False
+
+    @staticmethod
+    def get_backend(specification: str, session: Session) -> Any:
+        """
+        Create a lock backend from its specification
+        :param specification: ssm[:<parameter path>], dynamodb:<table name> or file:<directory>
+        :param session: AWS session
+        :return: The lock backend
+        :raises Exception: if the specification is invalid
+        """
+        backend, _, argument = specification.partition(':')
+        if backend == 'ssm':
+            print('Deploy lock records are stored in SSM, taking over a lock is best-effort (use dynamodb:<table name> for a conditional lock)')
+            return SsmLockBackend(ssm_client=Ssm.Client(session=session), prefix=argument if argument != '' else '/deploy-lock')
+        if backend == 'dynamodb' and argument != '':
+            return DynamoDbLockBackend(dynamodb_client=DynamoDb.Client(session=session), table_name=argument)
+        if backend == 'file' and argument != '':
+            return FileLockBackend(directory=argument)
+
+        raise Exception('Invalid deploy lock ({specification}), must be one of: ssm[:<parameter path>], dynamodb:<table name>, file:<directory>'.format(
+            specification=specification
+        ))
+
+    def __register__(self) -> bool:
+        """
+        Record this deployment as the newest queued deployment, refreshing its expiry
+        :return: Boolean flag, false if a newer deployment is queued
+        """
+        waiting_key = '{name}/waiting'.format(name=self.__lock_name__)
+
+        while True:
+            current = self.__backend__.get(waiting_key)
+            if current is not None and current['owner'] != self.__owner__ and current['sequence'] > self.__sequence__ and current['expires'] > time.time():
+                print('A newer deployment ({image_tag}) is waiting for the deploy lock, skipping this deployment'.format(image_tag=current['image_tag']))
+                return False
+
+            record = self.__get_record__()
+            if current is None:
+                registered = self.__backend__.create(waiting_key, record)
+            else:
+                registered = self.__backend__.replace(waiting_key, record, current)
+            if registered is True:
+                return True
+
+    def __unregister__(self) -> None:
+        """
+        Remove this deployment from the queue if it is still the queued deployment
+        """
+        waiting_key = '{name}/waiting'.format(name=self.__lock_name__)
+        current = self.__backend__.get(waiting_key)
+        if current is not None and current['owner'] == self.__owner__:
+            self.__backend__.delete(waiting_key, current)
+
+    def __renew__(self) -> None:
+        """
+        Renew the lease every third of the lease until the lock is released or taken over
+        """
+        lock_key = '{name}/lock'.format(name=self.__lock_name__)
+        while self.__stopped__.wait(self.__lease_seconds__ / 3) is False:
+            record = self.__get_record__()
+            try:
+                renewed = self.__backend__.replace(lock_key, record, self.__record__)
+            except Exception as exception:
+                print('WARNING: Failed to renew the deploy lock ({name}): {exception}'.format(name=self.__lock_name__, exception=exception))
+                continue
+
+            if renewed is False:
+                print('WARNING: The deploy lock ({name}) was taken over by another deployment'.format(name=self.__lock_name__))
+                self.__lost__.set()
+                return
+            self.__record__ = record
+
+    def __get_record__(self) -> Dict:
+        """
+        Return the record of this deployment, expiring after the lease
+        :return: The record
+        """
+        return {
+            'owner': self.__owner__,
+            'image_tag': self.__image_tag__,
+            'sequence': self.__sequence__,
+            'expires': round(time.time() + self.__lease_seconds__, 3)
+        }
@@ -0,0 +1,137 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from Aws.Clients import CloudWatch, Ecs
+
+
+class Diagnostics:
+    def __init__(self, ecs_client: Ecs.Client, cloud_watch_client: CloudWatch.Client, cluster_name: str, log_lines: int = 20):
+        """
+        Collect diagnostics for stopped ECS tasks
+        :param ecs_client: ECS client
+        :param cloud_watch_client: CloudWatch logs client
+        :param cluster_name: ECS cluster name
+        :param log_lines: Number of log lines to collect for each container
+        """
+        self.__ecs_client__ = ecs_client
+        self.__cloud_watch_client__ = cloud_watch_client
+        self.__cluster_name__ = cluster_name
+        self.__log_lines__ = log_lines
+        self.__task_definitions__ = {}
+
+    def collect(self, task_arns: List[str]) -> List[Dict]:
+        """
+        Collect the stopped reason, container exit codes and recent log lines of each task
+        :param task_arns: ECS task ARNs
+        :return: Report containing one entry per task
+        """
+        report = []
+        if len(task_arns) == 0:
+            return report
+
+        for task in self.__ecs_client__.describe_tasks(cluster_name=self.__cluster_name__, task_arns=task_arns):
+            task_definition = self.__get_task_definition__(task['taskDefinitionArn'])
+            containers = []
+            for container in task.get('containers', []):
+                containers.append({
+                    'name': container['name'],
+                    'lastStatus': container.get('lastStatus'),
+                    'exitCode': container.get('exitCode'),
+                    'reason': container.get('reason'),
+                    'logs': self.__get_logs__(task_definition, container['name'], task['taskArn'])
+                })
+            report.append({
+                'taskArn': task['taskArn'],
+                'taskDefinitionArn': task['taskDefinitionArn'],
+                'lastStatus': task.get('lastStatus'),
+                'stopCode': task.get('stopCode'),
+                'stoppedReason': task.get('stoppedReason'),
+                'containers': containers
+            })
+
+        return report
+
+    def collect_service(self, service_name: str, limit: int = 10) -> List[Dict]:
+        """
+        Collect diagnostics for the stopped tasks of the primary deployment of a service
+        :param service_name: ECS service name
+        :param limit: Maximum number of tasks to report on
+        :return: Report containing one entry per task
+        """
+        services = self.__ecs_client__.describe_services(cluster_name=self.__cluster_name__, services=[service_name])
+        for service in services:
+            for deployment in service.get('deployments', []):
+                if deployment['status'] == 'PRIMARY':
+                    task_arns = self.__ecs_client__.list_stopped_task_arns(
+                        cluster_name=self.__cluster_name__,
+                        started_by=deployment['id']
+                    )
+                    return self.collect(task_arns[:limit])
+        return []
+
+    @staticmethod
+    def print_report(report: List[Dict]) -> None:
+        """
+        Display a diagnostics report
+        :param report: Report returned by collect
+        """
+        print('--------------------------------------------------------------------------------------------------')
+        print('Stopped Task Diagnostics')
+        print('--------------------------------------------------------------------------------------------------')
+        if len(report) == 0:
+            print('No stopped tasks were found')
+
+        for task in report:
+            print('Task: {task_arn}'.format(task_arn=task['taskArn']))
+            print('Status: {last_status} ({stop_code})'.format(last_status=task['lastStatus'], stop_code=task['stopCode']))
+            print('Stopped Reason: {stopped_reason}'.format(stopped_reason=task['stoppedReason']))
+            for container in task['containers']:
+                print('Container: {name} (status: {last_status}, exit code: {exit_code}, reason: {reason})'.format(
+                    name=container['name'],
+                    last_status=container['lastStatus'],
+                    exit_code=container['exitCode'],
+                    reason=container['reason']
+                ))
+                for event in container['logs']:
+                    print('{timestamp}: {message}'.format(
+                        timestamp=datetime.fromtimestamp(event['timestamp'] / 1000),
+                        message=event['message']
+                    ))
+            print('--------------------------------------------------------------------------------------------------')
+
+    def __get_task_definition__(self, task_definition_arn: str) -> Dict:
+        """
+        Retrieve a task definition, each task definition is only described once
+        :param task_definition_arn: Task definition ARN
+        :return: Task definition
+        """
+        if task_definition_arn not in self.__task_definitions__.keys():
+            self.__task_definitions__[task_definition_arn] = self.__ecs_client__.get_task_definition(task_definition_arn)
+        return self.__task_definitions__[task_definition_arn]
+
+    def __get_logs__(self, task_definition: Dict, container_name: str, task_arn: str) -> List[Dict]:
+        """
+        Retrieve the most recent log events of a container
+        :param task_definition: Task definition
+        :param container_name: Container name
+        :param task_arn: ECS task ARN
+        :return: Log events, empty if the container does not log to CloudWatch or the log stream does not exist
+        """
+        options: Optional[Dict] = None
+        for container_definition in task_definition['containerDefinitions']:
+            if container_definition['name'] == container_name and 'logConfiguration' in container_definition.keys():
+                options = container_definition['logConfiguration'].get('options')
+
+        if options is None or 'awslogs-group' not in options.keys() or 'awslogs-stream-prefix' not in options.keys():
+            return []
+
+        try:
+            return self.__cloud_watch_client__.get_last_log_events(
+                log_group_name=options['awslogs-group'],
+                log_stream_prefix=options['awslogs-stream-prefix'],
+                task_arn=task_arn,
+                limit=self.__log_lines__
+            )
+        except Exception:
+            # The log stream is never created when a task fails before its container starts
+            return []
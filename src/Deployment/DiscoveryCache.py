@@ -0,0 +1,109 @@
+import json
+import os
+import threading
+
+from typing import Dict, Optional
+
+
+class DiscoveryCache:
+    # Sections of the cache, each is revalidated differently
+    SECTIONS = ['services', 'task_definitions', 'parameters']
+
+    def __init__(self, filename: Optional[str], account_id: str, region: str, cluster_name: str):
+        """
+        Results of the AWS discovery requests of previous deployments, kept in a small JSON file (e.g. restored and
+        saved by the GitHub Actions cache between workflow runs) so they only need to be revalidated
+        :param filename: Optional cache filename, the cache is only kept in memory if not supplied
+        :param account_id: AWS account ID
+        :param region: AWS region
+        :param cluster_name: ECS cluster name
+        """
+        self.__filename__ = filename
+        self.__key__ = '{account_id}/{region}/{cluster_name}'.format(account_id=account_id, region=region, cluster_name=cluster_name)
+        self.__lock__ = threading.Lock()
+        self.__entries__: Dict[str, Dict[str, Dict]] = {}
+
+        if filename is not None and os.path.exists(filename):
+            try:
+                with open(filename, 'r') as file:
+                    self.__entries__ = json.load(file)
+            except (OSError, ValueError) as exception:
+                print('WARNING: Failed to load the discovery cache ({filename}), every resource will be discovered: {exception}'.format(
+                    filename=filename,
+                    exception=exception
+                ))
+
+    def get(self, section: str) -> Dict:
+        """
+        Return the cached values of a section for the account, region and cluster
+        :param section: The section
+        :return: Cached values, empty if nothing has been cached
+        """
+        DiscoveryCache.__assert_section__(section)
+        with self.__lock__:
+            return dict(self.__entries__.get(self.__key__, {}).get(section, {}))
+
+    def update(self, section: str, values: Dict) -> None:
+        """
+        Add or replace cached values of a section for the account, region and cluster
+        :param section: The section
+        :param values: Values indexed by resource name, values must be JSON serializable
+        """
+        DiscoveryCache.__assert_section__(section)
+        with self.__lock__:
+            self.__entries__.setdefault(self.__key__, {}).setdefault(section, {}).update(values)
+
+    def remove(self, section: str, name: str) -> None:
+        """
+        Remove a cached value that no longer exists
+        :param section: The section
+        :param name: Resource name
+        """
+        DiscoveryCache.__assert_section__(section)
+        with self.__lock__:
+            self.__entries__.get(self.__key__, {}).get(section, {}).pop(name, None)
+
+    def save(self) -> None:
+        """
+        Write the cache file, failures are only reported as the cache is an optimisation. Only the entries of this
+        account, region and cluster are replaced, so several processes (e.g. the workers of the deploy daemon) can
+        share the file
+        """
+        if self.__filename__ is None:
+            return
+
+        try:
+            directory = os.path.dirname(self.__filename__)
+            if directory != '':
+                os.makedirs(directory, exist_ok=True)
+            entries = {}
+            if os.path.exists(self.__filename__):
+                try:
+                    with open(self.__filename__, 'r') as file:
+                        entries = json.load(file)
+                except ValueError:
+                    pass
+            temporary_filename = '{filename}.{pid}.tmp'.format(filename=self.__filename__, pid=os.getpid())
+            with self.__lock__:
+                entries[self.__key__] = self.__entries__.get(self.__key__, {})
+                with open(temporary_filename, 'w') as file:
+                    json.dump(entries, file, sort_keys=True)
+                os.replace(temporary_filename, self.__filename__)
+        except OSError as exception:
+            print('WARNING: Failed to save the discovery cache ({filename}): {exception}'.format(
+                filename=self.__filename__,
+                exception=exception
+            ))
+
+    @staticmethod
+    def __assert_section__(section: str) -> None:
+        """
+        Validate a section name
+        :param section: The section
+        :raises Exception: if the section is unknown
+        """
+        if section not in DiscoveryCache.SECTIONS:
+            raise Exception('Unknown discovery cache section ({section}), must be one of: {sections}'.format(
+                section=section,
+                sections=', '.join(DiscoveryCache.SECTIONS)
+            ))
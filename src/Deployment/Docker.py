@@ -1,5 +1,7 @@
-from subprocess import Popen, PIPE
-from typing import Tuple
+import re
+
+from Deployment.CommandRunner import CommandRunner
+from typing import Dict, List, Optional, Tuple
 
 
 class Docker:
@@ -12,12 +14,90 @@ class Docker:
         :param password: Repository password
         :raises: Exception on login error
         """
-        process = Popen(['docker', 'login', '--username', username, '--password', password, repository_url], stdout=PIPE, stderr=PIPE)
-
-        stdout_login, stderr_login = process.communicate()
-        if process.returncode != 0:
+        return_code, stdout_login, stderr_login = CommandRunner.get_default().run(['docker', 'login', '--username', username, '--password', password, repository_url])
+        if return_code != 0:
             print(stderr_login.decode('utf-8').strip())
             raise Exception('Unexpected return code ({return_code}) received during Docker repository login'.format(
-                return_code=process.returncode
+                return_code=return_code
             ))
         return stdout_login.decode('utf-8').strip(), stderr_login.decode('utf-8').strip()
+
+    @staticmethod
+    def pull(image: str) -> Tuple[str, str]:
+        """
+        Pull a docker image
+        :param image: The image name including the tag
+        :returns: Tuple containing the stdout and stderr stream contents
+        :raises: Exception on error
+        """
+        return_code, stdout_pull, stderr_pull = CommandRunner.get_default().run(['docker', 'pull', image])
+        if return_code != 0:
+            print(stderr_pull.decode('utf-8').strip())
+            raise Exception('Unexpected return code ({return_code}) received during pull request'.format(
+                return_code=return_code
+            ))
+        return stdout_pull.decode('utf-8').strip(), stderr_pull.decode('utf-8').strip()
+
+    @staticmethod
+    def get_base_images(dockerfile: str, build_args: Optional[Dict[str, str]] = None) -> List[str]:
+        """
+        Return the external images a Dockerfile is built from
+        :param dockerfile: The Dockerfile filename
+        :param build_args: Build arguments used to resolve variables in FROM instructions
+        :return: List of image names, excluding build stages, scratch and images that could not be resolved
+        """
+        with open(dockerfile, 'r') as file:
+            content = file.read()
+
+        # Join continuation lines and drop comments
+        instructions = []
+        for line in content.replace('\\\n', ' ').splitlines():
+            line = line.strip()
+            if line != '' and line.startswith('#') is False:
+                instructions.append(line.split())
+
+        # Only arguments declared before the first FROM instruction can be used in FROM instructions
+        arguments = {}
+        stages = []
+        images = []
+        found_from = False
+        for instruction in instructions:
+            keyword = instruction[0].upper()
+            if keyword == 'ARG' and found_from is False:
+                for declaration in instruction[1:]:
+                    name, _, default = declaration.partition('=')
+                    arguments[name] = (build_args or {}).get(name, default.strip('"\'') if default != '' else None)
+            if keyword != 'FROM':
+                continue
+
+            found_from = True
+            words = [word for word in instruction[1:] if word.startswith('--') is False]
+            if len(words) == 0:
+                continue
+            image = Docker.__substitute__(words[0], arguments)
+            if len(words) >= 3 and words[1].upper() == 'AS':
+                stages.append(words[2].lower())
+            if image is None or image.lower() in stages or image == 'scratch' or image in images:
+                continue
+            images.append(image)
+
+        return images
+
+    @staticmethod
+    def __substitute__(value: str, arguments: Dict[str, Optional[str]]) -> Optional[str]:
+        """
+        Replace $NAME and ${NAME} variables with the build argument values
+        :param value: The value containing variables
+        :param arguments: Build argument values indexed by name, None if the argument has no value
+        :return: The resolved value, or None if a variable could not be resolved
+        """
+        def replace(match) -> str:
+            name = match.group(1) or match.group(2)
+            if arguments.get(name) is None:
+                raise KeyError(name)
+            return arguments[name]
+
+        try:
+            return re.sub(r'\$\{([A-Za-z0-9_]+)\}|\$([A-Za-z0-9_]+)', replace, value)
+        except KeyError:
+            return None
@@ -1,7 +1,7 @@
 import hashlib
 import yaml
 
-from subprocess import Popen, PIPE
+from Deployment.CommandRunner import CommandRunner
 from typing import Tuple
 
 
@@ -67,12 +67,11 @@ class DockerCompose:
         :returns: Tuple containing the stdout and stderr stream contents
         :raises: Exception on error
         """
-        process = Popen(['docker-compose', '-f', filename, 'build'], stdout=PIPE, stderr=PIPE)
-        stdout_build, stderr_build = process.communicate()
-        if process.returncode != 0:
+        return_code, stdout_build, stderr_build = CommandRunner.get_default().run(['docker-compose', '-f', filename, 'build'])
+        if return_code != 0:
             print(stderr_build.decode('utf-8').strip())
             raise Exception('Unexpected return code ({return_code}) received during build process'.format(
-                return_code=process.returncode
+                return_code=return_code
             ))
         return stdout_build.decode('utf-8').strip(), stderr_build.decode('utf-8').strip()
 
@@ -84,12 +83,11 @@ class DockerCompose:
         :returns: Tuple containing the stdout and stderr stream contents
         :raises: Exception on error
         """
-        process = Popen(['docker-compose', '-f', filename, 'push'], stdout=PIPE, stderr=PIPE)
-        stdout_push, stderr_push = process.communicate()
-        if process.returncode != 0:
+        return_code, stdout_push, stderr_push = CommandRunner.get_default().run(['docker-compose', '-f', filename, 'push'])
+        if return_code != 0:
             print(stderr_push.decode('utf-8').strip())
             raise Exception('Unexpected return code ({return_code}) received during push request'.format(
-                return_code=process.returncode
+                return_code=return_code
             ))
         return stdout_push.decode('utf-8').strip(), stderr_push.decode('utf-8').strip()
 
@@ -101,11 +99,10 @@ class DockerCompose:
         :returns: Tuple containing the stdout and stderr stream contents
         :raises: Exception on error
         """
-        process = Popen(['docker-compose', '-f', filename, 'pull'], stdout=PIPE, stderr=PIPE)
-        stdout_push, stderr_push = process.communicate()
-        if process.returncode != 0:
+        return_code, stdout_push, stderr_push = CommandRunner.get_default().run(['docker-compose', '-f', filename, 'pull'])
+        if return_code != 0:
             print(stderr_push.decode('utf-8').strip())
             raise Exception('Unexpected return code ({return_code}) received during pull request'.format(
-                return_code=process.returncode
+                return_code=return_code
             ))
         return stdout_push.decode('utf-8').strip(), stderr_push.decode('utf-8').strip()
@@ -0,0 +1,118 @@
+import json
+import os
+import threading
+
+from typing import Dict, List, Optional
+
+
+class DurationHistory:
+    # Steps recorded for each container
+    STEPS = ['build', 'push', 'rollout']
+
+    def __init__(self, filename: Optional[str] = None, max_samples: int = 10):
+        """
+        Durations of the previous deployments of each container in each environment, kept in a small JSON file (e.g.
+        restored and saved by the GitHub Actions cache between workflow runs). Environments are kept apart as their
+        builds (e.g. Dockerfiles and build arguments) and services can differ
+        :param filename: Optional history filename, the history is only kept in memory if not supplied
+        :param max_samples: Number of durations kept for each container and step
+        """
+        self.__filename__ = filename
+        self.__max_samples__ = max_samples
+        self.__lock__ = threading.Lock()
+        self.__history__: Dict[str, Dict[str, List[float]]] = {}
+        self.__recorded__: Dict[str, Dict[str, List[float]]] = {}
+
+        if filename is not None and os.path.exists(filename):
+            try:
+                with open(filename, 'r') as file:
+                    self.__history__ = json.load(file)
+            except (OSError, ValueError) as exception:
+                print('WARNING: Failed to load the duration history ({filename}), durations will not be estimated: {exception}'.format(
+                    filename=filename,
+                    exception=exception
+                ))
+
+    def get_estimate(self, environment_id: str, container_id: str, step: str) -> Optional[float]:
+        """
+        Return the expected duration of a step, the median of the recorded durations
+        :param environment_id: The environment ID
+        :param container_id: The container ID
+        :param step: The step (build, push or rollout)
+        :return: Duration in seconds, or None if the step has not been recorded
+        """
+        with self.__lock__:
+            samples = sorted(self.__history__.get(DurationHistory.__get_key__(environment_id, container_id), {}).get(step, []))
+        if len(samples) == 0:
+            return None
+
+        middle = len(samples) // 2
+        if len(samples) % 2 == 1:
+            return samples[middle]
+        return (samples[middle - 1] + samples[middle]) / 2
+
+    def record(self, environment_id: str, container_id: str, step: str, seconds: float) -> None:
+        """
+        Record the duration of a step, only the most recent durations are kept
+        :param environment_id: The environment ID
+        :param container_id: The container ID
+        :param step: The step (build, push or rollout)
+        :param seconds: Duration in seconds
+        """
+        if step not in DurationHistory.STEPS:
+            raise Exception('Unknown duration step ({step}), must be one of: {steps}'.format(step=step, steps=', '.join(DurationHistory.STEPS)))
+
+        key = DurationHistory.__get_key__(environment_id, container_id)
+        with self.__lock__:
+            samples = self.__history__.setdefault(key, {}).setdefault(step, [])
+            samples.append(round(seconds, 2))
+            del samples[:-self.__max_samples__]
+            self.__recorded__.setdefault(key, {}).setdefault(step, []).append(round(seconds, 2))
+
+    def save(self) -> None:
+        """
+        Write the history file, failures are only reported as the history is an optimisation. The durations recorded
+        since the last save are added to the durations in the file, so several processes (e.g. the workers of the
+        deploy daemon) can share the file
+        """
+        if self.__filename__ is None:
+            return
+
+        try:
+            directory = os.path.dirname(self.__filename__)
+            if directory != '':
+                os.makedirs(directory, exist_ok=True)
+            history = {}
+            if os.path.exists(self.__filename__):
+                try:
+                    with open(self.__filename__, 'r') as file:
+                        history = json.load(file)
+                except ValueError:
+                    pass
+            temporary_filename = '{filename}.{pid}.tmp'.format(filename=self.__filename__, pid=os.getpid())
+            with self.__lock__:
+                for key, steps in self.__recorded__.items():
+                    for step, recorded in steps.items():
+                        samples = history.setdefault(key, {}).setdefault(step, [])
+                        samples.extend(recorded)
+                        del samples[:-self.__max_samples__]
+                with open(temporary_filename, 'w') as file:
+                    json.dump(history, file, indent=2, sort_keys=True)
+                os.replace(temporary_filename, self.__filename__)
+                self.__history__ = history
+                self.__recorded__ = {}
+        except OSError as exception:
+            print('WARNING: Failed to save the duration history ({filename}): {exception}'.format(
+                filename=self.__filename__,
+                exception=exception
+            ))
+
+    @staticmethod
+    def __get_key__(environment_id: str, container_id: str) -> str:
+        """
+        Return the key the durations of a container are recorded under
+        :param environment_id: The environment ID
+        :param container_id: The container ID
+        :return: The environment and container ID
+        """
+        return '{environment_id}/{container_id}'.format(environment_id=environment_id, container_id=container_id)
@@ -0,0 +1,68 @@
+import json
+
+from Aws.Clients import DynamoDb
+from typing import Dict, Optional
+
+
+class DynamoDbLockBackend:
+    def __init__(self, dynamodb_client: DynamoDb.Client, table_name: str):
+        """
+        Deploy lock records stored in a DynamoDB table, every change is a conditional write so only one deployment can
+        create or take over a record
+        :param dynamodb_client: DynamoDB client
+        :param table_name: Table name, the table must have a string partition key named LockName
+        """
+        self.__dynamodb_client__ = dynamodb_client
+        self.__table_name__ = table_name
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Read a record
+        :param key: Record key
+        :return: The record, or None if it does not exist
+        """
+        item = self.__dynamodb_client__.get_item(table_name=self.__table_name__, key={'LockName': key})
+        if item is None or 'Record' not in item.keys():
+            return None
+
+        return json.loads(item['Record'])
+
+    def create(self, key: str, record: Dict) -> bool:
+        """
+        Write a record if it does not exist yet
+        :param key: Record key
+        :param record: The record
+        :return: Boolean flag, false if the record already existed
+        """
+        return self.__dynamodb_client__.put_item(
+            table_name=self.__table_name__,
+            item={'LockName': key, 'Record': json.dumps(record, sort_keys=True)},
+            expected={'LockName': None}
+        )
+
+    def replace(self, key: str, record: Dict, expected: Dict) -> bool:
+        """
+        Replace a record if it has not changed since it was read
+        :param key: Record key
+        :param record: The new record
+        :param expected: The record that was read
+        :return: Boolean flag, false if the record had changed
+        """
+        return self.__dynamodb_client__.put_item(
+            table_name=self.__table_name__,
+            item={'LockName': key, 'Record': json.dumps(record, sort_keys=True)},
+            expected={'Record': json.dumps(expected, sort_keys=True)}
+        )
+
+    def delete(self, key: str, expected: Dict) -> bool:
+        """
+        Delete a record if it has not changed since it was read
+        :param key: Record key
+        :param expected: The record that was read
+        :return: Boolean flag, false if the record had changed
+        """
+        return self.__dynamodb_client__.delete_item(
+            table_name=self.__table_name__,
+            key={'LockName': key},
+            expected={'Record': json.dumps(expected, sort_keys=True)}
+        )
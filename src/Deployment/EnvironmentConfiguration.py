@@ -0,0 +1,80 @@
+import os
+
+from dataclasses import dataclass
+from Deployment.ContainerConfiguration import ContainerConfiguration
+from typing import Dict, List
+
+
+@dataclass(frozen=True)
+class EnvironmentConfiguration:
+    """
+    Resolved configuration of the environment being deployed
+    """
+    __slots__ = (
+        'environment_id',
+        'aws_account_id',
+        'aws_deployment_region',
+        'aws_deployment_cluster_name',
+        'repository_root',
+        'repository_url',
+        'secret_prefix',
+        'image_tag',
+        'containers'
+    )
+
+    # Environment ID used in the deploy.yml file
+    environment_id: str
+    # AWS account ID
+    aws_account_id: str
+    # AWS deployment region
+    aws_deployment_region: str
+    # ECS cluster name
+    aws_deployment_cluster_name: str
+    # GitHub repository root folder
+    repository_root: str
+    # ECR repository URL
+    repository_url: str
+    # SSM parameter ARN prefix
+    secret_prefix: str
+    # Image tag being deployed
+    image_tag: str
+    # Containers indexed by container ID, in the order they appear in the deploy.yml file
+    containers: Dict[str, ContainerConfiguration]
+
+    def get_container_names(self) -> List[str]:
+        """
+        Return list of all container IDs for this environment
+        :return: List of container IDs
+        """
+        return list(self.containers.keys())
+
+    def get_container(self, container_id: str) -> ContainerConfiguration:
+        """
+        Return the configuration of a container
+        :param container_id: The container ID
+        :return: Container configuration
+        """
+        if container_id not in self.containers.keys():
+            raise Exception("Unknown container ({container_id}) requested".format(container_id=container_id))
+
+        return self.containers[container_id]
+
+    def validate(self, container_ids: List[str]) -> None:
+        """
+        Validate the Dockerfile and entrypoint of the containers being deployed exist
+        :param container_ids: The container IDs being deployed
+        :raises Exception: if a Dockerfile could not be found
+        """
+        for container_id in container_ids:
+            container = self.get_container(container_id)
+            if os.path.exists(container.dockerfile) is False:
+                raise Exception('Could not locate specified container file ({container_filename}) in {environment} environment'.format(
+                    container_filename=container.dockerfile,
+                    environment=self.environment_id
+                ))
+
+            # Validate the expected entrypoint for the container exists
+            if os.path.exists(container.entrypoint) is False:
+                print('WARNING: Failed to locate required Docker entrypoint script ({entrypoint_filename})'.format(
+                    entrypoint_filename=container.entrypoint
+                ))
@@ -0,0 +1,112 @@
+import contextlib
+import fcntl
+import json
+import os
+
+from typing import Dict, Iterator, Optional
+
+
+class FileLockBackend:
+    def __init__(self, directory: str):
+        """
+        Deploy lock records stored as JSON files in a local directory, for deployments on a single host (e.g. a
+        self-hosted runner) and for testing the deploy lock without AWS
+        :param directory: Directory the records are stored in, created if it does not exist
+        """
+        self.__directory__ = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Read a record
+        :param key: Record key
+        :return: The record, or None if it does not exist
+        """
+        with self.__locked__():
+            return self.__read__(key)
+
+    def create(self, key: str, record: Dict) -> bool:
+        """
+        Write a record if it does not exist yet
+        :param key: Record key
+        :param record: The record
+        :return: Boolean flag, false if the record already existed
+        """
+        with self.__locked__():
+            if self.__read__(key) is not None:
+                return False
+            self.__write__(key, record)
+
+        return True
+
+    def replace(self, key: str, record: Dict, expected: Dict) -> bool:
+        """
+        Replace a record if it has not changed since it was read
+        :param key: Record key
+        :param record: The new record
+        :param expected: The record that was read
+        :return: Boolean flag, false if the record had changed
+        """
+        with self.__locked__():
+            if self.__read__(key) != expected:
+                return False
+            self.__write__(key, record)
+
+        return True
+
+    def delete(self, key: str, expected: Dict) -> bool:
+        """
+        Delete a record if it has not changed since it was read
+        :param key: Record key
+        :param expected: The record that was read
+        :return: Boolean flag, false if the record had changed
+        """
+        with self.__locked__():
+            if self.__read__(key) != expected:
+                return False
+            os.remove(self.__get_filename__(key))
+
+        return True
+
+    @contextlib.contextmanager
+    def __locked__(self) -> Iterator[None]:
+        """
+        Hold an exclusive lock on the directory, shared with every other process using it
+        """
+        with open(os.path.join(self.__directory__, '.lock'), 'a') as file:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(file.fileno(), fcntl.LOCK_UN)
+
+    def __read__(self, key: str) -> Optional[Dict]:
+        """
+        Read a record, the directory must be locked
+        :param key: Record key
+        :return: The record, or None if it does not exist
+        """
+        try:
+            with open(self.__get_filename__(key), 'r') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+
+    def __write__(self, key: str, record: Dict) -> None:
+        """
+        Write a record, the directory must be locked
+        :param key: Record key
+        :param record: The record
+        """
+        filename = self.__get_filename__(key)
+        with open(filename + '.tmp', 'w') as file:
+            json.dump(record, file, sort_keys=True)
+        os.replace(filename + '.tmp', filename)
+
+    def __get_filename__(self, key: str) -> str:
+        """
+        Return the filename of a record
+        :param key: Record key, may contain slashes
+        :return: The filename
+        """
+        return os.path.join(self.__directory__, '{key}.json'.format(key=key.replace('/', '__')))
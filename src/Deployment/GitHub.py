@@ -1,6 +1,9 @@
 import os
 import pathlib
 
+from Deployment.CommandRunner import CommandRunner
+from typing import List, Optional
+
 
 class GitHub:
     @staticmethod
@@ -19,6 +22,36 @@ class GitHub:
         while found is False:
             if os.path.exists('{path}/.git'.format(path=path)) is True:
                 return str(path)
-            if path == '/':
+            if path == path.parent:
                 raise Exception('No GitHub repository found')
             path = path.parent
+
+    @staticmethod
+    def get_changed_files(base_sha: str, head_sha: str, repository_root: str) -> Optional[List[str]]:
+        """
+        List the files changed between two commits, fetching the base commit if it is missing from a shallow clone
+        :param base_sha: The commit to compare from
+        :param head_sha: The commit to compare to
+        :param repository_root: The repository root folder
+        :return: List of changed filenames relative to the repository root, or None if the commits could not be compared
+        """
+        # The workspace is usually owned by a different user than the action container
+        git = ['git', '-c', 'safe.directory=*', '-C', repository_root]
+        for sha in [base_sha, head_sha]:
+            return_code, _, _ = CommandRunner.get_default().run(git + ['cat-file', '-e', '{sha}^{{commit}}'.format(sha=sha)])
+            if return_code != 0:
+                return_code, _, stderr = CommandRunner.get_default().run(git + ['fetch', '--quiet', '--no-tags', '--depth=1', 'origin', sha])
+                if return_code != 0:
+                    print('WARNING: Could not fetch commit {sha}: {error}'.format(sha=sha, error=stderr.decode('utf-8').strip()))
+                    return None
+
+        return_code, stdout, stderr = CommandRunner.get_default().run(git + ['diff', '--name-only', '--no-renames', base_sha, head_sha])
+        if return_code != 0:
+            print('WARNING: Could not compare {base_sha} to {head_sha}: {error}'.format(
+                base_sha=base_sha,
+                head_sha=head_sha,
+                error=stderr.decode('utf-8').strip()
+            ))
+            return None
+
+        return [filename for filename in stdout.decode('utf-8').splitlines() if filename != '']
@@ -0,0 +1,75 @@
+import threading
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from Deployment.Docker import Docker
+from typing import Callable, Dict, List, Optional
+
+
+class ImagePrefetcher:
+    def __init__(self, max_workers: int = 4):
+        """
+        Pull base images in the background so builds do not have to pull them
+        :param max_workers: Maximum number of concurrent pulls
+        """
+        self.__executor__ = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='ImagePrefetcher')
+        self.__lock__ = threading.Lock()
+        self.__login__: Optional[Future] = None
+        self.__pulls__: Dict[str, Future] = {}
+
+    def login(self, login: Callable[[], None]) -> None:
+        """
+        Login to a registry before any image is pulled
+        :param login: Function logging in to the registry
+        """
+        with self.__lock__:
+            self.__login__ = self.__executor__.submit(login)
+
+    def prefetch(self, images: List[str]) -> None:
+        """
+        Start pulling images that are not already being pulled
+        :param images: Image names including the tag
+        """
+        with self.__lock__:
+            for image in images:
+                if image not in self.__pulls__.keys():
+                    self.__pulls__[image] = self.__executor__.submit(self.__pull__, image, self.__login__)
+
+    def wait(self, images: List[str]) -> None:
+        """
+        Wait for the registry login and the pulls of the requested images to finish, failed pulls are left to the
+        build. The login is always waited on as the build may use other images from the registry (e.g. a FROM
+        image that could not be resolved)
+        :param images: Image names including the tag
+        :raises Exception: if the registry login failed
+        """
+        with self.__lock__:
+            login = self.__login__
+            pulls = [self.__pulls__[image] for image in images if image in self.__pulls__.keys()]
+        if login is not None:
+            try:
+                login.result()
+            except Exception as exception:
+                raise Exception('Docker base image repository login failed: {exception}'.format(exception=exception))
+        for pull in pulls:
+            pull.result()
+
+    def shutdown(self) -> None:
+        """
+        Stop pulling images that have not started yet
+        """
+        self.__executor__.shutdown(wait=False)
+
+    @staticmethod
+    def __pull__(image: str, login: Optional[Future]) -> None:
+        """
+        Pull an image once the registry login has finished
+        :param image: Image name including the tag
+        :param login: The registry login
+        """
+        try:
+            if login is not None:
+                login.result()
+            Docker.pull(image)
+            print('Prefetched: {image}'.format(image=image))
+        except Exception as exception:
+            print('WARNING: Failed to prefetch {image} ({exception}), it will be pulled by the build'.format(image=image, exception=exception))
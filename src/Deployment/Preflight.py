@@ -0,0 +1,403 @@
+import threading
+import time
+
+from Aws.Client import Client as BaseClient
+from Aws.Clients import Ecr, Ecs, Ssm
+from Aws.Session import Session
+from Aws.TaskDefinitionBuilder import TaskDefinitionBuilder
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from Deployment.DiscoveryCache import DiscoveryCache
+from Deployment.EnvironmentConfiguration import EnvironmentConfiguration
+from typing import Callable, Dict, List, Optional, Set
+
+
+class Preflight:
+    def __init__(
+            self,
+            environment: EnvironmentConfiguration,
+            container_ids: List[str],
+            session: Optional[Session] = None,
+            max_workers: int = 10,
+            cache: Optional[DiscoveryCache] = None,
+            max_parameter_age: float = 600
+    ):
+        """
+        Load and validate everything the ECS phase needs from AWS, so a misconfigured deployment fails before
+        (or while) the images are built
+        :param environment: Configuration of the environment being deployed
+        :param container_ids: The container IDs being deployed
+        :param session: Optional AWS session, a default session is created if not supplied
+        :param max_workers: Maximum number of concurrent AWS requests
+        :param cache: Optional discovery cache, cached resources are revalidated instead of listing every resource
+        :param max_parameter_age: Number of seconds a cached SSM path listing is used for, parameters added to a path
+                                  are only found when the path is listed
+        """
+        self.__environment__ = environment
+        self.__container_ids__ = container_ids
+        self.__session__ = session
+        self.__max_workers__ = max_workers
+        self.__max_parameter_age__ = max_parameter_age
+        self.__cache__ = cache if cache is not None else DiscoveryCache(
+            filename=None,
+            account_id=environment.aws_account_id,
+            region=environment.aws_deployment_region,
+            cluster_name=environment.aws_deployment_cluster_name
+        )
+        self.__thread__ = None
+        self.__exception__ = None
+        self.__messages__: List[str] = []
+        # SSM parameters that were just listed, they do not need to be checked again
+        self.__listed_parameters__: Set[str] = set()
+
+        # Latest active task definition ARN indexed by service name
+        self.task_definition_arns: Dict[str, str] = {}
+        # ECS services in the cluster indexed by service name
+        self.services: Dict[str, Dict] = {}
+        # Latest active task definition of each deployed service indexed by service name
+        self.task_definitions: Dict[str, Dict] = {}
+        # Secret ARNs indexed by the secret name for each deployed container, indexed by container ID
+        self.secrets: Dict[str, Dict[str, str]] = {}
+
+    def start(self, on_failure: Optional[Callable[[Exception], None]] = None) -> None:
+        """
+        Start the preflight checks in a background thread
+        :param on_failure: Optional function called as soon as a check fails (e.g. to stop the build)
+        """
+        def run() -> None:
+            try:
+                self.__run__()
+            except Exception as exception:
+                self.__exception__ = exception
+                if on_failure is not None:
+                    on_failure(exception)
+
+        self.__thread__ = threading.Thread(target=run, name='Preflight', daemon=True)
+        self.__thread__.start()
+
+    def join(self) -> 'Preflight':
+        """
+        Wait for the preflight checks to finish and print their output
+        :return: The completed preflight
+        :raises Exception: if a check failed
+        """
+        if self.__thread__ is None:
+            self.start()
+        self.__thread__.join()
+
+        print('--------------------------------------------------------------------------------------------------')
+        print('Preflight Checks')
+        print('--------------------------------------------------------------------------------------------------')
+        for message in self.__messages__:
+            print(message)
+
+        if self.__exception__ is not None:
+            raise self.__exception__
+
+        return self
+
+    def get_exception(self) -> Optional[Exception]:
+        """
+        Return the exception raised by the preflight checks
+        :return: Exception or None if the checks have not failed
+        """
+        return self.__exception__
+
+    def __run__(self) -> None:
+        """
+        Load services, task definitions and secrets, and check the ECR repositories exist
+        """
+        ecs_client = Ecs.Client(session=self.__session__)
+        cluster_name = self.__environment__.aws_deployment_cluster_name
+        service_names = [self.__environment__.get_container(container_id).service_name for container_id in self.__container_ids__]
+        cached_services = self.__cache__.get('services')
+        cached_task_definitions = self.__cache__.get('task_definitions')
+
+        with ThreadPoolExecutor(max_workers=self.__max_workers__) as executor:
+            # Listing every task definition revision is the slowest request, start it first. It is only needed when
+            # a deployed service has not been cached, otherwise only the latest revision of each family is listed
+            task_definition_arns = None
+            if any(service_name not in cached_task_definitions.keys() for service_name in service_names):
+                task_definition_arns = executor.submit(ecs_client.list_task_definitions_by_service_name)
+            if any(service_name not in cached_services.keys() for service_name in service_names):
+                services = executor.submit(ecs_client.get_services_by_name, cluster=cluster_name)
+            else:
+                services = executor.submit(self.__revalidate_services__, ecs_client, service_names, cached_services)
+            repository_names = executor.submit(Ecr.Client(session=self.__session__).list_repository_names)
+            secrets = executor.submit(self.__load_secrets__, executor)
+
+            # Validate the all required ECS services were found
+            self.services = services.result() or {}
+            for service_name in service_names:
+                if service_name not in self.services.keys():
+                    raise Exception('Could not locate required ECS service ({ecs_service_name})'.format(ecs_service_name=service_name))
+            self.__cache__.update('services', {
+                service_name: {
+                    'serviceArn': service['serviceArn'],
+                    'updatedAt': Preflight.__get_updated_at__(service)
+                }
+                for service_name, service in self.services.items()
+            })
+
+            # Validate the image repository of each container exists before anything is pushed to it
+            missing = sorted(set(self.__environment__.get_container(container_id).image for container_id in self.__container_ids__) - set(repository_names.result()))
+            if len(missing) > 0:
+                raise Exception('Could not locate required ECR repositories ({repositories})'.format(repositories=', '.join(missing)))
+
+            # Retrieve the latest task definition for each service
+            loading = {}
+            if task_definition_arns is not None:
+                self.task_definition_arns = task_definition_arns.result()
+                for service_name, task_definition_arn in self.task_definition_arns.items():
+                    self.__messages__.append(f'{service_name}: {task_definition_arn}')
+                self.__cache__.update('task_definitions', {
+                    service_name: {'revision': Preflight.__get_revision__(task_definition_arn)}
+                    for service_name, task_definition_arn in self.task_definition_arns.items()
+                })
+
+                for service_name in service_names:
+                    # If there is no active task definition, raise an exception
+                    if service_name not in self.task_definition_arns.keys():
+                        raise Exception('No active task definition found for service ({ecs_service_name}). Please contact the DevOps team to resolve this issue.'.format(ecs_service_name=service_name))
+                    self.__messages__.append('Loading existing task definition: {task_definition_arn}'.format(task_definition_arn=self.task_definition_arns[service_name]))
+                    loading[service_name] = executor.submit(ecs_client.get_task_definition, self.task_definition_arns[service_name])
+            else:
+                for service_name in service_names:
+                    loading[service_name] = executor.submit(self.__load_latest_task_definition__, ecs_client, service_name, cached_task_definitions[service_name])
+
+            self.task_definitions = {service_name: future.result() for service_name, future in loading.items()}
+            for service_name, task_definition in self.task_definitions.items():
+                self.task_definition_arns[service_name] = task_definition['taskDefinitionArn']
+                revision = Preflight.__get_revision__(task_definition['taskDefinitionArn'])
+                if task_definition_arns is None and cached_task_definitions[service_name]['revision'] != revision:
+                    self.__messages__.append('{service_name}: {task_definition_arn} (revision {cached} when cached)'.format(
+                        service_name=service_name,
+                        task_definition_arn=task_definition['taskDefinitionArn'],
+                        cached=cached_task_definitions[service_name]['revision']
+                    ))
+                self.cache_task_definition(service_name, task_definition)
+            self.secrets = secrets.result()
+
+            for container_id in self.__container_ids__:
+                self.__messages__.append('Secrets ({service_name}): {count}'.format(
+                    service_name=self.__environment__.get_container(container_id).service_name,
+                    count=len(self.secrets[container_id])
+                ))
+
+            self.__validate_secrets__(executor)
+
+    def cache_task_definition(self, service_name: str, task_definition: Dict) -> None:
+        """
+        Cache the latest revision of a task definition family, e.g. once a deployment registered a new revision
+        :param service_name: ECS service name (the task definition family)
+        :param task_definition: Task definition, including its tags
+        """
+        cached_task_definition = TaskDefinitionBuilder(task_definition).build()
+        cached_task_definition['taskDefinitionArn'] = task_definition['taskDefinitionArn']
+        cached_task_definition['status'] = task_definition.get('status', 'ACTIVE')
+        cached_task_definition['tags'] = deepcopy(task_definition.get('tags', []))
+        self.__cache__.update('task_definitions', {service_name: {
+            'revision': Preflight.__get_revision__(task_definition['taskDefinitionArn']),
+            'taskDefinition': cached_task_definition
+        }})
+
+    def __validate_secrets__(self, executor: ThreadPoolExecutor) -> None:
+        """
+        Check every SSM parameter the new task definitions will reference exists, so a missing parameter (e.g. a secret
+        kept from the existing task definition that has since been deleted) fails the deployment before any task fails
+        to start
+        :param executor: Executor used to check the parameters concurrently
+        :raises Exception: if a parameter does not exist
+        """
+        ssm_client = Ssm.Client(session=self.__session__)
+
+        # Secrets are merged into the existing container definition the same way the ECS client does when updating
+        parameters = {}
+        for container_id in self.__container_ids__:
+            service_name = self.__environment__.get_container(container_id).service_name
+            builder = TaskDefinitionBuilder(self.task_definitions[service_name])
+            builder.merge_secrets(service_name, self.secrets[container_id])
+            for secret in builder.get_container_definition(service_name).get('secrets', []):
+                name = self.__get_parameter_name__(secret['valueFrom'])
+                if name is not None and name not in self.__listed_parameters__:
+                    parameters.setdefault(name, []).append('{service_name}:{secret_name}'.format(service_name=service_name, secret_name=secret['name']))
+
+        # Each request checks up to 10 parameters (maximum supported by the get parameters method)
+        futures = [executor.submit(ssm_client.get_invalid_parameters, names) for names in BaseClient.__chunk_list__(source=list(parameters.keys()), size=10)]
+        invalid = [name for future in futures for name in future.result()]
+        self.__messages__.append('Validated SSM parameters: {count} (plus {listed} listed parameters)'.format(
+            count=len(parameters),
+            listed=len(self.__listed_parameters__)
+        ))
+
+        if len(invalid) > 0:
+            raise Exception('Could not locate SSM parameters used as secrets, tasks would fail to start: {parameters}'.format(
+                parameters='; '.join('{name} ({secrets})'.format(name=name, secrets=', '.join(parameters[name])) for name in invalid)
+            ))
+
+    def __get_parameter_name__(self, value_from: str) -> Optional[str]:
+        """
+        Convert a secret reference to the name used to request the SSM parameter
+        :param value_from: The secret valueFrom
+        :return: Parameter name (or ARN when shared from another account or region), None if not an SSM parameter
+        """
+        if value_from.startswith('arn:') is False:
+            return value_from if value_from.startswith('/') else '/' + value_from
+        if ':ssm:' not in value_from:
+            return None
+
+        # Parameters in the deployment account and region are requested by name
+        if value_from.startswith(self.__environment__.secret_prefix):
+            return '/' + value_from[len(self.__environment__.secret_prefix):]
+        return value_from
+
+    def __load_secrets__(self, executor: ThreadPoolExecutor) -> Dict[str, Dict[str, str]]:
+        """
+        Load the secrets of each container, each SSM path is only read once
+        :param executor: Executor used to read the SSM paths concurrently
+        :return: Dictionary of secret ARNs indexed by secret name, indexed by container ID
+        """
+        ssm_client = Ssm.Client(session=self.__session__)
+        secret_prefix = self.__environment__.secret_prefix
+
+        # Resolve the paths of each container, None means all "/Env/" parameters
+        container_paths = {}
+        for container_id in self.__container_ids__:
+            container = self.__environment__.get_container(container_id)
+            if container.secret_paths is None:
+                container_paths[container_id] = None
+            else:
+                container_paths[container_id] = [
+                    secret_path.format(environment=self.__environment__.environment_id, service=container.service_name)
+                    for secret_path in container.secret_paths
+                ]
+
+        paths = []
+        for container_id, secret_paths in container_paths.items():
+            for path in secret_paths if secret_paths is not None else ['/']:
+                if path not in paths:
+                    paths.append(path)
+
+        # Only the "/Env/" parameters are used from the root path, unless a container lists the root path itself
+        listed_root = any(secret_paths is not None and '/' in secret_paths for secret_paths in container_paths.values())
+        futures = {
+            path: executor.submit(self.__load_parameters__, ssm_client, path, '/Env/' if path == '/' and listed_root is False else None)
+            for path in paths
+        }
+        parameters_by_path = {path: future.result() for path, future in futures.items()}
+        for path_parameters in parameters_by_path.values():
+            self.__listed_parameters__.update(path_parameters)
+
+        secrets = {}
+        for container_id, secret_paths in container_paths.items():
+            if secret_paths is None:
+                parameters = [parameter for parameter in parameters_by_path['/'] if '/Env/' in parameter]
+                secrets[container_id] = Ecs.Client.index_secrets([secret_prefix + parameter.strip('/') for parameter in parameters])
+                continue
+
+            # Later paths take precedence, so a service can override a value defined for the environment
+            secrets[container_id] = {}
+            for path in secret_paths:
+                for parameter in parameters_by_path[path]:
+                    secrets[container_id][parameter.split('/')[-1]] = secret_prefix + parameter.strip('/')
+
+        return secrets
+
+    def __load_parameters__(self, ssm_client: Ssm.Client, path: str, pattern: Optional[str] = None) -> List[str]:
+        """
+        Load the parameter names in a path. A cached listing is revalidated by getting the versions of the cached
+        parameters, and the path is only listed again when a parameter was deleted or changed, or the listing is older
+        than the maximum age (parameters added to the path can only be found by listing it)
+        :param ssm_client: SSM client
+        :param path: SSM path
+        :param pattern: Optional text the parameter names must contain, other parameters are neither returned nor cached
+        :return: List of parameter names
+        """
+        cached = self.__cache__.get('parameters').get(path)
+        if isinstance(cached, dict) and 'versions' in cached.keys() and cached.get('pattern') == pattern and time.time() - cached.get('listed', 0) < self.__max_parameter_age__:
+            try:
+                versions = ssm_client.get_parameter_versions(list(cached['versions'].keys()))
+                if versions == cached['versions']:
+                    return list(versions.keys())
+                self.__messages__.append('SSM parameters changed since they were cached: {path} ({names})'.format(
+                    path=path,
+                    names=', '.join(sorted(name for name, version in cached['versions'].items() if versions.get(name) != version))
+                ))
+            except Exception as exception:
+                self.__messages__.append('WARNING: Failed to revalidate the cached SSM parameters ({path}): {exception}'.format(path=path, exception=exception))
+
+        versions = {
+            name: version
+            for name, version in ssm_client.get_parameter_versions_by_path(path=path, recursive=True).items()
+            if pattern is None or pattern in name
+        }
+        self.__cache__.update('parameters', {path: {'listed': round(time.time(), 3), 'pattern': pattern, 'versions': versions}})
+        return list(versions.keys())
+
+    def __load_latest_task_definition__(self, ecs_client: Ecs.Client, family: str, cached: Dict) -> Dict:
+        """
+        Load the latest active revision of a cached task definition family, the cached task definition is used while it
+        is still the latest revision (e.g. no revision was registered outside the deployments since)
+        :param ecs_client: ECS client
+        :param family: Task definition family
+        :param cached: Cached task definition entry of the family
+        :return: Task definition
+        :raises Exception: if the family has no active revision
+        """
+        task_definition_arn = ecs_client.get_latest_task_definition_arn(family)
+        if task_definition_arn is None:
+            raise Exception('No active task definition found for service ({ecs_service_name}). Please contact the DevOps team to resolve this issue.'.format(ecs_service_name=family))
+
+        cached_task_definition = cached.get('taskDefinition')
+        if cached_task_definition is not None and cached_task_definition['taskDefinitionArn'] == task_definition_arn:
+            self.__messages__.append('Using cached task definition: {task_definition_arn}'.format(task_definition_arn=task_definition_arn))
+            return deepcopy(cached_task_definition)
+
+        self.__messages__.append('Loading latest task definition: {task_definition_arn}'.format(task_definition_arn=task_definition_arn))
+        return ecs_client.get_task_definition(task_definition_arn)
+
+    def __revalidate_services__(self, ecs_client: Ecs.Client, service_names: List[str], cached: Dict[str, Dict]) -> Dict[str, Dict]:
+        """
+        Describe the cached services being deployed instead of listing every service in the cluster
+        :param ecs_client: ECS client
+        :param service_names: ECS service names being deployed
+        :param cached: Cached services indexed by service name
+        :return: Dictionary of ECS services indexed by service name
+        """
+        cluster_name = self.__environment__.aws_deployment_cluster_name
+        services = {
+            service['serviceName']: service
+            for service in ecs_client.describe_services(cluster_name=cluster_name, services=service_names)
+            if service['status'] == 'ACTIVE'
+        }
+
+        # A deleted or recreated service means the cache is out of date, discover every service again
+        if any(service_name not in services.keys() or services[service_name]['serviceArn'] != cached[service_name]['serviceArn'] for service_name in service_names):
+            self.__messages__.append('Cached ECS services are out of date, listing the services in the cluster')
+            for service_name in service_names:
+                self.__cache__.remove('services', service_name)
+            return ecs_client.get_services_by_name(cluster=cluster_name)
+
+        for service_name in service_names:
+            if Preflight.__get_updated_at__(services[service_name]) != cached[service_name]['updatedAt']:
+                self.__messages__.append('{service_name}: Service deployments changed since they were cached'.format(service_name=service_name))
+
+        return services
+
+    @staticmethod
+    def __get_updated_at__(service: Dict) -> List[str]:
+        """
+        Return the time each deployment of a service was last updated
+        :param service: ECS service
+        :return: List of timestamps
+        """
+        return [str(deployment.get('updatedAt')) for deployment in service.get('deployments', [])]
+
+    @staticmethod
+    def __get_revision__(task_definition_arn: str) -> int:
+        """
+        Return the revision number of a task definition
+        :param task_definition_arn: Task definition ARN
+        :return: Revision number
+        """
+        return int(task_definition_arn.split(':')[-1])
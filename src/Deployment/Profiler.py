@@ -0,0 +1,196 @@
+import linecache
+import os
+import sys
+import threading
+import time
+
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class Profiler:
+    # Categories used to separate time spent waiting from CPU time
+    CATEGORY_CPU = 'cpu'
+    CATEGORY_AWS = 'aws'
+    CATEGORY_SUBPROCESS = 'subprocess'
+    CATEGORY_WAIT = 'wait'
+
+    def __init__(self, interval: float = 0.005):
+        """
+        Sampling profiler recording the stack of every thread at a fixed interval
+        :param interval: Number of seconds between samples
+        """
+        self.__interval__ = interval
+        self.__samples__ = Counter()
+        self.__stopped__ = threading.Event()
+        self.__thread__ = None
+        self.__started__ = None
+        self.__duration__ = 0.0
+
+    def start(self) -> None:
+        """
+        Start sampling in a background thread
+        """
+        self.__started__ = time.perf_counter()
+        self.__stopped__.clear()
+        self.__thread__ = threading.Thread(target=self.__sample__, name='Profiler', daemon=True)
+        self.__thread__.start()
+
+    def stop(self) -> None:
+        """
+        Stop sampling
+        """
+        self.__stopped__.set()
+        if self.__thread__ is not None:
+            self.__thread__.join()
+        self.__duration__ = time.perf_counter() - self.__started__
+
+    def write(self, path: str, top: int = 25) -> None:
+        """
+        Write the collapsed stacks (readable by speedscope and flamegraph.pl) and the hotspot table
+        :param path: Folder to write the files to
+        :param top: Number of functions in the hotspot table
+        """
+        os.makedirs(path, exist_ok=True)
+
+        with open(os.path.join(path, 'profile.folded'), 'w') as file:
+            for stack, count in sorted(self.__samples__.items()):
+                file.write('{stack} {count}\n'.format(stack=';'.join(stack), count=count))
+
+        summary = self.get_summary(top=top)
+        with open(os.path.join(path, 'profile.txt'), 'w') as file:
+            file.write(summary)
+        print(summary)
+
+    def get_summary(self, top: int = 25) -> str:
+        """
+        Return the time spent in each category and the functions with the most samples
+        :param top: Number of functions to include
+        :return: Hotspot table
+        """
+        total = sum(self.__samples__.values())
+        categories = Counter()
+        own = Counter()
+        inclusive = Counter()
+        for stack, count in self.__samples__.items():
+            categories[stack[0]] += count
+            own[(stack[0], stack[-1])] += count
+            for frame in set(stack[2:]):
+                inclusive[frame] += count
+
+        lines = [
+            '--------------------------------------------------------------------------------------------------',
+            'Profile ({duration:.1f}s, {total} samples across all threads)'.format(duration=self.__duration__, total=total),
+            '--------------------------------------------------------------------------------------------------'
+        ]
+        for category, count in categories.most_common():
+            lines.append('{category:>12}: {seconds:8.2f}s ({percent:5.1f}%)'.format(
+                category=category,
+                seconds=count * self.__interval__,
+                percent=100.0 * count / total
+            ))
+
+        lines.append('')
+        lines.append('{own:>8} {inclusive:>8} {category:>10}  function'.format(own='own', inclusive='total', category='category'))
+        for (category, frame), count in own.most_common(top):
+            lines.append('{own:8.2f} {inclusive:8.2f} {category:>10}  {frame}'.format(
+                own=count * self.__interval__,
+                inclusive=inclusive[frame] * self.__interval__,
+                category=category,
+                frame=frame
+            ))
+
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def run(function: Callable[[], None], path: str, interval: float = 0.005) -> None:
+        """
+        Profile a function, the profile is written even if the function fails or exits
+        :param function: The function to profile
+        :param path: Folder to write the profile to
+        :param interval: Number of seconds between samples
+        """
+        profiler = Profiler(interval=interval)
+        profiler.start()
+        try:
+            function()
+        finally:
+            profiler.stop()
+            profiler.write(path)
+
+    def __sample__(self) -> None:
+        """
+        Record the stack of every thread until stopped
+        """
+        own_thread_id = threading.get_ident()
+        cpu_times = {}
+        while self.__stopped__.wait(self.__interval__) is False:
+            thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_thread_id:
+                    continue
+                stack, files = Profiler.__get_stack__(frame)
+                category = Profiler.__get_category__(files, frame, self.__is_busy__(thread_id, cpu_times))
+                self.__samples__[(category, thread_names.get(thread_id, str(thread_id))) + stack] += 1
+
+    def __is_busy__(self, thread_id: int, cpu_times: Dict[int, float]) -> Optional[bool]:
+        """
+        Check whether a thread used the CPU for most of the last interval
+        :param thread_id: Thread identifier
+        :param cpu_times: CPU time of each thread at the previous sample, updated in place
+        :return: Boolean flag, or None if per-thread CPU clocks are not available on this platform
+        """
+        try:
+            cpu_time = time.clock_gettime(time.pthread_getcpuclockid(thread_id))
+        except (AttributeError, OSError):
+            return None
+
+        previous = cpu_times.get(thread_id, cpu_time)
+        cpu_times[thread_id] = cpu_time
+        return cpu_time - previous >= self.__interval__ / 2
+
+    @staticmethod
+    def __get_stack__(frame) -> Tuple[Tuple[str, ...], List[str]]:
+        """
+        Convert a frame into a stack of function labels ordered from the root
+        :param frame: The innermost frame of a thread
+        :return: Tuple of the stack and the filename of each frame
+        """
+        frames: List[str] = []
+        files: List[str] = []
+        while frame is not None:
+            code = frame.f_code
+            frames.append('{function} ({filename}:{line})'.format(
+                function=code.co_name,
+                filename=os.path.basename(code.co_filename),
+                line=code.co_firstlineno
+            ))
+            files.append(code.co_filename)
+            frame = frame.f_back
+        frames.reverse()
+
+        return tuple(frames), files
+
+    @staticmethod
+    def __get_category__(files: List[str], leaf, busy: Optional[bool]) -> str:
+        """
+        Decide whether a sample was CPU time or time spent waiting on a subprocess, AWS or another thread
+        :param files: Filenames of the frames in the stack
+        :param leaf: The innermost frame
+        :param busy: Whether the thread used the CPU since the last sample, None if unknown
+        :return: Category
+        """
+        if busy is True:
+            return Profiler.CATEGORY_CPU
+        if any(filename.endswith('subprocess.py') for filename in files):
+            return Profiler.CATEGORY_SUBPROCESS
+        if any(os.sep + 'botocore' + os.sep in filename or os.sep + 'urllib3' + os.sep in filename for filename in files):
+            return Profiler.CATEGORY_AWS
+        if busy is False:
+            return Profiler.CATEGORY_WAIT
+
+        # Without per-thread CPU clocks, fall back to recognising sleeps and threads blocked on a lock
+        source = linecache.getline(leaf.f_code.co_filename, leaf.f_lineno)
+        if leaf.f_code.co_filename.endswith('threading.py') or 'sleep(' in source or '.wait(' in source:
+            return Profiler.CATEGORY_WAIT
+        return Profiler.CATEGORY_CPU
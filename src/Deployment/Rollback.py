@@ -0,0 +1,192 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from Aws.Clients import Ecs
+from Aws.Client import Client as BaseClient
+
+
+class Rollback:
+    def __init__(self, ecs_client: Ecs.Client, cluster_name: str, max_workers: int = 10):
+        """
+        Track the changes made during a deployment so they can be reverted
+        :param ecs_client: ECS client
+        :param cluster_name: ECS cluster name
+        :param max_workers: Maximum number of concurrent AWS requests
+        """
+        self.__ecs_client__ = ecs_client
+        self.__cluster_name__ = cluster_name
+        self.__max_workers__ = max_workers
+        self.__services__ = {}
+        self.__settings__ = {}
+        self.__task_definition_arns__ = []
+
+    def add_service(self, service_name: str, task_definition_arn: str, settings: Optional[Dict] = None) -> None:
+        """
+        Record the task definition a service was running before it was updated
+        :param service_name: ECS service name
+        :param task_definition_arn: The original task definition ARN
+        :param settings: Optional service settings changed by the update, restored with the task definition
+        """
+        if service_name not in self.__services__.keys():
+            self.__services__[service_name] = task_definition_arn
+            if settings is not None:
+                self.__settings__[service_name] = settings
+
+    def add_task_definition(self, task_definition_arn: str) -> None:
+        """
+        Record a task definition registered during the deployment
+        :param task_definition_arn: Task definition ARN
+        """
+        # Never deregister a revision that a service is being rolled back to
+        if task_definition_arn in self.__services__.values():
+            return
+        if task_definition_arn not in self.__task_definition_arns__:
+            self.__task_definition_arns__.append(task_definition_arn)
+
+    def get_services(self) -> Dict[str, str]:
+        """
+        Return the services that will be rolled back
+        :return: Dictionary of original task definition ARNs indexed by service name
+        """
+        return dict(self.__services__)
+
+    def execute(self, wait: bool = True) -> bool:
+        """
+        Revert every service at once, wait for them to stabilize together and deregister the failed revisions
+        :param wait: Boolean flag, if false the services will not be waited on or verified
+        :return: True if every service was reverted and verified
+        """
+        success = True
+
+        if len(self.__services__) > 0:
+            print('--------------------------------------------------------------------------------------------------')
+            print('Rolling Back Containers')
+            print('--------------------------------------------------------------------------------------------------')
+            reverted = self.__revert_services__()
+            success = len(reverted) == len(self.__services__)
+
+            if wait is True and len(reverted) > 0:
+                print('Waiting for services to stabilize: {services}'.format(services=', '.join(reverted)))
+                success = self.__wait_services__(reverted) and success
+                success = self.__verify_services__(reverted) and success
+
+        if len(self.__task_definition_arns__) > 0:
+            print('--------------------------------------------------------------------------------------------------')
+            print('Deregistering Task Definitions')
+            print('--------------------------------------------------------------------------------------------------')
+            success = self.__deregister_task_definitions__() and success
+
+        return success
+
+    def __revert_services__(self) -> List[str]:
+        """
+        Point each service back at its original task definition
+        :return: List of service names that were reverted
+        """
+        def revert(service_name: str) -> bool:
+            # Roll back inside a try/except block to allow us to continue in the face of errors
+            try:
+                print('Rolling back "{service_name}" service: {task_definition_arn}'.format(
+                    service_name=service_name,
+                    task_definition_arn=self.__services__[service_name]
+                ))
+                self.__ecs_client__.update_service_task_definition(
+                    cluster_name=self.__cluster_name__,
+                    service_name=service_name,
+                    task_definition_arn=self.__services__[service_name],
+                    **self.__settings__.get(service_name, {})
+                )
+                return True
+            except Exception as exception:
+                print('FATAL ERROR: Rollback of "{service_name}" failed with exception error- attempting to continue rollback'.format(service_name=service_name))
+                print(exception)
+                return False
+
+        service_names = list(self.__services__.keys())
+        with ThreadPoolExecutor(max_workers=self.__max_workers__) as executor:
+            results = list(executor.map(revert, service_names))
+
+        return [service_name for service_name, result in zip(service_names, results) if result is True]
+
+    def __wait_services__(self, service_names: List[str]) -> bool:
+        """
+        Wait for the services to stabilize, each waiter polls up to 10 services at once
+        :param service_names: ECS service names
+        :return: True if all services stabilized
+        """
+        def wait(services: List[str]) -> bool:
+            try:
+                self.__ecs_client__.wait_services_stable(
+                    cluster_name=self.__cluster_name__,
+                    services=services
+                )
+                return True
+            except Exception as exception:
+                print('FATAL ERROR: Services did not stabilize after rollback ({services})'.format(services=', '.join(services)))
+                print(exception)
+                return False
+
+        chunks = BaseClient.__chunk_list__(source=service_names, size=10)
+        with ThreadPoolExecutor(max_workers=self.__max_workers__) as executor:
+            results = list(executor.map(wait, chunks))
+
+        return all(results)
+
+    def __verify_services__(self, service_names: List[str]) -> bool:
+        """
+        Verify the primary deployment of each service is running the original task definition
+        :param service_names: ECS service names
+        :return: True if all services are running the original task definition
+        """
+        try:
+            services = self.__ecs_client__.describe_services(
+                cluster_name=self.__cluster_name__,
+                services=service_names
+            )
+        except Exception as exception:
+            print('FATAL ERROR: Failed to verify rollback')
+            print(exception)
+            return False
+
+        success = True
+        for service in services:
+            expected = self.__services__[service['serviceName']]
+            primary = None
+            for deployment in service.get('deployments', []):
+                if deployment['status'] == 'PRIMARY':
+                    primary = deployment
+
+            if primary is None or primary['taskDefinition'] != expected or primary['runningCount'] != primary['desiredCount']:
+                success = False
+                print('FATAL ERROR: Rollback of "{service_name}" could not be verified (expected {expected})'.format(
+                    service_name=service['serviceName'],
+                    expected=expected
+                ))
+            else:
+                print('Rolled back: {service_name} ({running_count}/{desired_count} tasks running)'.format(
+                    service_name=service['serviceName'],
+                    running_count=primary['runningCount'],
+                    desired_count=primary['desiredCount']
+                ))
+
+        return success
+
+    def __deregister_task_definitions__(self) -> bool:
+        """
+        Deregister the task definitions registered during the deployment
+        :return: True if all task definitions were deregistered
+        """
+        def deregister(task_definition_arn: str) -> bool:
+            try:
+                print('Deregistering: {task_definition_arn}'.format(task_definition_arn=task_definition_arn))
+                self.__ecs_client__.deregister_task_definition(task_definition_arn=task_definition_arn)
+                return True
+            except Exception as exception:
+                print('FATAL ERROR: Failed to deregister task definition ({task_definition_arn})'.format(task_definition_arn=task_definition_arn))
+                print(exception)
+                return False
+
+        with ThreadPoolExecutor(max_workers=self.__max_workers__) as executor:
+            results = list(executor.map(deregister, self.__task_definition_arns__))
+
+        return all(results)
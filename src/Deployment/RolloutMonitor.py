@@ -0,0 +1,204 @@
+import time
+
+from typing import Dict, List, Optional
+
+from Aws.Clients import Ecs, Elbv2
+
+
+class RolloutMonitor:
+    def __init__(
+            self,
+            ecs_client: Ecs.Client,
+            cluster_name: str,
+            delay: int = 10,
+            max_attempts: int = 100,
+            elbv2_client: Optional[Elbv2.Client] = None
+    ):
+        """
+        Monitor ECS service rollouts using the deployment rollout state
+        :param ecs_client: ECS client
+        :param cluster_name: ECS cluster name
+        :param delay: Number of seconds to wait between checks
+        :param max_attempts: Maximum number of attempts to be made
+        :param elbv2_client: Optional load balancing client, required to wait for target health
+        """
+        self.__ecs_client__ = ecs_client
+        self.__elbv2_client__ = elbv2_client
+        self.__cluster_name__ = cluster_name
+        self.__delay__ = delay
+        self.__max_attempts__ = max_attempts
+
+    def wait(
+            self,
+            service_name: str,
+            task_definition_arn: Optional[str] = None,
+            max_failed_tasks: int = 3,
+            wait_target_health: bool = False
+    ) -> Dict:
+        """
+        Wait for the primary deployment of a service to complete
+        :param service_name: ECS service name
+        :param task_definition_arn: The task definition ARN the primary deployment is expected to use
+        :param max_failed_tasks: Number of failed task launches tolerated before the rollout is considered failed
+        :param wait_target_health: Boolean flag, if true the deployment is ready as soon as its tasks are healthy in
+        every target group of the service, old tasks continue draining in the background
+        :return: The completed (or ready) deployment
+        :raises Exception: if the rollout fails, is superseded or does not complete in time
+        """
+        for attempt in range(0, self.__max_attempts__):
+            if attempt > 0:
+                time.sleep(self.__delay__)
+
+            services = self.__ecs_client__.describe_services(
+                cluster_name=self.__cluster_name__,
+                services=[service_name]
+            )
+            if len(services) == 0:
+                raise Exception('Could not locate ECS service ({service_name})'.format(service_name=service_name))
+            service = services[0]
+
+            primary = RolloutMonitor.get_primary_deployment(service)
+            if primary is None:
+                raise Exception('No primary deployment found for service ({service_name})'.format(service_name=service_name))
+
+            if task_definition_arn is not None and primary['taskDefinition'] != task_definition_arn:
+                raise Exception('The deployment of {service_name} was superseded by another deployment ({task_definition_arn})'.format(
+                    service_name=service_name,
+                    task_definition_arn=primary['taskDefinition']
+                ))
+
+            rollout_state = primary.get('rolloutState')
+            if rollout_state == 'FAILED':
+                raise Exception('ECS marked the deployment of {service_name} as failed: {reason}{stopped_reasons}'.format(
+                    service_name=service_name,
+                    reason=primary.get('rolloutStateReason', 'Unknown'),
+                    stopped_reasons=self.__get_stopped_reasons__(primary)
+                ))
+
+            if primary.get('failedTasks', 0) >= max_failed_tasks:
+                raise Exception('{failed_tasks} tasks failed to start for {service_name}{stopped_reasons}'.format(
+                    failed_tasks=primary['failedTasks'],
+                    service_name=service_name,
+                    stopped_reasons=self.__get_stopped_reasons__(primary)
+                ))
+
+            print('{service_name}: {rollout_state} ({running_count}/{desired_count} running, {pending_count} pending, {failed_tasks} failed)'.format(
+                service_name=service_name,
+                rollout_state=rollout_state if rollout_state is not None else 'IN_PROGRESS',
+                running_count=primary['runningCount'],
+                desired_count=primary['desiredCount'],
+                pending_count=primary['pendingCount'],
+                failed_tasks=primary.get('failedTasks', 0)
+            ))
+
+            if rollout_state == 'COMPLETED':
+                return primary
+
+            # The rollout only completes once the old tasks have drained (the target group deregistration delay), the
+            # new tasks are already serving traffic once they are healthy in the load balancer
+            if wait_target_health is True and primary['runningCount'] == primary['desiredCount'] and self.__is_target_healthy__(service, primary) is True:
+                print('{service_name}: Ready (all {running_count} tasks are healthy in the load balancer, old tasks continue draining in the background)'.format(
+                    service_name=service_name,
+                    running_count=primary['runningCount']
+                ))
+                return primary
+
+            # Services using an external deployment controller do not report a rollout state, fall back to the
+            # same conditions as the services stable waiter
+            if rollout_state is None and len(service['deployments']) == 1 and primary['runningCount'] == primary['desiredCount']:
+                return primary
+
+        raise Exception('Timed out waiting for the deployment of {service_name} to complete'.format(service_name=service_name))
+
+    @staticmethod
+    def get_primary_deployment(service: Dict) -> Optional[Dict]:
+        """
+        Return the primary deployment of a service
+        :param service: Service description
+        :return: Deployment or None if not found
+        """
+        for deployment in service.get('deployments', []):
+            if deployment['status'] == 'PRIMARY':
+                return deployment
+        return None
+
+    def __is_target_healthy__(self, service: Dict, deployment: Dict) -> bool:
+        """
+        Check whether every running task of a deployment is healthy in every target group of the service
+        :param service: Service description
+        :param deployment: The deployment
+        :return: Boolean flag, false if the service has no target groups or the task addresses could not be found
+        """
+        if self.__elbv2_client__ is None:
+            raise Exception('A load balancing client is required to wait for target health')
+
+        target_group_arns = []
+        for load_balancer in service.get('loadBalancers', []):
+            if 'targetGroupArn' in load_balancer.keys() and load_balancer['targetGroupArn'] not in target_group_arns:
+                target_group_arns.append(load_balancer['targetGroupArn'])
+        if len(target_group_arns) == 0:
+            return False
+
+        task_arns = self.__ecs_client__.list_task_arns_started_by(
+            cluster_name=self.__cluster_name__,
+            started_by=deployment['id'],
+            desired_status='RUNNING'
+        )
+        if len(task_arns) < deployment['desiredCount']:
+            return False
+
+        # Tasks using the awsvpc network mode are registered in the target groups by their private IP address
+        addresses = []
+        for task in self.__ecs_client__.describe_tasks(cluster_name=self.__cluster_name__, task_arns=task_arns):
+            address = RolloutMonitor.get_private_address(task)
+            if task['lastStatus'] != 'RUNNING' or address is None:
+                return False
+            addresses.append(address)
+
+        for target_group_arn in target_group_arns:
+            healthy = self.__elbv2_client__.get_healthy_target_ids(target_group_arn)
+            if any(address not in healthy for address in addresses):
+                return False
+
+        return True
+
+    @staticmethod
+    def get_private_address(task: Dict) -> Optional[str]:
+        """
+        Return the private IP address of the network interface attached to a task
+        :param task: Task description
+        :return: IP address or None if the task does not have its own network interface
+        """
+        for attachment in task.get('attachments', []):
+            if attachment.get('type') != 'ElasticNetworkInterface':
+                continue
+            for detail in attachment.get('details', []):
+                if detail['name'] == 'privateIPv4Address':
+                    return detail['value']
+        return None
+
+    def __get_stopped_reasons__(self, deployment: Dict, limit: int = 3) -> str:
+        """
+        Summarise why the tasks started by a deployment stopped
+        :param deployment: The deployment
+        :param limit: Maximum number of tasks to describe
+        :return: Stopped reasons, prefixed with a separator
+        """
+        try:
+            task_arns = self.__ecs_client__.list_stopped_task_arns(
+                cluster_name=self.__cluster_name__,
+                started_by=deployment['id']
+            )
+            reasons: List[str] = []
+            for task in self.__ecs_client__.describe_tasks(cluster_name=self.__cluster_name__, task_arns=task_arns[:limit]):
+                reason = task.get('stoppedReason', 'Unknown')
+                if reason not in reasons:
+                    reasons.append(reason)
+        except Exception as exception:
+            print(exception)
+            return ''
+
+        if len(reasons) == 0:
+            return ''
+
+        return ' (stopped reason: {reasons})'.format(reasons='; '.join(reasons))
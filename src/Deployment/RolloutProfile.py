@@ -0,0 +1,75 @@
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+
+@dataclass(frozen=True)
+class RolloutProfile:
+    """
+    Rollout speed applied to a service while it is being deployed, the original settings are restored once the
+    service has stabilized
+    """
+    __slots__ = (
+        'maximum_percent',
+        'minimum_healthy_percent',
+        'health_check_grace_period',
+        'scale_out'
+    )
+
+    # Upper limit of running tasks during the rollout as a percentage of the desired count, None keeps the service value
+    maximum_percent: Optional[int]
+    # Lower limit of healthy tasks during the rollout as a percentage of the desired count, None keeps the service value
+    minimum_healthy_percent: Optional[int]
+    # Seconds load balancer health checks are ignored after a task starts, None keeps the service value
+    health_check_grace_period: Optional[int]
+    # Number of tasks added to the desired count during the rollout
+    scale_out: int
+
+    # Named profiles that can be used instead of (or as a base for) explicit values
+    PROFILES = {
+        # Start a full set of new tasks at once, suitable for stateless services
+        'fast': {'maximum_percent': 200, 'minimum_healthy_percent': 100},
+        # Replace tasks in small batches without ever dropping below the desired count
+        'safe': {'maximum_percent': 125, 'minimum_healthy_percent': 100}
+    }
+
+    def get_settings(self, ecs_service: Dict) -> Dict:
+        """
+        Return the service settings used during the rollout
+        :param ecs_service: The ECS service before it is updated
+        :return: Keyword arguments of the ECS client service update methods
+        """
+        deployment_configuration = {}
+        if self.maximum_percent is not None:
+            deployment_configuration['maximumPercent'] = self.maximum_percent
+        if self.minimum_healthy_percent is not None:
+            deployment_configuration['minimumHealthyPercent'] = self.minimum_healthy_percent
+
+        return {
+            'deployment_configuration': deployment_configuration,
+            'desired_count': ecs_service['desiredCount'] + self.scale_out if self.scale_out > 0 else None,
+            'health_check_grace_period': self.health_check_grace_period
+        }
+
+    def get_original_settings(self, ecs_service: Dict) -> Dict:
+        """
+        Return the service settings changed by the rollout, as they were before the service was updated. Settings the
+        service did not have are left out, and the desired count is only restored if the service still has the scaled
+        out desired count (e.g. autoscaling has not changed it during the rollout)
+        :param ecs_service: The ECS service before it is updated
+        :return: Keyword arguments of the ECS client service update methods
+        """
+        settings = {}
+        deployment_configuration = {}
+        for key, value in self.get_settings(ecs_service)['deployment_configuration'].items():
+            if key in ecs_service['deploymentConfiguration'].keys():
+                deployment_configuration[key] = ecs_service['deploymentConfiguration'][key]
+        if len(deployment_configuration) > 0:
+            settings['deployment_configuration'] = deployment_configuration
+
+        if self.scale_out > 0:
+            settings['desired_count'] = ecs_service['desiredCount']
+            settings['scaled_desired_count'] = ecs_service['desiredCount'] + self.scale_out
+        if self.health_check_grace_period is not None and 'healthCheckGracePeriodSeconds' in ecs_service.keys():
+            settings['health_check_grace_period'] = ecs_service['healthCheckGracePeriodSeconds']
+
+        return settings
@@ -0,0 +1,85 @@
+import json
+
+from Aws.Clients import Ssm
+from typing import Dict, Optional
+
+
+class SsmLockBackend:
+    def __init__(self, ssm_client: Ssm.Client, prefix: str = '/deploy-lock'):
+        """
+        Deploy lock records stored in SSM parameters, which needs no additional infrastructure. Records are created
+        atomically, but SSM has no conditional overwrite so replacing a record (taking over an expired lock or renewing
+        it) is best-effort: a writer only succeeds if it wrote the next parameter version and its value is still stored
+        when read back, and a writer that overwrote the next version restores it. Writes interleaving with the read back
+        can still leave two deployments holding the lock, use the DynamoDB backend where that matters
+        :param ssm_client: SSM client
+        :param prefix: SSM parameter path the records are stored in
+        """
+        self.__ssm_client__ = ssm_client
+        self.__prefix__ = prefix.rstrip('/')
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Read a record
+        :param key: Record key
+        :return: The record, or None if it does not exist
+        """
+        parameter = self.__ssm_client__.find_parameter(self.__get_path__(key))
+        if parameter is None:
+            return None
+
+        return json.loads(parameter['Value'])
+
+    def create(self, key: str, record: Dict) -> bool:
+        """
+        Write a record if it does not exist yet
+        :param key: Record key
+        :param record: The record
+        :return: Boolean flag, false if the record already existed
+        """
+        return self.__ssm_client__.create_parameter(path=self.__get_path__(key), value=json.dumps(record, sort_keys=True))
+
+    def replace(self, key: str, record: Dict, expected: Dict) -> bool:
+        """
+        Replace a record if it has not changed since it was read
+        :param key: Record key
+        :param record: The new record
+        :param expected: The record that was read
+        :return: Boolean flag, false if the record had changed or was replaced concurrently
+        """
+        parameter = self.__ssm_client__.find_parameter(self.__get_path__(key))
+        if parameter is None or json.loads(parameter['Value']) != expected:
+            return False
+
+        version = self.__ssm_client__.put_parameter(path=self.__get_path__(key), value=json.dumps(record, sort_keys=True))
+        latest = self.__ssm_client__.find_parameter(self.__get_path__(key))
+        if version == parameter['Version'] + 1:
+            return latest is not None and json.loads(latest['Value']) == record
+
+        # Another writer won the next version, put its record back unless the record changed again since
+        winner = self.__ssm_client__.find_parameter(self.__get_path__(key), version=parameter['Version'] + 1)
+        if winner is not None and latest is not None and latest['Version'] == version:
+            self.__ssm_client__.put_parameter(path=self.__get_path__(key), value=winner['Value'])
+
+        return False
+
+    def delete(self, key: str, expected: Dict) -> bool:
+        """
+        Delete a record if it has not changed since it was read
+        :param key: Record key
+        :param expected: The record that was read
+        :return: Boolean flag, false if the record had changed
+        """
+        parameter = self.__ssm_client__.find_parameter(self.__get_path__(key))
+        if parameter is None or json.loads(parameter['Value']) != expected:
+            return False
+
+        return self.__ssm_client__.delete_parameter(self.__get_path__(key))
+
+    def __get_path__(self, key: str) -> str:
+        """
+        Return the SSM parameter path of a record
+        :param key: Record key
+        :return: The SSM parameter path
+        """
+        return '{prefix}/{key}'.format(prefix=self.__prefix__, key=key)
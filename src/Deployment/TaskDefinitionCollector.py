@@ -0,0 +1,128 @@
+import threading
+
+from Aws.Clients import Ecs
+from typing import Dict, List, Optional
+
+
+class TaskDefinitionCollector:
+    def __init__(
+            self,
+            ecs_client: Ecs.Client,
+            cluster_name: str,
+            keep: int = 10,
+            delay: float = 0.5
+    ):
+        """
+        Deregister and delete old task definition revisions, so listing the active task definitions stays fast
+        :param ecs_client: ECS client
+        :param cluster_name: ECS cluster name, revisions used by the services in this cluster are always kept
+        :param keep: Number of the most recent active revisions kept in each family
+        :param delay: Number of seconds to wait between requests, the task definition APIs have low rate limits
+        """
+        if keep < 1:
+            raise Exception('At least one task definition revision must be kept in each family')
+
+        self.__ecs_client__ = ecs_client
+        self.__cluster_name__ = cluster_name
+        self.__keep__ = keep
+        self.__delay__ = delay
+        self.__stopped__ = threading.Event()
+        self.__thread__ = None
+        self.__results__: Dict[str, Dict[str, int]] = {}
+
+    def start(self, families: List[str]) -> None:
+        """
+        Collect the revisions of each family in a background thread
+        :param families: Task definition families
+        """
+        def run() -> None:
+            try:
+                self.collect(families)
+            except Exception as exception:
+                print('WARNING: Task definition cleanup failed: {exception}'.format(exception=exception))
+
+        self.__stopped__.clear()
+        self.__thread__ = threading.Thread(target=run, name='TaskDefinitionCollector', daemon=True)
+        self.__thread__.start()
+
+    def join(self, timeout: Optional[float] = None) -> Dict[str, Dict[str, int]]:
+        """
+        Wait for the background collection to finish, the collection is stopped when the timeout expires and the
+        remaining revisions are collected by the next deployment
+        :param timeout: Optional maximum number of seconds to wait
+        :return: Number of deregistered and deleted revisions indexed by family
+        """
+        if self.__thread__ is not None:
+            self.__thread__.join(timeout)
+            if self.__thread__.is_alive():
+                print('Task definition cleanup did not finish in time, the remaining revisions will be removed by the next deployment')
+                self.__stopped__.set()
+                self.__thread__.join()
+
+        return dict(self.__results__)
+
+    def collect(self, families: List[str]) -> Dict[str, Dict[str, int]]:
+        """
+        Deregister every active revision other than the most recent and those used by a service in the cluster, then
+        delete the revisions deregistered here. Revisions deregistered by anything else (e.g. rollbacks, or revisions
+        used by scheduled tasks that were deregistered by hand) are never deleted
+        :param families: Task definition families
+        :return: Number of deregistered and deleted revisions indexed by family
+        """
+        in_use = self.get_in_use_task_definition_arns()
+
+        for family in families:
+            if self.__stopped__.is_set():
+                break
+
+            self.__results__[family] = {'deregistered': 0, 'deleted': 0}
+            active = TaskDefinitionCollector.__filter_family__(family, self.__ecs_client__.list_task_definitions(family_prefix=family))
+            expired = [task_definition_arn for task_definition_arn in active[self.__keep__:] if task_definition_arn not in in_use]
+            print('{family}: {active} active revisions, {expired} to remove'.format(family=family, active=len(active), expired=len(expired)))
+
+            deregistered = []
+            for task_definition_arn in expired:
+                if self.__stopped__.wait(self.__delay__):
+                    break
+                self.__ecs_client__.deregister_task_definition(task_definition_arn=task_definition_arn)
+                deregistered.append(task_definition_arn)
+                self.__results__[family]['deregistered'] += 1
+
+            # Revisions deregistered before the collection was stopped are still deleted, they are no longer listed
+            # as active so the next deployment would not find them
+            for index in range(0, len(deregistered), 10):
+                failures = self.__ecs_client__.delete_task_definitions(deregistered[index:index + 10])
+                for failure in failures:
+                    print('WARNING: Failed to delete task definition ({arn}): {reason}'.format(arn=failure.get('arn'), reason=failure.get('reason')))
+                self.__results__[family]['deleted'] += len(deregistered[index:index + 10]) - len(failures)
+
+            print('{family}: {deregistered} revisions deregistered, {deleted} revisions deleted'.format(
+                family=family,
+                deregistered=self.__results__[family]['deregistered'],
+                deleted=self.__results__[family]['deleted']
+            ))
+
+        return dict(self.__results__)
+
+    def get_in_use_task_definition_arns(self) -> List[str]:
+        """
+        Return the task definitions used by any deployment of a service in the cluster
+        :return: List of task definition ARNs
+        """
+        task_definition_arns = []
+        for service in self.__ecs_client__.get_services_by_name(cluster=self.__cluster_name__).values():
+            for task_definition_arn in [service['taskDefinition']] + [deployment['taskDefinition'] for deployment in service.get('deployments', [])]:
+                if task_definition_arn not in task_definition_arns:
+                    task_definition_arns.append(task_definition_arn)
+
+        return task_definition_arns
+
+    @staticmethod
+    def __filter_family__(family: str, task_definition_arns: List[str]) -> List[str]:
+        """
+        Remove the revisions of other families sharing the family prefix
+        :param family: Task definition family
+        :param task_definition_arns: Task definition ARNs
+        :return: Task definition ARNs of the family
+        """
+        return [task_definition_arn for task_definition_arn in task_definition_arns if task_definition_arn.split('/')[-1].split(':')[0] == family]
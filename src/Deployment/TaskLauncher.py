@@ -0,0 +1,132 @@
+import random
+import time
+
+from Aws.Clients import Ecs
+from typing import Dict, List, Optional
+
+
+class TaskLauncher:
+    # Failure reasons (compared case-insensitively) caused by a temporary lack of capacity
+    RETRYABLE_REASONS = [
+        'capacity is unavailable',
+        'resource:cpu',
+        'resource:memory',
+        'resource:eni',
+        'resource:gpu',
+        'resource:ports',
+        'agent',
+        'throttl',
+        'timeout'
+    ]
+
+    def __init__(
+            self,
+            ecs_client: Ecs.Client,
+            cluster_name: str,
+            max_attempts: int = 4,
+            base_delay: float = 1.0,
+            max_delay: float = 15.0
+    ):
+        """
+        Start tasks, retrying launches that fail for lack of capacity and falling back across capacity providers
+        :param ecs_client: ECS client
+        :param cluster_name: ECS cluster name
+        :param max_attempts: Maximum number of launch attempts with each capacity provider
+        :param base_delay: Number of seconds the first retry waits for (before jitter), doubled on each retry
+        :param max_delay: Maximum number of seconds to wait between attempts
+        """
+        self.__ecs_client__ = ecs_client
+        self.__cluster_name__ = cluster_name
+        self.__max_attempts__ = max_attempts
+        self.__base_delay__ = base_delay
+        self.__max_delay__ = max_delay
+
+    def launch(self, ecs_service: Dict, name: str, overrides: Optional[Dict] = None, capacity_providers: Optional[List[str]] = None) -> str:
+        """
+        Start a single task from a service definition
+        :param ecs_service: ECS service description
+        :param name: Name used to report the task
+        :param overrides: Optional task overrides
+        :param capacity_providers: Optional capacity providers to try in order, by default the launch configuration of
+                                   the service is used
+        :return: Task ARN
+        :raises Exception: if the task could not be started with any capacity provider
+        """
+        strategies = [None]
+        if capacity_providers is not None and len(capacity_providers) > 0:
+            strategies = [[{'capacityProvider': capacity_provider, 'weight': 1}] for capacity_provider in capacity_providers]
+
+        reasons = []
+        for strategy in strategies:
+            provider = strategy[0]['capacityProvider'] if strategy is not None else ecs_service.get('launchType', 'service default')
+            for attempt in range(1, self.__max_attempts__ + 1):
+                run_task_result = self.__ecs_client__.run_task_for_service(
+                    cluster_name=self.__cluster_name__,
+                    ecs_service=ecs_service,
+                    count=1,
+                    overrides=overrides,
+                    capacity_provider_strategy=strategy
+                )
+                if len(run_task_result['tasks']) > 0:
+                    print('Launched: {name} ({provider}, attempt {attempt})'.format(name=name, provider=provider, attempt=attempt))
+                    return run_task_result['tasks'][0]['taskArn']
+
+                failures = TaskLauncher.get_failure_reasons(run_task_result['failures'])
+                reasons.append('{provider}: {failures}'.format(provider=provider, failures=failures))
+                retryable = TaskLauncher.is_retryable(run_task_result['failures'])
+                print('Launch failed: {name} ({provider}, attempt {attempt}/{max_attempts}): {failures}{retry}'.format(
+                    name=name,
+                    provider=provider,
+                    attempt=attempt,
+                    max_attempts=self.__max_attempts__,
+                    failures=failures,
+                    retry='' if retryable else ' (not retryable)'
+                ))
+
+                # Failures that are not caused by capacity will not be fixed by retrying with the same capacity provider
+                if retryable is False or attempt == self.__max_attempts__:
+                    break
+                time.sleep(self.get_delay(attempt))
+
+        raise Exception('Failed to start task ({name}): {reasons}'.format(name=name, reasons='; '.join(reasons)))
+
+    def get_delay(self, attempt: int) -> float:
+        """
+        Return the number of seconds to wait before the next attempt, using exponential backoff with full jitter
+        :param attempt: The attempt that just failed, starting at 1
+        :return: Number of seconds
+        """
+        return random.uniform(0, min(self.__max_delay__, self.__base_delay__ * 2 ** (attempt - 1)))
+
+    @staticmethod
+    def is_retryable(failures: List[Dict]) -> bool:
+        """
+        Check whether a failed launch was caused by a temporary lack of capacity
+        :param failures: Failures returned by run task
+        :return: Boolean flag
+        """
+        if len(failures) == 0:
+            return True
+        for failure in failures:
+            reason = '{reason} {detail}'.format(reason=failure.get('reason', ''), detail=failure.get('detail', '')).lower()
+            if any(retryable in reason for retryable in TaskLauncher.RETRYABLE_REASONS) is False:
+                return False
+        return True
+
+    @staticmethod
+    def get_failure_reasons(failures: List[Dict]) -> str:
+        """
+        Summarise the failures returned by run task
+        :param failures: Failures returned by run task
+        :return: Failure reasons
+        """
+        if len(failures) == 0:
+            return 'No tasks were started and no failures were returned'
+        reasons = []
+        for failure in failures:
+            reason = failure.get('reason', 'Unknown')
+            if failure.get('detail') is not None:
+                reason += ' ({detail})'.format(detail=failure['detail'])
+            if reason not in reasons:
+                reasons.append(reason)
+        return ', '.join(reasons)
@@ -0,0 +1,215 @@
+import time
+
+from Aws.Clients import CloudWatch, Ecs
+from datetime import datetime
+from Deployment.ContainerConfiguration import ContainerConfiguration
+from Deployment.Diagnostics import Diagnostics
+from Deployment.TaskLauncher import TaskLauncher
+from typing import Dict, List, Optional, Tuple
+
+
+class TaskRunner:
+    def __init__(
+            self,
+            ecs_client: Ecs.Client,
+            cloud_watch_client: CloudWatch.Client,
+            diagnostics: Diagnostics,
+            cluster_name: str,
+            delay: int = 10,
+            max_attempts: int = 100
+    ):
+        """
+        Run one-off tasks from service definitions and wait for all of them to finish together
+        :param ecs_client: ECS client
+        :param cloud_watch_client: CloudWatch logs client
+        :param diagnostics: Diagnostics used to report failed tasks
+        :param cluster_name: ECS cluster name
+        :param delay: Number of seconds to wait between checks
+        :param max_attempts: Maximum number of checks
+        """
+        self.__ecs_client__ = ecs_client
+        self.__cloud_watch_client__ = cloud_watch_client
+        self.__diagnostics__ = diagnostics
+        self.__cluster_name__ = cluster_name
+        self.__delay__ = delay
+        self.__max_attempts__ = max_attempts
+        self.__launcher__ = TaskLauncher(ecs_client=ecs_client, cluster_name=cluster_name)
+
+    def run(self, containers: List[ContainerConfiguration], task_definitions: Dict[str, Dict]) -> None:
+        """
+        Start the tasks of each container, wait for every task to stop, print their logs and check their exit codes
+        :param containers: The containers to run, each container is run from the service with the same name
+        :param task_definitions: Task definitions indexed by service name, used to locate the CloudWatch logs
+        :raises Exception: if a task could not be started or a container did not exit with a zero exit code
+        """
+        # Start every task before waiting on any of them
+        ecs_services = {
+            ecs_service['serviceName']: ecs_service
+            for ecs_service in self.__ecs_client__.describe_services(
+                cluster_name=self.__cluster_name__,
+                services=[container.service_name for container in containers]
+            )
+        }
+        task_arns = {}
+        try:
+            for container in containers:
+                # Sharded containers start one task per shard, each told which shard it is
+                for shard_index in range(0, container.shards):
+                    name = TaskRunner.get_task_name(container.service_name, shard_index, container.shards)
+                    print('Executing: {name}'.format(name=name))
+                    task_arn = self.__launcher__.launch(
+                        ecs_service=ecs_services[container.service_name],
+                        name=name,
+                        overrides=TaskRunner.get_shard_overrides(container.service_name, shard_index, container.shards),
+                        capacity_providers=list(container.capacity_providers) if container.capacity_providers is not None else None
+                    )
+                    print('Executing Task ARN: {task_arn}'.format(task_arn=task_arn))
+                    task_arns[task_arn] = (container.service_name, name)
+        except Exception as exception:
+            # Nothing would wait on the tasks already started, stop them so they do not run against a failed deployment
+            self.__stop_tasks__(task_arns, 'A run-once task of the same deployment failed to start')
+            raise exception
+
+        print('Waiting For Tasks To Finish: {names}'.format(names=', '.join(name for _, name in task_arns.values())))
+        tasks, missing = self.wait_tasks_stopped(list(task_arns.keys()))
+
+        failures = []
+        failed_task_arns = []
+        for task_arn, (service_name, name) in task_arns.items():
+            # ECS no longer knows about the task, there is nothing to report on
+            if task_arn in missing.keys():
+                failures.append('{name}: The task could not be described ({reason})'.format(name=name, reason=missing[task_arn]))
+                continue
+
+            self.__print_logs__(service_name, name, task_definitions[service_name], task_arn)
+
+            # Search for the container inside the task
+            exit_code = None
+            found = False
+            for container in tasks[task_arn].get('containers', []):
+                if container['name'] == service_name:
+                    found = True
+                    exit_code = container.get('exitCode')
+
+            if found is False or exit_code != 0:
+                failed_task_arns.append(task_arn)
+            if found is False:
+                failures.append('{name}: Could not locate expected container result in task description'.format(name=name))
+            elif exit_code is None:
+                failures.append('{name}: No exit code found for container. This is most likely caused by the ECS task failing to start- please refer to the stopped task diagnostics above'.format(name=name))
+            elif exit_code != 0:
+                failures.append('{name}: Non-zero exit code ({exit_code}) returned from container'.format(name=name, exit_code=exit_code))
+
+        if len(failures) > 0:
+            Diagnostics.print_report(self.__diagnostics__.collect(failed_task_arns))
+            raise Exception('; '.join(failures))
+
+    @staticmethod
+    def get_task_name(service_name: str, shard_index: int, shard_count: int) -> str:
+        """
+        Return the name used to report a task
+        :param service_name: ECS service name
+        :param shard_index: Zero based shard index
+        :param shard_count: Number of shards
+        :return: The service name, followed by the shard number when the task is sharded
+        """
+        if shard_count == 1:
+            return service_name
+        return '{service_name} (shard {shard}/{shard_count})'.format(service_name=service_name, shard=shard_index + 1, shard_count=shard_count)
+
+    @staticmethod
+    def get_shard_overrides(service_name: str, shard_index: int, shard_count: int) -> Optional[Dict]:
+        """
+        Return the task overrides telling a container which shard it is
+        :param service_name: ECS service name (and container name)
+        :param shard_index: Zero based shard index
+        :param shard_count: Number of shards
+        :return: Task overrides, or None if the task is not sharded
+        """
+        if shard_count == 1:
+            return None
+        return {
+            'containerOverrides': [{
+                'name': service_name,
+                'environment': [
+                    {'name': 'SHARD_INDEX', 'value': str(shard_index)},
+                    {'name': 'SHARD_COUNT', 'value': str(shard_count)}
+                ]
+            }]
+        }
+
+    def wait_tasks_stopped(self, task_arns: List[str]) -> Tuple[Dict[str, Dict], Dict[str, str]]:
+        """
+        Poll the tasks with batched describe requests until every task has stopped, tasks ECS can not describe (e.g.
+        MISSING) are not polled again
+        :param task_arns: ECS task ARNs
+        :return: Tuple containing the final task descriptions indexed by task ARN, and the reasons the other tasks
+                 could not be described indexed by task ARN
+        :raises Exception: if the tasks did not stop in time
+        """
+        stopped = {}
+        missing = {}
+        pending = list(task_arns)
+        for attempt in range(0, self.__max_attempts__):
+            tasks, failures = self.__ecs_client__.describe_tasks_with_failures(cluster_name=self.__cluster_name__, task_arns=pending)
+            for task in tasks:
+                if task['lastStatus'] == 'STOPPED':
+                    stopped[task['taskArn']] = task
+            for failure in failures:
+                print('WARNING: Could not describe task ({task_arn}): {reason}'.format(task_arn=failure['arn'], reason=failure.get('reason', 'Unknown')))
+                missing[failure['arn']] = failure.get('reason', 'Unknown')
+            pending = [task_arn for task_arn in pending if task_arn not in stopped.keys() and task_arn not in missing.keys()]
+            if len(pending) == 0:
+                return stopped, missing
+            time.sleep(self.__delay__)
+
+        raise Exception('Timed out waiting for tasks to stop ({task_arns})'.format(task_arns=', '.join(pending)))
+
+    def __stop_tasks__(self, task_arns: Dict[str, Tuple[str, str]], reason: str) -> None:
+        """
+        Stop started tasks, failures are only reported as the deployment is already failing
+        :param task_arns: Started tasks, the service name and reported name indexed by task ARN
+        :param reason: Reason reported in the stopped tasks
+        """
+        for task_arn, (_, name) in task_arns.items():
+            print('Stopping: {name} ({task_arn})'.format(name=name, task_arn=task_arn))
+            try:
+                self.__ecs_client__.stop_task(cluster_name=self.__cluster_name__, task_arn=task_arn, reason=reason)
+            except Exception as exception:
+                print('WARNING: Failed to stop the task ({task_arn}): {exception}'.format(task_arn=task_arn, exception=exception))
+
+    def __print_logs__(self, service_name: str, name: str, task_definition: Dict, task_arn: str) -> None:
+        """
+        Print the CloudWatch log output of a task
+        :param service_name: ECS service name
+        :param name: Name used to report the task
+        :param task_definition: Task definition containing the log configuration
+        :param task_arn: ECS task ARN
+        """
+        print('--------------------------------------------------------------------------------------------------')
+        print('Loading Execution Logs: {name}'.format(name=name))
+        print('--------------------------------------------------------------------------------------------------')
+        try:
+            found = False
+            for container in task_definition['containerDefinitions']:
+                if container['name'] == service_name:
+                    found = True
+                    # Display the log output
+                    events = self.__cloud_watch_client__.get_log_events(
+                        log_group_name=container['logConfiguration']['options']['awslogs-group'],
+                        log_stream_prefix=container['logConfiguration']['options']['awslogs-stream-prefix'],
+                        task_arn=task_arn
+                    )
+
+                    for event in events:
+                        print('{timestamp}: {message}'.format(
+                            timestamp=datetime.fromtimestamp(event['timestamp'] / 1000),
+                            message=event['message']
+                        ))
+
+            if found is False:
+                raise Exception('Could not locate CloudWatch log configuration')
+        except Exception as exception:
+            print(exception)
+            print('WARNING: Failed to locate CloudWatch logs for the task. This is most likely caused by the ECS task failing to start')
+        print('--------------------------------------------------------------------------------------------------')
@@ -1,208 +1,143 @@
 #!/usr/bin/env python3
 import os
+import socket
 import time
 
-from Aws.Clients import Ecs, Ssm
+from typing import Dict, List, Optional
+
+from Aws.Clients import Ecr, Ecs, Elbv2
 from Aws.Clients import CloudWatch
-from datetime import datetime
+from Aws.Cassette import Cassette
+from Aws.Recorder import Recorder
+from Aws.Replayer import Replayer
+from Aws.Session import Session
+from Aws.TaskDefinitionBuilder import TaskDefinitionBuilder
+from datetime import datetime, timedelta
 from Deployment.AwsCli import AwsCli
+from Deployment.BuildScheduler import BuildScheduler
+from Deployment.ChangeDetector import ChangeDetector
+from Deployment.CommandRunner import CommandRunner
 from Deployment.ConfigurationFile import ConfigurationFile
+from Deployment.DaemonState import DaemonState
+from Deployment.DeployDaemon import DeployDaemon
+from Deployment.DeployLock import DeployLock
+from Deployment.EnvironmentConfiguration import EnvironmentConfiguration
+from Deployment.Diagnostics import Diagnostics
+from Deployment.DiscoveryCache import DiscoveryCache
 from Deployment.Docker import Docker
+from Deployment.DurationHistory import DurationHistory
 from Deployment.DockerCompose import DockerCompose
 from Deployment.GitHub import GitHub
-
-
-def to_camel_case(value: str) -> str:
+from Deployment.ImagePrefetcher import ImagePrefetcher
+from Deployment.Preflight import Preflight
+from Deployment.Profiler import Profiler
+from Deployment.Rollback import Rollback
+from Deployment.RolloutMonitor import RolloutMonitor
+from Deployment.TaskDefinitionCollector import TaskDefinitionCollector
+from Deployment.TaskRunner import TaskRunner
+
+
+def get_skip_reason(
+        ecs_client: Ecs.Client,
+        cluster_name: str,
+        service_name: str,
+        task_definition: Dict,
+        original_image: str,
+        image_url: str,
+        new_image: str,
+        image_digest: Optional[str],
+        secrets: Dict[str, str]
+) -> Optional[str]:
     """
-    Convert snake case string to camel snake
-    :param value: Snake case string to convert
-    :return: Camel case string
+    Check whether a service update can be skipped, the running tasks are only requested once every other check passed
+    :param ecs_client: ECS client
+    :param cluster_name: ECS cluster name
+    :param service_name: ECS service (and container) name
+    :param task_definition: The current task definition of the service
+    :param original_image: Image of the container in the current task definition
+    :param image_url: Tagged image URL being deployed
+    :param new_image: Image being deployed, pinned to its digest when known
+    :param image_digest: Optional manifest digest of the pushed image
+    :param secrets: Secret ARNs indexed by the secret name
+    :return: Reason the update is skipped, or None if the service must be updated
     """
-    components = value.split('_')
-    return (components[0] + ''.join(x.title() for x in components[1:])).title()
-
-
-try:
-    print('--------------------------------------------------------------------------------------------------')
-    print('ECS Deployment Tool')
-    print('--------------------------------------------------------------------------------------------------')
-    print()
-
-    # Validate GitHub workspace was configured
-    print('Checking workspace')
-    if 'GITHUB_WORKSPACE' not in os.environ.keys():
-        raise Exception('No GITHUB_WORKSPACE was specified, please ensure GITHUB_WORKSPACE environment variable has been set')
-
-    # Change into the repository root folder
-    os.chdir(os.environ['GITHUB_WORKSPACE'])
-
-    # Validate required environment variables are set
-    print('Checking environment')
-    if 'ENVIRONMENT' not in os.environ.keys():
-        raise Exception('No deployment environment was specified, please ensure ENVIRONMENT action variable has been set')
-
-    # Validate the GitHub SHA was supplied
-    print('Checking image tag')
-    if 'IMAGE_TAG' not in os.environ.keys():
-        raise Exception('No ECR image tag was specified, please ensure IMAGE_TAG action variable has been set')
-
-    # Load deployment configuration
-    path_repository_root = GitHub.get_repository_root()
-    print('GitHub repository root: {path_repository_root}')
-    deployment_configuration_filename = '{path_repository_root}/.github/deploy.yml'.format(
-        path_repository_root=path_repository_root
+    # If the new and old images are the same, nothing has changed
+    if original_image == image_url or original_image == new_image:
+        return 'Container image has not changed'
+
+    # A rebuild of unchanged content produces the same digest, but only a pinned digest can be compared
+    if image_digest is None or '@' in original_image:
+        return None
+
+    # New secrets still need to be added to the container
+    if TaskDefinitionBuilder(task_definition).has_secrets(service_name, list(secrets.keys())) is False:
+        return None
+
+    running_image_digests = ecs_client.get_running_image_digests(
+        cluster_name=cluster_name,
+        service_name=service_name,
+        container_name=service_name
     )
+    if running_image_digests != [image_digest]:
+        return None
 
-    print('Creating deployment configuration file')
-    deployment_configuration = ConfigurationFile(deployment_configuration_filename)
-    environment_id = os.environ['ENVIRONMENT']
-    print(f'Environment: {environment_id}')
-    github_sha = os.environ['IMAGE_TAG']
-    print(f'GitHub SHA: {github_sha}')
-    aws_account_id = deployment_configuration.get_aws_account_id(environment_id)
-    print(f'AWS Account ID: {aws_account_id}')
-    deployment_containers = deployment_configuration.get_container_names(environment_id)
-    print(f'Deployment Containers: {deployment_containers}')
-    repository_url = '{aws_account_id}.dkr.ecr.{aws_deployment_region}.amazonaws.com'.format(
-        aws_account_id=deployment_configuration.get_aws_account_id(environment_id),
-        aws_deployment_region=deployment_configuration.get_aws_deployment_region(environment_id)
-    )
-    print(f'Repository URL: {repository_url}')
-    secret_prefix='arn:aws:ssm:{aws_deployment_region}:{aws_account_id}:parameter/'.format(
-        aws_account_id=deployment_configuration.get_aws_account_id(environment_id),
-        aws_deployment_region=deployment_configuration.get_aws_deployment_region(environment_id)
-    )
-    print(f'Secret Prefix: {secret_prefix}')
-
-    # If a specific deployment container was specified, make sure it exists
-    print('Checking deploy container')
-    if 'DEPLOY_CONTAINER' in os.environ.keys():
-        selected_container = os.environ['DEPLOY_CONTAINER']
-        print(f'Checking: {selected_container}')
-        if selected_container not in deployment_containers:
-            raise Exception('The requested container ({selected_container}) did not exist in the environment'.format(selected_container=selected_container))
-        # Just truncate to the single container
-        deployment_containers = [os.environ['DEPLOY_CONTAINER']]
-
-    # Create 'docker-compose.yml' file for each container
-    print('--------------------------------------------------------------------------------------------------')
-    print('Creating Build Files')
-    print('--------------------------------------------------------------------------------------------------')
-
-    build_files = {}
-    for container_id in deployment_containers:
-        ecs_service_name = to_camel_case(container_id)
-        print(f'Creating Build File: {ecs_service_name}')
-        image = '{repository_url}/{container_id}:{github_sha}'.format(
-            repository_url=repository_url,
-            container_id=deployment_configuration.get_image(environment_id, container_id),
-            github_sha=github_sha
-        )
-        build_files[container_id] = DockerCompose.create_build_file(
-            context=GitHub.get_repository_root(),
-            container_id=container_id,
-            environment_id=environment_id,
-            target=deployment_configuration.get_target(environment_id, container_id),
-            dockerfile=deployment_configuration.get_container_filename(environment_id, container_id),
-            image=image
-        )
-        print('Created: {ecs_service_name} ({filename})'.format(
-            ecs_service_name=ecs_service_name,
-            filename=build_files[container_id]
-        ))
+    return 'Running tasks already use image digest {image_digest}'.format(image_digest=image_digest)
 
-    # Start building and deploying the containers
-    # Build each container locally
-    built_images = []
-    for container_id in deployment_containers:
-        ecs_service_name = to_camel_case(container_id)
-        image = '{repository_url}/{container_id}:{github_sha}'.format(
-            repository_url=repository_url,
-            container_id=deployment_configuration.get_image(environment_id, container_id),
-            github_sha=github_sha
-        )
-        if image in built_images:
-            print(f'Skipping Duplicate Image: {image}')
-            continue
-        built_images.append(image)
-        print('--------------------------------------------------------------------------------------------------')
-        print('Building {ecs_service_name} Docker Container'.format(ecs_service_name=ecs_service_name))
-        print('--------------------------------------------------------------------------------------------------')
-        stdout, stderr = DockerCompose.build(build_files[container_id])
-        print()
-        print(stdout)
-        print()
 
-    # Push each container to ECR repository
-    print('--------------------------------------------------------------------------------------------------')
-    print('Pushing Docker Containers To ECR')
-    print('--------------------------------------------------------------------------------------------------')
-    pushed_images = []
-    for container_id in deployment_containers:
-        ecs_service_name = to_camel_case(container_id)
-        image = '{repository_url}/{container_id}:{github_sha}'.format(
-            repository_url=repository_url,
-            container_id=deployment_configuration.get_image(environment_id, container_id),
-            github_sha=github_sha
-        )
-        if image in pushed_images:
-            print(f'Skipping Duplicate Image: {image}')
-            continue
-        pushed_images.append(image)
-        print('Pushing: {ecs_service_name} ({repository_url})'.format(
-            ecs_service_name=ecs_service_name,
-            repository_url=repository_url
-        ))
-        Docker.login(
-            repository_url=repository_url,
-            username='AWS',
-            password=AwsCli.ecr_get_login_password(deployment_configuration.get_aws_deployment_region(environment_id))
-        )
-        DockerCompose.push(build_files[container_id])
+def deploy_ecs(
+        environment: EnvironmentConfiguration,
+        deployment_containers: List[str],
+        session: Optional[Session] = None,
+        preflight: Optional[Preflight] = None,
+        history: Optional[DurationHistory] = None
+) -> None:
+    """
+    Update the ECS services of the deployment containers to the newly pushed images, rolling back on failure
+    :param environment: Configuration of the environment being deployed
+    :param deployment_containers: The container IDs being deployed
+    :param session: Optional AWS session, a default session is created if not supplied
+    :param preflight: Optional preflight started earlier, the preflight is run now if not supplied
+    :param history: Optional duration history the rollout durations are recorded in
+    """
+    # Services, task definitions and secrets are loaded by the preflight, usually while the images were being built
+    if preflight is None:
+        preflight = Preflight(environment=environment, container_ids=deployment_containers, session=session)
+    preflight.join()
 
     # Update ECS services
     print('--------------------------------------------------------------------------------------------------')
     print('Updating ECS Containers')
     print('--------------------------------------------------------------------------------------------------')
 
-    ecs_client = Ecs.Client()
-    ssm_client = Ssm.Client()
-    cloud_watch_client = CloudWatch.Client()
-    ecs_cluster_name = deployment_configuration.get_aws_deployment_cluster_name(environment_id)
-    ecs_task_definitions = {}
-    ecs_service_rollbacks_required = []
-    ecs_task_definition_rollbacks_required = []
+    ecs_client = Ecs.Client(session=session)
+    ecr_client = Ecr.Client(session=session)
+    elbv2_client = Elbv2.Client(session=session)
+    cloud_watch_client = CloudWatch.Client(session=session)
+    ecs_cluster_name = environment.aws_deployment_cluster_name
+    ecs_services = preflight.services
+    ecs_task_definitions = preflight.task_definitions
+    rollback = Rollback(ecs_client=ecs_client, cluster_name=ecs_cluster_name)
+    diagnostics = Diagnostics(
+        ecs_client=ecs_client,
+        cloud_watch_client=cloud_watch_client,
+        cluster_name=ecs_cluster_name
+    )
+    task_runner = TaskRunner(
+        ecs_client=ecs_client,
+        cloud_watch_client=cloud_watch_client,
+        diagnostics=diagnostics,
+        cluster_name=ecs_cluster_name
+    )
     ssm_image_rollbacks_required = []
 
-    print('Retrieving latest task definitions for each service...')
-    task_definition_arns = ecs_client.list_task_definitions_by_service_name()
-    for ecs_service_name, task_definition_arn in task_definition_arns.items():
-        print(f'{ecs_service_name}: {task_definition_arn}')
-
-    # Validate the all required ECS services were found and retrieve the deployed task definition for each service
-    ecs_services = ecs_client.get_services_by_name(cluster=ecs_cluster_name)
-    for container_id in deployment_containers:
-        ecs_service_name = to_camel_case(container_id)
-        if ecs_service_name not in ecs_services.keys():
-            raise Exception('Could not locate required ECS service ({ecs_service_name})'.format(ecs_service_name=ecs_service_name))
-
-        # If there is no active task definition, raise an exception
-        if ecs_service_name not in task_definition_arns.keys():
-            raise Exception('No active task definition found for service ({ecs_service_name}). Please contact the DevOps team to resolve this issue.'.format(ecs_service_name=ecs_service_name))
-        print('Loading existing task definition: {task_definition_arn}'.format(task_definition_arn=task_definition_arns[ecs_service_name]))
-        ecs_task_definitions[ecs_service_name] = ecs_client.get_task_definition(task_definition_arns[ecs_service_name])
-
     try:
         waiting = []
+        running = []
         for container_id in deployment_containers:
-            parameters = ssm_client.get_parameters_by_path(recursive=True)
-            secrets = []
-            for parameter in parameters:
-                if '/Env/' in parameter:
-                    parameter = parameter.strip('/')
-                    secrets.append(f'{secret_prefix}{parameter}')
-
-            ecs_service_name = to_camel_case(container_id)
+            container_configuration = environment.get_container(container_id)
+            ecs_service_name = container_configuration.service_name
+            secrets = preflight.secrets[container_id]
+
             ecs_service = ecs_services[ecs_service_name]
 
             # Retrieve the original image URL
@@ -216,115 +151,98 @@ try:
             if original_image is None:
                 raise Exception('No existing image could be found for the service')
 
-            # Construct new image name
-            new_image = '{repository_url}/{container_id}:{github_sha}'.format(
-                repository_url=repository_url,
-                container_id=deployment_configuration.get_image(environment_id, container_id),
-                github_sha=github_sha
-            )
+            new_image = container_configuration.image_url
             print('New container image: {new_image}'.format(new_image=new_image))
 
-            # If the new and old images are the same, skip this update- nothing has changed
-            if original_image == new_image:
-                print('Updating: {ecs_service_name} (Skipped- Container image has not changed)'.format(ecs_service_name=ecs_service_name))
+            # Pin the task definition to the pushed manifest digest so ECS does not resolve the tag on every launch
+            image_digest = ecr_client.get_image_digest(container_configuration.image, environment.image_tag)
+            if image_digest is not None:
+                new_image = '{repository_url}/{image}@{image_digest}'.format(
+                    repository_url=environment.repository_url,
+                    image=container_configuration.image,
+                    image_digest=image_digest
+                )
+                print('New container image digest: {image_digest}'.format(image_digest=image_digest))
+
+            task_definition_arn = None
+            original_settings = None
+            skip_reason = get_skip_reason(
+                ecs_client=ecs_client,
+                cluster_name=ecs_cluster_name,
+                service_name=ecs_service_name,
+                task_definition=ecs_task_definitions[ecs_service_name],
+                original_image=original_image,
+                image_url=container_configuration.image_url,
+                new_image=new_image,
+                image_digest=image_digest,
+                secrets=secrets
+            )
+            if skip_reason is not None:
+                print('Updating: {ecs_service_name} (Skipped- {skip_reason})'.format(ecs_service_name=ecs_service_name, skip_reason=skip_reason))
             else:
                 print('Updating: {ecs_service_name}'.format(ecs_service_name=ecs_service_name))
-                ecs_service_rollbacks_required.append(ecs_service_name)
-                task_definition_arn = ecs_client.update_service_container(
+
+                # Rollout settings only apply to this deployment, keep the original settings so they can be restored
+                rollout_settings = {}
+                if container_configuration.rollout is not None:
+                    rollout_settings = container_configuration.rollout.get_settings(ecs_service)
+                    original_settings = container_configuration.rollout.get_original_settings(ecs_service)
+                    print('Rollout settings: {settings}'.format(settings=rollout_settings))
+
+                rollback.add_service(
+                    service_name=ecs_service_name,
+                    task_definition_arn=ecs_service['taskDefinition'],
+                    settings=original_settings
+                )
+                task_definition, registered = ecs_client.update_service_container(
                     secrets=secrets,
                     cluster_name=ecs_cluster_name,
                     service_name=ecs_service_name,
                     container_name=ecs_service_name,
                     task_definition_arn=ecs_task_definitions[ecs_service_name]['taskDefinitionArn'],
-                    image=new_image
+                    image=new_image,
+                    circuit_breaker=container_configuration.circuit_breaker,
+                    task_definition=ecs_task_definitions[ecs_service_name],
+                    **rollout_settings
                 )
+                task_definition_arn = task_definition['taskDefinitionArn']
 
                 print('New Task Definition ARN: {task_definition_arn}'.format(task_definition_arn=task_definition_arn))
-                ecs_task_definition_rollbacks_required.append(task_definition_arn)
+
+                # Only revisions registered by this deployment are deregistered by a rollback
+                if registered is True:
+                    rollback.add_task_definition(task_definition_arn)
+                    # The new revision is the latest revision of the family the next deployment starts from
+                    preflight.cache_task_definition(ecs_service_name, task_definition)
 
                 suppress_line = False
 
-            if deployment_configuration.is_wait_service_stable_required(environment_id=environment_id, container_id=container_id):
+            if container_configuration.wait_service_stable is True:
                 waiting.append({
+                    'container_id': container_id,
+                    'started': time.perf_counter(),
                     'ecs_service_name': ecs_service_name,
-                    'ecs_cluster_name': ecs_cluster_name
+                    'ecs_cluster_name': ecs_cluster_name,
+                    'task_definition_arn': task_definition_arn,
+                    'max_failed_tasks': container_configuration.max_failed_tasks,
+                    'original_settings': original_settings,
+                    'wait_target_health': container_configuration.wait_target_health
                 })
 
             # Regardless of whether the image has changed, always run the task if requested
-            if deployment_configuration.is_container_run_required(environment_id=environment_id, container_id=container_id):
-                print('Executing: {ecs_service_name}'.format(ecs_service_name=ecs_service_name))
-                task_arns = ecs_client.run_task_from_service(
-                    cluster_name=ecs_cluster_name,
-                    service_name=ecs_service_name,
-                    count=1
-                )
-
-                for task_arn in task_arns:
-                    print('Executing Task ARN: {task_arn}'.format(task_arn=task_arn))
-
-                if len(task_arns) > 0:
-                    print('Waiting For Task To Finish: {ecs_service_name}'.format(ecs_service_name=ecs_service_name))
-                    wait_result = ecs_client.wait_tasks_stopped(
-                        cluster_name=ecs_cluster_name,
-                        task_arns=task_arns
-                    )
-
-                    # Search for CloudWatch log output
-                    print('--------------------------------------------------------------------------------------------------')
-                    print('Loading Execution Logs')
-                    print('--------------------------------------------------------------------------------------------------')
-                    try:
-                        found = False
-                        for container in ecs_task_definitions[ecs_service_name]['containerDefinitions']:
-                            if container['name'] == ecs_service_name:
-                                found = True
-                                # Display the log output
-                                log_group_name = container['logConfiguration']['options']['awslogs-group']
-                                log_stream_prefix = container['logConfiguration']['options']['awslogs-stream-prefix']
-                                events = cloud_watch_client.get_log_events(
-                                    log_group_name=log_group_name,
-                                    log_stream_prefix=log_stream_prefix,
-                                    task_arn=task_arns[0]
-                                )
-
-                                for event in events:
-                                    print('{timestamp}: {message}'.format(
-                                        timestamp=datetime.fromtimestamp(event['timestamp'] / 1000),
-                                        message=event['message']
-                                    ))
-
-                        if found is False:
-                            raise Exception('Could not locate CloudWatch log configuration')
-                    except Exception as exception:
-                        print(exception)
-                        print('WARNING: Failed to locate CloudWatch logs for the task. This is most likely caused by the ECS task failing to start- please refer to ECS stopped tasks lists for more information')
-                    suppress_line = True
-                    print('--------------------------------------------------------------------------------------------------')
-
-                    # Retrieve the exit code for the container
-                    task = ecs_client.get_task(
-                        cluster_name=ecs_cluster_name,
-                        task_arn=task_arns[0]
-                    )
-
-                    # Search for the container inside the task
-                    found = False
-                    for container in task['containers']:
-                        if container['name'] == ecs_service_name:
-                            found = True
-                            if 'exitCode' in container.keys():
-                                if container['exitCode'] != 0:
-                                    raise Exception('Non-zero exit code ({exit_code}) returned from container'.format(
-                                        exit_code=container['exitCode']
-                                    ))
-                            else:
-                                raise Exception('No exit code found for container. This is most likely caused by the ECS task failing to start- please refer to ECS stopped tasks lists for more information')
-
-                    # If we couldn't find the exit code, something went wrong
-                    if found is False:
-                        raise Exception('Could not locate expected container result in task description')
-                else:
-                    raise Exception('Failed to start task')
+            if container_configuration.run_during_deployment is True:
+                running.append(container_configuration)
+
+            # Run-once containers listed next to each other in the same run group are independent, start their tasks
+            # together once the last of them has been updated. Other run-once tasks run in order, on their own
+            index = deployment_containers.index(container_id)
+            if index + 1 < len(deployment_containers) and len(running) > 0 and container_configuration.run_group is not None:
+                next_configuration = environment.get_container(deployment_containers[index + 1])
+                if next_configuration.run_during_deployment is True and next_configuration.run_group == container_configuration.run_group:
+                    continue
+            if len(running) > 0:
+                task_runner.run(containers=running, task_definitions=ecs_task_definitions)
+                running = []
 
             print('--------------------------------------------------------------------------------------------------')
 
@@ -332,11 +250,30 @@ try:
                 ecs_service_name = task['ecs_service_name']
                 ecs_cluster_name = task['ecs_cluster_name']
                 print('Waiting for service to stabilize: {ecs_service_name}'.format(ecs_service_name=ecs_service_name))
-                ecs_client.wait_services_stable(
-                    cluster_name=ecs_cluster_name,
-                    services=[ecs_service_name]
-                )
+                if history is not None and history.get_estimate(environment.environment_id, task['container_id'], 'rollout') is not None:
+                    print('Expected rollout duration: {seconds:.0f}s'.format(seconds=history.get_estimate(environment.environment_id, task['container_id'], 'rollout')))
+                try:
+                    RolloutMonitor(ecs_client=ecs_client, cluster_name=ecs_cluster_name, elbv2_client=elbv2_client).wait(
+                        service_name=ecs_service_name,
+                        task_definition_arn=task['task_definition_arn'],
+                        max_failed_tasks=task['max_failed_tasks'],
+                        wait_target_health=task['wait_target_health']
+                    )
+                except Exception as exception:
+                    Diagnostics.print_report(diagnostics.collect_service(ecs_service_name))
+                    raise exception
                 print('Service stabilized')
+                if history is not None and task['task_definition_arn'] is not None:
+                    history.record(environment.environment_id, task['container_id'], 'rollout', time.perf_counter() - task['started'])
+
+                # Restore the settings the service had before the rollout (e.g. scale back in)
+                if task['original_settings'] is not None:
+                    print('Restoring service settings: {settings}'.format(settings=task['original_settings']))
+                    ecs_client.update_service_settings(
+                        cluster_name=ecs_cluster_name,
+                        service_name=ecs_service_name,
+                        **task['original_settings']
+                    )
 
                 # Search for CloudWatch log output
                 running_task_arns = ecs_client.list_running_task_arns(
@@ -373,16 +310,19 @@ try:
                         raise Exception('Could not locate CloudWatch log configuration')
                 except Exception as exception:
                     print(exception)
-                    print('WARNING: Failed to locate CloudWatch logs for the task. This is most likely caused by the ECS task failing to start- please refer to ECS stopped tasks lists for more information')
+                    print('WARNING: Failed to locate CloudWatch logs for the task. This is most likely caused by the ECS task failing to start')
 
                 suppress_line = True
                 print('--------------------------------------------------------------------------------------------------')
 
+            # Each service only needs to be waited on once
+            waiting = []
+
         # Update the SSM parameters used by Terraform with latest deployed tags
         #         print('Updating Terraform SSM Image Tags')
         #         print('--------------------------------------------------------------------------------------------------')
         #         for container_id in deployment_containers:
-        #             ecs_service_name = to_camel_case(container_id)
+        #             ecs_service_name = environment.get_container(container_id).service_name
         #             path = '/Terraform/ECS/Tag/{ecs_service_name}'.format(ecs_service_name=ecs_service_name)
         #             original_value = ssm_client.get_parameter(path=path)
         #             print('Updating SSM Image Tag: {path} ({github_sha})'.format(
@@ -402,63 +342,425 @@ try:
 
     except Exception as exception:
         # If there were an services that successfully updated, or where updated were attempted- roll them back
-        if len(ecs_service_rollbacks_required) > 0:
-            print('--------------------------------------------------------------------------------------------------')
-            print('Rolling Back Containers')
-            print('--------------------------------------------------------------------------------------------------')
+        # together and deregister the task definitions that were registered for them
+        if rollback.execute() is False:
+            print('FATAL ERROR: Rollback did not complete successfully, please check the state of the ECS services')
+
+        #         if len(ssm_image_rollbacks_required) > 0:
+        #             print('--------------------------------------------------------------------------------------------------')
+        #             print('Rolling Back Terraform SSM Image Tags')
+        #             print('--------------------------------------------------------------------------------------------------')
+        #             for ssm_image in ssm_image_rollbacks_required:
+        #                 print('Reverting: {path}'.format(path=ssm_image['path']))
+        #                 ssm_client.put_parameter(
+        #                     path=ssm_image["path"],
+        #                     value=ssm_image["value"],
+        #                     secure=False,
+        #                     allow_overwrite=True
+        #                 )
 
-            for ecs_service_name in ecs_service_rollbacks_required:
-                # Roll back inside a try/except block to allow us to continue in the face of errors
-                try:
-                    original_image = None
-                    for container_definition in ecs_task_definitions[ecs_service_name]['containerDefinitions']:
-                        if container_definition['name'] == ecs_service_name:
-                            original_image = container_definition['image']
-
-                    # If there is no existing image do not proceed
-                    if original_image is None:
-                        raise Exception('Could not locate original image')
-
-                    print('Rolling back "{ecs_service_name}" service image: {original_image}'.format(
-                        ecs_service_name=ecs_service_name,
-                        original_image=original_image
-                    ))
-                    ecs_client.update_service_container(
-                        cluster_name=ecs_cluster_name,
-                        service_name=ecs_service_name,
-                        container_name=ecs_service_name,
-                        task_definition_arn=ecs_task_definitions[ecs_service_name]['taskDefinitionArn'],
-                        image=original_image
-                    )
-                except Exception as exception_rollback:
-                    print('FATAL ERROR: Rollback failed with exception error- attempting to continue rollback')
-                    print(exception_rollback)
+        raise Exception(exception)
 
-        # If there were an services that successfully updated, or where updated were attempted- roll them back
-        if len(ecs_task_definition_rollbacks_required) > 0:
+
+def build_and_push_images(
+        environment: EnvironmentConfiguration,
+        deployment_containers: List[str],
+        prefetcher: Optional[ImagePrefetcher] = None,
+        history: Optional[DurationHistory] = None,
+        state: Optional[DaemonState] = None
+) -> None:
+    """
+    Build the image of each deployment container and push it to the ECR repository
+    :param environment: Configuration of the environment being deployed
+    :param deployment_containers: The container IDs being deployed
+    :param prefetcher: Optional prefetcher used to pull the base images of the Dockerfiles before they are built
+    :param history: Optional duration history used to start the slowest builds first (parallel and pipelined build
+                    schedules only), build and push durations are recorded in it
+    :param state: Optional state of the deploy daemon, the ECR login is reused until it expires
+    """
+    # Create 'docker-compose.yml' file for each container
+    print('--------------------------------------------------------------------------------------------------')
+    print('Creating Build Files')
+    print('--------------------------------------------------------------------------------------------------')
+
+    build_files = {}
+    for container_id in deployment_containers:
+        container_configuration = environment.get_container(container_id)
+        print(f'Creating Build File: {container_configuration.service_name}')
+        build_files[container_id] = DockerCompose.create_build_file(
+            context=environment.repository_root,
+            container_id=container_id,
+            environment_id=environment.environment_id,
+            target=container_configuration.target,
+            dockerfile=container_configuration.dockerfile,
+            image=container_configuration.image_url
+        )
+        print('Created: {ecs_service_name} ({filename})'.format(
+            ecs_service_name=container_configuration.service_name,
+            filename=build_files[container_id]
+        ))
+
+    # Start building and deploying the containers
+    # Each image is only built and pushed once, even when it is shared by several containers
+    image_containers = {}
+    for container_id in deployment_containers:
+        image = environment.get_container(container_id).image_url
+        if image in image_containers.keys():
+            print(f'Skipping Duplicate Image: {image}')
+            continue
+        image_containers[image] = container_id
+
+    # Start pulling the images each Dockerfile is built from, each build only waits for its own base images
+    base_images = {}
+    if prefetcher is not None:
+        for image, container_id in image_containers.items():
+            base_images[image] = Docker.get_base_images(
+                dockerfile=environment.get_container(container_id).dockerfile,
+                build_args={
+                    'AWS_ECS_TASK_NAME': container_id,
+                    'AWS_ENVIRONMENT': environment.environment_id
+                }
+            )
+            print('Base Images ({container_id}): {base_images}'.format(container_id=container_id, base_images=', '.join(base_images[image])))
+            prefetcher.prefetch(base_images[image])
+
+    def build_image(image: str) -> None:
+        ecs_service_name = environment.get_container(image_containers[image]).service_name
+        print('--------------------------------------------------------------------------------------------------')
+        print('Building {ecs_service_name} Docker Container'.format(ecs_service_name=ecs_service_name))
+        print('--------------------------------------------------------------------------------------------------')
+        if prefetcher is not None:
+            prefetcher.wait(base_images[image])
+        stdout, stderr = DockerCompose.build(build_files[image_containers[image]])
+        print()
+        print(stdout)
+        print()
+
+    def push_image(image: str) -> None:
+        print('Pushing: {ecs_service_name} ({repository_url})'.format(
+            ecs_service_name=environment.get_container(image_containers[image]).service_name,
+            repository_url=environment.repository_url
+        ))
+        DockerCompose.push(build_files[image_containers[image]])
+
+    def login() -> None:
+        # Push each container to ECR repository
+        print('--------------------------------------------------------------------------------------------------')
+        print('Pushing Docker Containers To ECR')
+        print('--------------------------------------------------------------------------------------------------')
+        if state is not None and state.is_logged_in(environment.repository_url):
+            print('Using existing ECR login: {repository_url}'.format(repository_url=environment.repository_url))
+            return
+        Docker.login(
+            repository_url=environment.repository_url,
+            username='AWS',
+            password=AwsCli.ecr_get_login_password(environment.aws_deployment_region)
+        )
+        if state is not None:
+            state.set_logged_in(environment.repository_url)
+
+    build_schedule = os.environ.get('BUILD_SCHEDULE', 'sequential')
+    print(f'Build Schedule: {build_schedule}')
+    scheduler = BuildScheduler(
+        strategy=build_schedule,
+        max_workers=int(os.environ.get('BUILD_CONCURRENCY', '4'))
+    )
+
+    # Start the images that took longest to build and push in previous deployments first, the sequential build
+    # schedule keeps the configured order as its total duration does not depend on the order
+    images = list(image_containers.keys())
+    if history is not None:
+        estimates = {
+            image: {step: history.get_estimate(environment.environment_id, container_id, step) for step in ['build', 'push']}
+            for image, container_id in image_containers.items()
+        }
+        images = scheduler.order(images, estimates)
+        for image in images:
+            print('Build Order: {container_id} (build: {build}, push: {push})'.format(
+                container_id=image_containers[image],
+                build='{seconds:.0f}s'.format(seconds=estimates[image]['build']) if estimates[image]['build'] is not None else 'unknown',
+                push='{seconds:.0f}s'.format(seconds=estimates[image]['push']) if estimates[image]['push'] is not None else 'unknown'
+            ))
+        estimated = scheduler.estimate(images, estimates)
+        if estimated is not None:
+            print('Estimated build completion: {completion} ({seconds:.0f}s)'.format(
+                completion=(datetime.now() + timedelta(seconds=estimated)).strftime('%H:%M:%S'),
+                seconds=estimated
+            ))
+
+    durations = scheduler.run(
+        images=images,
+        build=build_image,
+        push=push_image,
+        before_push=login
+    )
+    if history is not None:
+        for image, steps in durations.items():
+            for step, seconds in steps.items():
+                history.record(environment.environment_id, image_containers[image], step, seconds)
+
+
+def main(state: Optional[DaemonState] = None) -> None:
+    """
+    Build, push and deploy the containers of the selected environment
+    :param state: Optional state of the deploy daemon, kept warm between deployments
+    """
+    recorder = None
+    prefetcher = ImagePrefetcher()
+    history = None
+    cache = None
+    lock = None
+    collector = None
+    try:
+        print('--------------------------------------------------------------------------------------------------')
+        print('ECS Deployment Tool')
+        print('--------------------------------------------------------------------------------------------------')
+        print()
+
+        # Validate GitHub workspace was configured
+        print('Checking workspace')
+        if 'GITHUB_WORKSPACE' not in os.environ.keys():
+            raise Exception('No GITHUB_WORKSPACE was specified, please ensure GITHUB_WORKSPACE environment variable has been set')
+
+        # Change into the repository root folder
+        os.chdir(os.environ['GITHUB_WORKSPACE'])
+
+        # If a base image is required login to the Docker repository and start pulling the image straight away
+        base_image_variables = [
+            'DOCKER_BASE_IMAGE_REPOSITORY',
+            'DOCKER_BASE_IMAGE_REPOSITORY_USERNAME',
+            'DOCKER_BASE_IMAGE_REPOSITORY_PASSWORD',
+            'DOCKER_BASE_IMAGE'
+        ]
+        if 'DEPLOY_REPLAY' not in os.environ.keys() and all(os.environ.get(variable, '') != '' for variable in base_image_variables):
+            base_image_repository = os.environ['DOCKER_BASE_IMAGE_REPOSITORY']
+            print('Prefetching base image: {base_image_repository}/{base_image}'.format(
+                base_image_repository=base_image_repository,
+                base_image=os.environ['DOCKER_BASE_IMAGE']
+            ))
+            prefetcher.login(lambda: Docker.login(
+                repository_url=base_image_repository,
+                username=os.environ['DOCKER_BASE_IMAGE_REPOSITORY_USERNAME'],
+                password=os.environ['DOCKER_BASE_IMAGE_REPOSITORY_PASSWORD']
+            ))
+            prefetcher.prefetch(['{base_image_repository}/{base_image}'.format(
+                base_image_repository=base_image_repository,
+                base_image=os.environ['DOCKER_BASE_IMAGE']
+            )])
+
+        # Validate required environment variables are set
+        print('Checking environment')
+        if 'ENVIRONMENT' not in os.environ.keys():
+            raise Exception('No deployment environment was specified, please ensure ENVIRONMENT action variable has been set')
+
+        # Validate the GitHub SHA was supplied
+        print('Checking image tag')
+        if 'IMAGE_TAG' not in os.environ.keys():
+            raise Exception('No ECR image tag was specified, please ensure IMAGE_TAG action variable has been set')
+
+        # Load deployment configuration
+        path_repository_root = GitHub.get_repository_root()
+        print('GitHub repository root: {path_repository_root}')
+        deployment_configuration_filename = '{path_repository_root}/.github/deploy.yml'.format(
+            path_repository_root=path_repository_root
+        )
+
+        print('Creating deployment configuration file')
+        deployment_configuration = ConfigurationFile(deployment_configuration_filename, repository_root=path_repository_root)
+        environment_id = os.environ['ENVIRONMENT']
+        print(f'Environment: {environment_id}')
+        github_sha = os.environ['IMAGE_TAG']
+        print(f'GitHub SHA: {github_sha}')
+        environment = deployment_configuration.get_environment(environment_id, image_tag=github_sha)
+        print(f'AWS Account ID: {environment.aws_account_id}')
+        deployment_containers = environment.get_container_names()
+        print(f'Deployment Containers: {deployment_containers}')
+        print(f'Repository URL: {environment.repository_url}')
+        print(f'Secret Prefix: {environment.secret_prefix}')
+
+        # If a specific deployment container was specified, make sure it exists
+        print('Checking deploy container')
+        if 'DEPLOY_CONTAINER' in os.environ.keys():
+            selected_container = os.environ['DEPLOY_CONTAINER']
+            print(f'Checking: {selected_container}')
+            if selected_container not in deployment_containers:
+                raise Exception('The requested container ({selected_container}) did not exist in the environment'.format(selected_container=selected_container))
+            # Just truncate to the single container
+            deployment_containers = [os.environ['DEPLOY_CONTAINER']]
+
+        # Record or replay the AWS API traffic of the deployment when requested
+        # Recorded and replayed deployments need a session of their own
+        if state is not None and 'DEPLOY_RECORD' not in os.environ.keys() and 'DEPLOY_REPLAY' not in os.environ.keys():
+            session = state.get_session(region_name=environment.aws_deployment_region)
+        else:
+            session = Session(region_name=environment.aws_deployment_region)
+        if 'DEPLOY_RECORD' in os.environ.keys():
+            print('Recording AWS API traffic: {filename}'.format(filename=os.environ['DEPLOY_RECORD']))
+            recorder = Recorder()
+            session.add_hook(recorder)
+        if 'DEPLOY_REPLAY' in os.environ.keys():
+            session.add_hook(Replayer(
+                cassette=Cassette.load(os.environ['DEPLOY_REPLAY']),
+                time_scale=float(os.environ.get('DEPLOY_REPLAY_TIME_SCALE', '1.0'))
+            ))
+
+        # Serialize the deployments of the cluster and environment, an older queued deployment exits as soon as a newer
+        # deployment is queued so only the newest commit is rolled out
+        if os.environ.get('DEPLOY_LOCK', '') != '':
             print('--------------------------------------------------------------------------------------------------')
-            print('Deregistering Task Definitions')
+            print('Acquiring Deploy Lock')
             print('--------------------------------------------------------------------------------------------------')
+            # Deployments are ordered by their workflow run number, re-running an older workflow keeps its run number so
+            # it never supersedes the deployment of a newer commit. Wall-clock time would let it do so
+            sequence = os.environ.get('DEPLOY_LOCK_SEQUENCE', os.environ.get('GITHUB_RUN_NUMBER', ''))
+            if sequence == '':
+                raise Exception('DEPLOY_LOCK_SEQUENCE or GITHUB_RUN_NUMBER must be set to order the deployments sharing the deploy lock')
+            print('Deploy Lock Sequence: {sequence}'.format(sequence=sequence))
+            lock = DeployLock(
+                backend=DeployLock.get_backend(os.environ['DEPLOY_LOCK'], session=session),
+                name='{cluster_name}/{environment_id}'.format(cluster_name=environment.aws_deployment_cluster_name, environment_id=environment_id),
+                owner='{run_id}/{hostname}/{pid}'.format(run_id=os.environ.get('GITHUB_RUN_ID', 'local'), hostname=socket.gethostname(), pid=os.getpid()),
+                image_tag=github_sha,
+                sequence=float(sequence),
+                lease_seconds=float(os.environ.get('DEPLOY_LOCK_LEASE', '120')),
+                max_wait=float(os.environ['DEPLOY_LOCK_TIMEOUT']) if os.environ.get('DEPLOY_LOCK_TIMEOUT', '') != '' else None
+            )
+            if lock.acquire() is False:
+                print('A newer deployment will deploy the changes, nothing to deploy')
+                return
 
-            for task_definition_arn in ecs_task_definition_rollbacks_required:
-                print('Deregistering: {task_definition_arn}'.format(task_definition_arn=task_definition_arn))
-                ecs_client.deregister_task_definition(task_definition_arn=task_definition_arn)
-
-            #         if len(ssm_image_rollbacks_required) > 0:
-            #             print('--------------------------------------------------------------------------------------------------')
-            #             print('Rolling Back Terraform SSM Image Tags')
-            #             print('--------------------------------------------------------------------------------------------------')
-            #             for ssm_image in ssm_image_rollbacks_required:
-            #                 print('Reverting: {path}'.format(path=ssm_image['path']))
-            #                 ssm_client.put_parameter(
-            #                     path=ssm_image["path"],
-            #                     value=ssm_image["value"],
-            #                     secure=False,
-            #                     allow_overwrite=True
-            #                 )
+        # Only deploy the containers with changes since the commit they are running, unless a container was selected
+        if 'DEPLOY_CONTAINER' not in os.environ.keys():
+            print('--------------------------------------------------------------------------------------------------')
+            print('Detecting Changed Containers')
+            print('--------------------------------------------------------------------------------------------------')
+            deployment_containers = ChangeDetector(ecs_client=Ecs.Client(session=session), environment=environment).get_affected_containers(
+                container_ids=deployment_containers,
+                head_sha=github_sha
+            )
+            print(f'Affected Containers: {deployment_containers}')
+            if len(deployment_containers) == 0:
+                print('No containers were affected by the changes, nothing to deploy')
+                return
+
+        # Only the containers being deployed need a Dockerfile
+        environment.validate(deployment_containers)
+
+        # Load and validate the AWS resources while the images are built, stopping the build if the checks fail
+        def stop_build(exception: Exception) -> None:
+            print('Preflight checks failed, stopping the build: {exception}'.format(exception=exception))
+            CommandRunner.get_default().terminate()
+
+        # Discovery results of previous deployments, the file can be restored and saved with the GitHub Actions cache
+        # The daemon keeps the cache of each cluster in memory between deployments
+        if state is not None:
+            cache = state.get_discovery_cache(
+                filename=os.environ.get('DEPLOY_DISCOVERY_CACHE'),
+                account_id=environment.aws_account_id,
+                region=environment.aws_deployment_region,
+                cluster_name=environment.aws_deployment_cluster_name
+            )
+        else:
+            cache = DiscoveryCache(
+                filename=os.environ.get('DEPLOY_DISCOVERY_CACHE'),
+                account_id=environment.aws_account_id,
+                region=environment.aws_deployment_region,
+                cluster_name=environment.aws_deployment_cluster_name
+            )
+        preflight = Preflight(
+            environment=environment,
+            container_ids=deployment_containers,
+            session=session,
+            cache=cache,
+            max_parameter_age=float(os.environ.get('DEPLOY_DISCOVERY_CACHE_MAX_AGE', '600'))
+        )
+        preflight.start(on_failure=stop_build)
+
+        # Remove old task definition revisions in the background while the images are built, every listing of the
+        # active task definitions pays for the revisions that are never cleaned up. Revisions used by the services
+        # (including the revisions rolled back to) and the most recent revisions are kept
+        if os.environ.get('TASK_DEFINITION_RETENTION', '') != '':
+            print('Removing old task definitions in the background')
+            collector = TaskDefinitionCollector(
+                ecs_client=Ecs.Client(session=session),
+                cluster_name=environment.aws_deployment_cluster_name,
+                keep=int(os.environ['TASK_DEFINITION_RETENTION'])
+            )
+            collector.start(families=[environment.get_container(container_id).service_name for container_id in environment.get_container_names()])
+
+        # Durations of previous deployments, the file can be restored and saved with the GitHub Actions cache
+        if state is not None:
+            history = state.get_duration_history(filename=os.environ.get('DEPLOY_DURATION_HISTORY'))
+        else:
+            history = DurationHistory(filename=os.environ.get('DEPLOY_DURATION_HISTORY'))
+
+        # Replayed deployments use the images that were pushed when the traffic was recorded
+        if 'DEPLOY_REPLAY' in os.environ.keys():
+            print('Skipping Docker build and push, replaying: {filename}'.format(filename=os.environ['DEPLOY_REPLAY']))
+        else:
+            try:
+                build_and_push_images(
+                    environment=environment,
+                    deployment_containers=deployment_containers,
+                    prefetcher=prefetcher,
+                    history=history,
+                    state=state
+                )
+            except Exception as exception:
+                # Report the cause of a stopped build rather than the stopped build itself
+                preflight.join()
+                raise exception
+
+        # The lease may have been taken over while a slow build was running
+        if lock is not None and lock.is_held() is False:
+            raise Exception('The deploy lock was lost, another deployment may be updating the cluster')
+
+        deploy_ecs(
+            environment=environment,
+            deployment_containers=deployment_containers,
+            session=session,
+            preflight=preflight,
+            history=history
+        )
 
-        raise Exception(exception)
+        # Give the old task definition revisions the remaining cleanup time once the deployment has succeeded
+        if collector is not None:
+            print('--------------------------------------------------------------------------------------------------')
+            print('Removing Old Task Definitions')
+            print('--------------------------------------------------------------------------------------------------')
+            collector.join(timeout=float(os.environ.get('TASK_DEFINITION_CLEANUP_TIMEOUT', '300')))
 
-except Exception as exception:
-    print('FATAL ERROR: {exception}'.format(exception=exception))
-    exit(1)
+    except Exception as exception:
+        print('FATAL ERROR: {exception}'.format(exception=exception))
+        exit(1)
+    finally:
+        prefetcher.shutdown()
+        # A failed deployment stops the cleanup straight away
+        if collector is not None:
+            collector.join(timeout=0)
+        if lock is not None:
+            lock.release()
+        if history is not None:
+            history.save()
+        if cache is not None:
+            cache.save()
+        if recorder is not None:
+            recorder.save(os.environ['DEPLOY_RECORD'])
+
+
+if __name__ == '__main__':
+    # Run as a long running daemon on self-hosted runners, receiving deploy requests over HTTP or from a queue directory
+    if os.environ.get('DEPLOY_DAEMON_LISTEN', '') != '' or os.environ.get('DEPLOY_DAEMON_QUEUE', '') != '':
+        DeployDaemon(deploy=main, log_directory=os.environ.get('DEPLOY_DAEMON_LOGS') or None).run(
+            listen=os.environ.get('DEPLOY_DAEMON_LISTEN') or None,
+            queue_directory=os.environ.get('DEPLOY_DAEMON_QUEUE') or None
+        )
+    # Profile the whole run when requested, the profile is written to the workspace so it can be uploaded as an artifact
+    elif 'DEPLOY_PROFILE' in os.environ.keys() and os.environ['DEPLOY_PROFILE'] != '':
+        Profiler.run(
+            function=main,
+            path=os.environ['DEPLOY_PROFILE'],
+            interval=float(os.environ.get('DEPLOY_PROFILE_INTERVAL', '0.005'))
+        )
+    else:
+        main()
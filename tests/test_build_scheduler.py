@@ -0,0 +1,82 @@
+import threading
+
+import pytest
+
+from Deployment.BuildScheduler import BuildScheduler
+
+ESTIMATES = {
+    'small': {'build': 10, 'push': 5},
+    'large': {'build': 100, 'push': 20},
+    'medium': {'build': 40, 'push': 10},
+    'other': {'build': 40, 'push': 10}
+}
+
+
+def test_sequential_keeps_configured_order():
+    scheduler = BuildScheduler(strategy='sequential')
+    assert scheduler.order(['small', 'large', 'medium'], ESTIMATES) == ['small', 'large', 'medium']
+
+
+@pytest.mark.parametrize('strategy', ['parallel', 'pipelined'])
+def test_longest_job_first(strategy):
+    scheduler = BuildScheduler(strategy=strategy, max_workers=2)
+    assert scheduler.order(['small', 'medium', 'large', 'other'], ESTIMATES) == ['large', 'medium', 'other', 'small']
+
+    # Images without a recorded duration start first
+    assert scheduler.order(['small', 'new', 'large'], ESTIMATES) == ['new', 'large', 'small']
+
+
+@pytest.mark.parametrize('strategy', ['parallel', 'pipelined'])
+def test_longest_job_first_is_not_slower(strategy):
+    scheduler = BuildScheduler(strategy=strategy, max_workers=2)
+    images = ['small', 'medium', 'other', 'large']
+    assert scheduler.estimate(scheduler.order(images, ESTIMATES), ESTIMATES) <= scheduler.estimate(images, ESTIMATES)
+
+
+def test_estimate():
+    images = ['small', 'large']
+    assert BuildScheduler(strategy='sequential').estimate(images, ESTIMATES) == 135
+    assert BuildScheduler(strategy='parallel', max_workers=2).estimate(images, ESTIMATES) == 120
+    assert BuildScheduler(strategy='pipelined', max_workers=2).estimate(images, ESTIMATES) == 120
+    assert BuildScheduler(strategy='pipelined', max_workers=1).estimate(images, ESTIMATES) == 130
+    assert BuildScheduler(strategy='parallel').estimate(['new'], ESTIMATES) is None
+
+
+def test_unknown_strategy():
+    with pytest.raises(Exception, match='Unknown build schedule'):
+        BuildScheduler(strategy='random')
+
+
+@pytest.mark.parametrize('strategy', BuildScheduler.STRATEGIES)
+def test_run_pushes_every_image_after_login(strategy):
+    events = []
+    lock = threading.Lock()
+
+    def record(event):
+        with lock:
+            events.append(event)
+
+    durations = BuildScheduler(strategy=strategy, max_workers=2).run(
+        images=['small', 'large', 'medium'],
+        build=lambda image: record(('build', image)),
+        push=lambda image: record(('push', image)),
+        before_push=lambda: record(('login', None))
+    )
+
+    assert sorted(durations.keys()) == ['large', 'medium', 'small']
+    assert all(sorted(duration.keys()) == ['build', 'push'] for duration in durations.values())
+    assert events.count(('login', None)) == 1
+    for image in ['small', 'large', 'medium']:
+        assert events.index(('build', image)) < events.index(('push', image))
+        assert events.index(('login', None)) < events.index(('push', image))
+
+
+def test_run_raises_build_error():
+    def build(image):
+        if image == 'large':
+            raise Exception('Build failed')
+
+    pushed = []
+    with pytest.raises(Exception, match='Build failed'):
+        BuildScheduler(strategy='parallel').run(images=['small', 'large'], build=build, push=pushed.append)
+    assert pushed == []
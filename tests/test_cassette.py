@@ -0,0 +1,60 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+from Aws.Cassette import Cassette
+from Aws.Recorder import Recorder
+
+
+def test_encode_redacts_secrets():
+    encoded = Cassette.encode({
+        'Name': '/production/Env/TOKEN',
+        'Value': 'top-level',
+        'Parameter': {'Name': 'TOKEN', 'Value': 'single'},
+        'Parameters': [{'Name': 'TOKEN', 'Value': 'listed'}],
+        'SecretString': 'secret',
+        'authorizationData': [{'authorizationToken': 'token'}],
+        'containerDefinitions': [{
+            'name': 'web',
+            'environment': [{'name': 'PASSWORD', 'value': 'environment'}],
+            'secrets': [{'name': 'TOKEN', 'valueFrom': 'arn:token'}]
+        }],
+        'tags': [{'key': 'DeploymentHash', 'value': 'hash'}]
+    })
+
+    assert encoded['Name'] == '/production/Env/TOKEN'
+    assert encoded['Value'] == Cassette.REDACTED
+    assert encoded['Parameter'] == {'Name': 'TOKEN', 'Value': Cassette.REDACTED}
+    assert encoded['Parameters'] == [{'Name': 'TOKEN', 'Value': Cassette.REDACTED}]
+    assert encoded['SecretString'] == Cassette.REDACTED
+    assert encoded['authorizationData'] == [{'authorizationToken': Cassette.REDACTED}]
+    assert encoded['containerDefinitions'][0]['environment'] == [{'name': 'PASSWORD', 'value': Cassette.REDACTED}]
+    assert encoded['containerDefinitions'][0]['secrets'] == [{'name': 'TOKEN', 'valueFrom': 'arn:token'}]
+    assert encoded['tags'] == [{'key': 'DeploymentHash', 'value': 'hash'}]
+
+
+def test_encode_round_trip():
+    value = {'createdAt': datetime(2024, 1, 2, 3, 4, 5), 'body': b'\x00\x01', 'count': 3}
+    assert Cassette.decode(Cassette.encode(value)) == value
+
+
+def test_recorder_redacts_requests_and_responses(tmp_path):
+    recorder = Recorder()
+    context = {}
+    Recorder.__capture_parameters__(params={'Name': '/production/Env/TOKEN', 'Value': 'secret', 'Overwrite': True}, context=context)
+    Recorder.__capture_start__(context=context)
+    recorder.__record__(
+        http_response=SimpleNamespace(status_code=200),
+        parsed={'Parameter': {'Name': 'TOKEN', 'Value': 'secret'}, 'ResponseMetadata': {'RequestId': '1'}},
+        model=SimpleNamespace(name='PutParameter', service_model=SimpleNamespace(service_id=SimpleNamespace(hyphenize=lambda: 'ssm'))),
+        context=context
+    )
+
+    filename = str(tmp_path / 'cassette.json.gz')
+    recorder.save(filename)
+    interaction = Cassette.load(filename).interactions[0]
+
+    assert interaction['service'] == 'ssm'
+    assert interaction['operation'] == 'PutParameter'
+    assert interaction['request'] == {'Name': '/production/Env/TOKEN', 'Value': Cassette.REDACTED, 'Overwrite': True}
+    assert interaction['response'] == {'Parameter': {'Name': 'TOKEN', 'Value': Cassette.REDACTED}}
+    assert 'secret' not in str(interaction)
@@ -0,0 +1,163 @@
+import time
+
+import pytest
+
+from Deployment.DeployLock import DeployLock
+from Deployment.DynamoDbLockBackend import DynamoDbLockBackend
+from Deployment.FileLockBackend import FileLockBackend
+
+
+class FakeDynamoDbClient:
+    def __init__(self):
+        """
+        In memory table honouring the conditional writes made by the DynamoDB client
+        """
+        self.items = {}
+
+    def get_item(self, table_name, key):
+        return self.items.get(key['LockName'])
+
+    def put_item(self, table_name, item, expected=None):
+        if self.__matches__(item['LockName'], expected) is False:
+            return False
+        self.items[item['LockName']] = dict(item)
+        return True
+
+    def delete_item(self, table_name, key, expected=None):
+        if self.__matches__(key['LockName'], expected) is False:
+            return False
+        self.items.pop(key['LockName'], None)
+        return True
+
+    def __matches__(self, key, expected):
+        stored = self.items.get(key, {})
+        for name, value in (expected or {}).items():
+            if stored.get(name) != value:
+                return False
+        return True
+
+
+@pytest.fixture(params=['file', 'dynamodb'])
+def backend(request, tmp_path):
+    if request.param == 'file':
+        return FileLockBackend(directory=str(tmp_path))
+    return DynamoDbLockBackend(dynamodb_client=FakeDynamoDbClient(), table_name='deploy-lock')
+
+
+def get_lock(backend, owner, sequence, **kwargs):
+    return DeployLock(
+        backend=backend,
+        name='cluster/production',
+        owner=owner,
+        image_tag=owner,
+        sequence=sequence,
+        poll_interval=0.01,
+        **kwargs
+    )
+
+
+def get_record(owner, sequence, expires):
+    return {'owner': owner, 'image_tag': owner, 'sequence': sequence, 'expires': expires}
+
+
+def test_backend_conditional_writes(backend):
+    first = get_record('first', 1, time.time() + 60)
+    second = get_record('second', 2, time.time() + 60)
+
+    assert backend.get('cluster/lock') is None
+    assert backend.create('cluster/lock', first) is True
+    assert backend.create('cluster/lock', second) is False
+    assert backend.get('cluster/lock') == first
+
+    # Writes against a record that has since changed are refused
+    assert backend.replace('cluster/lock', second, second) is False
+    assert backend.delete('cluster/lock', second) is False
+    assert backend.replace('cluster/lock', second, first) is True
+    assert backend.get('cluster/lock') == second
+    assert backend.delete('cluster/lock', second) is True
+    assert backend.get('cluster/lock') is None
+
+
+def test_acquire_and_release(backend):
+    lock = get_lock(backend, 'first', 1)
+    assert lock.acquire() is True
+    assert lock.is_held() is True
+    assert backend.get('cluster/production/lock')['owner'] == 'first'
+    assert backend.get('cluster/production/waiting') is None
+
+    lock.release()
+    assert lock.is_held() is False
+    assert backend.get('cluster/production/lock') is None
+
+
+def test_newer_deployment_waits_for_held_lock(backend):
+    holder = get_lock(backend, 'first', 1)
+    assert holder.acquire() is True
+
+    waiting = get_lock(backend, 'second', 2, max_wait=0.05)
+    try:
+        with pytest.raises(Exception, match='Timed out waiting for the deploy lock'):
+            waiting.acquire()
+        assert backend.get('cluster/production/lock')['owner'] == 'first'
+        assert backend.get('cluster/production/waiting') is None
+    finally:
+        holder.release()
+
+    assert waiting.acquire() is True
+    waiting.release()
+
+
+def test_older_deployment_is_superseded(backend):
+    holder = get_lock(backend, 'second', 2)
+    assert holder.acquire() is True
+
+    try:
+        assert get_lock(backend, 'first', 1, max_wait=1).acquire() is False
+    finally:
+        holder.release()
+
+
+def test_older_deployment_is_superseded_by_queued_deployment(backend):
+    backend.create('cluster/production/waiting', get_record('second', 2, time.time() + 60))
+    assert get_lock(backend, 'first', 1, max_wait=1).acquire() is False
+
+
+def test_expired_queued_deployment_is_ignored(backend):
+    backend.create('cluster/production/waiting', get_record('second', 2, time.time() - 1))
+
+    lock = get_lock(backend, 'first', 1)
+    assert lock.acquire() is True
+    lock.release()
+
+
+def test_expired_lock_is_taken_over(backend):
+    backend.create('cluster/production/lock', get_record('first', 1, time.time() - 1))
+
+    lock = get_lock(backend, 'second', 2)
+    assert lock.acquire() is True
+    assert backend.get('cluster/production/lock')['owner'] == 'second'
+    lock.release()
+
+
+def test_lock_lost_after_takeover(backend):
+    lock = get_lock(backend, 'first', 1, lease_seconds=0.06)
+    assert lock.acquire() is True
+
+    # Another deployment takes over the lock between renewals, retrying if a renewal changed it first
+    takeover = get_record('second', 2, time.time() + 60)
+    while backend.replace('cluster/production/lock', takeover, backend.get('cluster/production/lock')) is False:
+        pass
+
+    deadline = time.time() + 5
+    while lock.is_held() is True and time.time() < deadline:
+        time.sleep(0.01)
+    assert lock.is_held() is False
+
+    # Releasing a lost lock leaves the new holder in place
+    lock.release()
+    assert backend.get('cluster/production/lock')['owner'] == 'second'
+
+
+def test_invalid_backend_specification():
+    with pytest.raises(Exception, match='Invalid deploy lock'):
+        DeployLock.get_backend('redis:localhost', session=None)
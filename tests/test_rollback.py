@@ -0,0 +1,89 @@
+from Deployment.Rollback import Rollback
+
+
+class FakeEcsClient:
+    def __init__(self, failing_services=None):
+        """
+        Records the rollback requests, services listed as failing raise when they are updated
+        """
+        self.failing_services = failing_services or []
+        self.updated = {}
+        self.settings = {}
+        self.waited = []
+        self.deregistered = []
+
+    def update_service_task_definition(self, cluster_name, service_name, task_definition_arn, **settings):
+        if service_name in self.failing_services:
+            raise Exception('UpdateService failed')
+        self.updated[service_name] = task_definition_arn
+        self.settings[service_name] = settings
+
+    def wait_services_stable(self, cluster_name, services):
+        self.waited.append(list(services))
+
+    def describe_services(self, cluster_name, services):
+        return [{
+            'serviceName': service_name,
+            'deployments': [
+                {'status': 'ACTIVE', 'taskDefinition': 'failed', 'runningCount': 0, 'desiredCount': 0},
+                {'status': 'PRIMARY', 'taskDefinition': self.updated[service_name], 'runningCount': 2, 'desiredCount': 2}
+            ]
+        } for service_name in services]
+
+    def deregister_task_definition(self, task_definition_arn):
+        self.deregistered.append(task_definition_arn)
+
+
+def test_execute_reverts_services_and_deregisters_revisions():
+    ecs_client = FakeEcsClient()
+    rollback = Rollback(ecs_client=ecs_client, cluster_name='cluster')
+    rollback.add_service('web', 'web:1', settings={'desired_count': 4})
+    rollback.add_service('web', 'web:2')
+    rollback.add_service('worker', 'worker:1')
+    rollback.add_task_definition('web:3')
+    rollback.add_task_definition('web:3')
+    rollback.add_task_definition('worker:1')
+
+    assert rollback.get_services() == {'web': 'web:1', 'worker': 'worker:1'}
+    assert rollback.execute() is True
+    assert ecs_client.updated == {'web': 'web:1', 'worker': 'worker:1'}
+    assert ecs_client.settings == {'web': {'desired_count': 4}, 'worker': {}}
+    assert sorted(ecs_client.waited[0]) == ['web', 'worker']
+
+    # The revision a service is rolled back to is never deregistered
+    assert ecs_client.deregistered == ['web:3']
+
+
+def test_execute_continues_after_failure():
+    ecs_client = FakeEcsClient(failing_services=['web'])
+    rollback = Rollback(ecs_client=ecs_client, cluster_name='cluster')
+    rollback.add_service('web', 'web:1')
+    rollback.add_service('worker', 'worker:1')
+    rollback.add_task_definition('web:2')
+
+    assert rollback.execute() is False
+    assert ecs_client.updated == {'worker': 'worker:1'}
+    assert ecs_client.waited == [['worker']]
+    assert ecs_client.deregistered == ['web:2']
+
+
+def test_execute_without_wait():
+    ecs_client = FakeEcsClient()
+    rollback = Rollback(ecs_client=ecs_client, cluster_name='cluster')
+    rollback.add_service('web', 'web:1')
+
+    assert rollback.execute(wait=False) is True
+    assert ecs_client.updated == {'web': 'web:1'}
+    assert ecs_client.waited == []
+
+
+def test_execute_reports_unverified_rollback():
+    ecs_client = FakeEcsClient()
+    ecs_client.describe_services = lambda cluster_name, services: [{
+        'serviceName': 'web',
+        'deployments': [{'status': 'PRIMARY', 'taskDefinition': 'web:2', 'runningCount': 1, 'desiredCount': 1}]
+    }]
+    rollback = Rollback(ecs_client=ecs_client, cluster_name='cluster')
+    rollback.add_service('web', 'web:1')
+
+    assert rollback.execute() is False
@@ -0,0 +1,133 @@
+import pytest
+
+from Aws.Clients import Ecs
+from Aws.TaskDefinitionBuilder import TaskDefinitionBuilder
+
+
+def get_task_definition():
+    return {
+        'taskDefinitionArn': 'arn:aws:ecs:eu-west-1:123456789012:task-definition/web:1',
+        'family': 'web',
+        'revision': 1,
+        'status': 'ACTIVE',
+        'networkMode': 'awsvpc',
+        'containerDefinitions': [{
+            'name': 'web',
+            'image': 'web:old',
+            'environment': [
+                {'name': 'A', 'value': '1'},
+                {'name': 'B', 'value': '2'},
+                {'name': 'A', 'value': '3'}
+            ],
+            'secrets': [{'name': 'TOKEN', 'valueFrom': 'arn:token:1'}]
+        }]
+    }
+
+
+class FakeSession:
+    def __init__(self, client):
+        self.client = client
+
+    def get_client(self, client):
+        return self.client
+
+
+class FakeEcs:
+    def __init__(self):
+        self.registered = []
+
+    def register_task_definition(self, tags, **definition):
+        self.registered.append(definition)
+        task_definition = dict(definition)
+        task_definition.update({
+            'taskDefinitionArn': 'arn:aws:ecs:eu-west-1:123456789012:task-definition/web:{revision}'.format(revision=len(self.registered) + 1),
+            'status': 'ACTIVE'
+        })
+        return {'taskDefinition': task_definition, 'tags': tags}
+
+
+def test_merge_environment_removes_duplicates():
+    builder = TaskDefinitionBuilder(get_task_definition())
+    builder.merge_environment('web', {'B': '4', 'C': '5'})
+
+    assert builder.get_container_definition('web')['environment'] == [
+        {'name': 'A', 'value': '3'},
+        {'name': 'B', 'value': '4'},
+        {'name': 'C', 'value': '5'}
+    ]
+
+
+def test_merge_secrets_keeps_existing_unless_overwritten():
+    builder = TaskDefinitionBuilder(get_task_definition())
+    builder.merge_secrets('web', {'TOKEN': 'arn:token:2', 'KEY': 'arn:key:1'})
+    assert builder.get_container_definition('web')['secrets'] == [
+        {'name': 'TOKEN', 'valueFrom': 'arn:token:1'},
+        {'name': 'KEY', 'valueFrom': 'arn:key:1'}
+    ]
+    assert builder.has_secrets('web', ['TOKEN', 'KEY']) is True
+    assert builder.has_secrets('web', ['OTHER']) is False
+
+    builder.merge_secrets('web', {'TOKEN': 'arn:token:2'}, overwrite=True)
+    assert builder.get_container_definition('web')['secrets'][0] == {'name': 'TOKEN', 'valueFrom': 'arn:token:2'}
+
+
+def test_builder_does_not_modify_source():
+    task_definition = get_task_definition()
+    builder = TaskDefinitionBuilder(task_definition)
+    builder.set_image('web', 'web:new')
+    builder.merge_environment('web', {'C': '5'})
+
+    assert task_definition == get_task_definition()
+    assert 'taskDefinitionArn' not in builder.build().keys()
+    assert builder.build()['containerDefinitions'][0]['image'] == 'web:new'
+
+
+def test_unknown_container():
+    with pytest.raises(Exception, match='Could not locate container'):
+        TaskDefinitionBuilder(get_task_definition()).set_image('worker', 'worker:new')
+
+
+def test_hash_ignores_variable_order():
+    first = TaskDefinitionBuilder(get_task_definition())
+    first.merge_environment('web', {'C': '5', 'D': '6'})
+    second = TaskDefinitionBuilder(get_task_definition())
+    second.merge_environment('web', {'D': '6', 'C': '5'})
+    assert first.get_hash() == second.get_hash()
+
+    second.set_image('web', 'web:new')
+    assert first.get_hash() != second.get_hash()
+
+
+def test_assert_size():
+    builder = TaskDefinitionBuilder(get_task_definition())
+    builder.assert_size()
+
+    builder.merge_environment('web', {'VARIABLE_{index}'.format(index=index): 'x' * 100 for index in range(1000)})
+    with pytest.raises(Exception, match='exceeds the ECS limit'):
+        builder.assert_size()
+
+
+def test_register_reuses_identical_revision():
+    fake = FakeEcs()
+    ecs_client = Ecs.Client(session=FakeSession(fake))
+
+    builder = TaskDefinitionBuilder(get_task_definition())
+    builder.set_image('web', 'web:new')
+    registered, is_new = ecs_client.register_task_definition(builder=builder, current=get_task_definition())
+    assert is_new is True
+    assert len(fake.registered) == 1
+    assert registered['tags'] == [{'key': TaskDefinitionBuilder.HASH_TAG, 'value': builder.get_hash()}]
+
+    # Deploying the same contents again reuses the revision that was just registered
+    builder = TaskDefinitionBuilder(get_task_definition())
+    builder.set_image('web', 'web:new')
+    reused, is_new = ecs_client.register_task_definition(builder=builder, current=registered)
+    assert is_new is False
+    assert reused['taskDefinitionArn'] == registered['taskDefinitionArn']
+    assert len(fake.registered) == 1
+
+    # An inactive revision is never reused
+    registered['status'] = 'INACTIVE'
+    _, is_new = ecs_client.register_task_definition(builder=builder, current=registered)
+    assert is_new is True
+    assert len(fake.registered) == 2